@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+class ModuleDocFragment(object):
+
+    # Standard Ceph documentation fragment
+    DOCUMENTATION = r'''
+options:
+  cluster:
+    description:
+      - Name of the Ceph cluster.
+    default: ceph
+    type: str
+  conf:
+    description:
+      - Path to Ceph cluster configuration file.
+      - Defaults to C(/etc/ceph/<cluster>.conf) if unspecified.
+    type: str
+  user:
+    description:
+      - Ceph client name used to connect to the cluster.
+    default: client.admin
+    type: str
+  connect_timeout:
+    description:
+      - Cluster connection and monitor commands timeout, in seconds.
+    default: 30
+    type: int
+requirements:
+  - "python >= 3.8"
+  - "python3-rados (falls back to ceph CLI if unavailable)"
+'''
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+class ModuleDocFragment(object):
+
+    # Standard MongoDB documentation fragment
+    DOCUMENTATION = r'''
+options:
+  login_host:
+    description:
+      - Address of the MongoDB server to connect to.
+      - A direct connection is always established, no replica set discovery is performed.
+    default: 127.0.0.1
+    type: str
+  login_port:
+    description:
+      - Port of the MongoDB server to connect to.
+    default: 27017
+    type: int
+  login_user:
+    description:
+      - User name used to authenticate against MongoDB server.
+      - If credentials are rejected on a local server, the MongoDB localhost exception is used
+        to bootstrap the very first user.
+    type: str
+  login_password:
+    description:
+      - Password used to authenticate against MongoDB server.
+      - Recommended to be encrypted using Ansible Vault or SOPS.
+    type: str
+  login_database:
+    description:
+      - Authentication database for login credentials.
+    default: admin
+    type: str
+  connect_timeout:
+    description:
+      - Server connection and selection timeout, in seconds.
+    default: 10
+    type: int
+requirements:
+  - "python >= 3.8"
+  - "pymongo >= 3.12"
+'''
@@ -0,0 +1,145 @@
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+import abc
+import copy
+import importlib
+import json
+
+from ansible.module_utils.basic import AnsibleModule
+
+def ceph_argument_spec(**kwargs):
+    spec = dict(
+        cluster=dict(default='ceph', type='str'),
+        conf=dict(type='str'),
+        user=dict(default='client.admin', type='str'),
+        connect_timeout=dict(default=30, type='int'),
+    )
+    spec.update(copy.deepcopy(kwargs))
+    return spec
+
+
+class CephError(Exception):
+    pass
+
+
+class CephModule:
+    """Ceph Module is a base class for all Ceph Module classes.
+
+    A single cluster session is opened through librados Python binding and
+    shared for all monitor commands issued by the module. If the binding is
+    unavailable, commands fall back to the `ceph` CLI.
+
+    Methods:
+        params: Dictionary of Ansible module parameters.
+        exit, exit_json: Exit module and return data inside, must include
+                         changed` keyword in a data.
+        fail, fail_json: Exit module with failure, has `msg` keyword to
+                         specify a reason of failure.
+        mon_command: Issue a monitor command and return its JSON result.
+        run: method that executes and shall be overriden in inherited classes.
+
+    Args:
+        argument_spec: Used for construction of Ceph common arguments.
+        module_kwargs: Additional arguments for Ansible Module.
+    """
+
+    argument_spec = {}
+    module_kwargs = {}
+
+    def __init__(self):
+        """Initialize Ceph base class.
+
+        Set up variables and connection to Ceph cluster.
+        """
+        self.ansible = AnsibleModule(ceph_argument_spec(**self.argument_spec), **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+        self.results = {'changed': False}
+        self.exit = self.exit_json = self.ansible.exit_json
+        self.fail = self.fail_json = self.ansible.fail_json
+        self.warn = self.ansible.warn
+        self.conf = self.params['conf'] or f"/etc/ceph/{self.params['cluster']}.conf"
+        self.rados = None
+        self.cluster = self.connect()
+
+    def connect(self):
+        """Open a cluster session through librados, if available.
+
+        Returns:
+            cluster {obj} connected librados handle, None if CLI is to be used.
+        """
+        try:
+            self.rados = importlib.import_module('rados')
+        except ImportError:
+            return None
+
+        try:
+            cluster = self.rados.Rados(clustername=self.params['cluster'],
+                                       name=self.params['user'],
+                                       conffile=self.conf)
+            cluster.connect(timeout=self.params['connect_timeout'])
+            return cluster
+        except self.rados.Error as e:
+            self.fail_json(msg=f'Unable to connect to Ceph cluster: {e}')
+
+    def mon_command(self, prefix, **kwargs):
+        """Issue a monitor command.
+
+        Arguments are passed as-is to librados. With the CLI fallback, they
+        are appended as positional arguments, in order.
+
+        Arguments:
+            prefix {str}    -- command prefix (e.g. `osd pool set`).
+            kwargs          -- command arguments.
+
+        Returns:
+            output {obj} decoded JSON output, None if command has no output.
+        """
+        if self.cluster:
+            cmd = dict(prefix=prefix, format='json', **kwargs)
+            ret, out, err = self.cluster.mon_command(json.dumps(cmd), b'',
+                                                     timeout=self.params['connect_timeout'])
+            if ret != 0:
+                raise CephError(f"'{prefix}' failed ({ret}): {err}")
+        else:
+            args = ['ceph', '--cluster', self.params['cluster'], '--conf', self.conf,
+                    '--name', self.params['user'], '--format', 'json']
+            args += prefix.split() + [str(v) for v in kwargs.values()]
+            ret, out, err = self.ansible.run_command(args)
+            if ret != 0:
+                raise CephError(f"'{prefix}' failed ({ret}): {err.strip()}")
+
+        if isinstance(out, bytes):
+            out = out.decode('utf-8')
+        if not out.strip():
+            return None
+        try:
+            return json.loads(out)
+        except ValueError:
+            return out
+
+    @abc.abstractmethod
+    def run(self):
+        """Function for overriding in inhetired classes, it's executed by default.
+        """
+        pass
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        try:
+            results = self.run()
+            if results and isinstance(results, dict):
+                self.ansible.exit_json(**results)
+        except CephError as e:
+            params = {
+                'msg': str(e),
+            }
+            self.ansible.fail_json(**params)
+        finally:
+            if self.cluster:
+                self.cluster.shutdown()
+        # if we got to this place, modules didn't exit
+        self.ansible.exit_json(**self.results)
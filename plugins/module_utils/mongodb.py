@@ -0,0 +1,178 @@
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+import abc
+import copy
+import importlib
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+
+# Error codes returned by MongoDB server
+MONGODB_ERR_AUTHENTICATION_FAILED = 18
+MONGODB_ERR_NOT_YET_INITIALIZED = 94
+
+LOCALHOST_ADDRS = ['127.0.0.1', '::1', 'localhost']
+
+def mongodb_argument_spec(**kwargs):
+    spec = dict(
+        login_host=dict(default='127.0.0.1', type='str'),
+        login_port=dict(default=27017, type='int'),
+        login_user=dict(type='str'),
+        login_password=dict(type='str', no_log=True),
+        login_database=dict(default='admin', type='str'),
+        connect_timeout=dict(default=10, type='int'),
+    )
+    spec.update(copy.deepcopy(kwargs))
+    return spec
+
+
+class MongoDBModule:
+    """MongoDB Module is a base class for all MongoDB Module classes.
+
+    The class has `run` function that should be overriden in child classes,
+    the provided methods include:
+
+    Methods:
+        params: Dictionary of Ansible module parameters.
+        exit, exit_json: Exit module and return data inside, must include
+                         changed` keyword in a data.
+        fail, fail_json: Exit module with failure, has `msg` keyword to
+                         specify a reason of failure.
+        client: Authenticated connection to local MongoDB server.
+        localhost_exception: Whether client relies on MongoDB localhost
+                             exception (i.e. no user has been created yet).
+        run: method that executes and shall be overriden in inherited classes.
+
+    Args:
+        argument_spec: Used for construction of MongoDB common arguments.
+        module_kwargs: Additional arguments for Ansible Module.
+    """
+
+    argument_spec = {}
+    module_kwargs = {}
+
+    def __init__(self):
+        """Initialize MongoDB base class.
+
+        Set up variables and a single connection to MongoDB server.
+        """
+        self.ansible = AnsibleModule(mongodb_argument_spec(**self.argument_spec), **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+        self.results = {'changed': False}
+        self.exit = self.exit_json = self.ansible.exit_json
+        self.fail = self.fail_json = self.ansible.fail_json
+        self.warn = self.ansible.warn
+        self.pymongo = self._import_pymongo()
+        self.localhost_exception = False
+        self.client = self.connect()
+
+    def _import_pymongo(self):
+        """Import pymongo library, fails module if unavailable.
+        """
+        try:
+            return importlib.import_module('pymongo')
+        except ImportError:
+            self.fail_json(msg='pymongo is required for this module')
+
+    def connect(self, host=None, port=None, authenticated=True):
+        """Open a direct connection to a MongoDB server.
+
+        If credentials are rejected and server is local, fall back to an
+        unauthenticated connection, relying on MongoDB localhost exception
+        to bootstrap the very first user.
+
+        Arguments:
+            host {str}            -- server address (defaults to login_host).
+            port {int}            -- server port (defaults to login_port).
+            authenticated {bool}  -- whether to use login credentials.
+
+        Returns:
+            client {obj} pymongo client.
+        """
+        host = host or self.params['login_host']
+        port = port or self.params['login_port']
+        kwargs = dict(
+            host=host,
+            port=port,
+            directConnection=True,
+            connectTimeoutMS=self.params['connect_timeout'] * 1000,
+            serverSelectionTimeoutMS=self.params['connect_timeout'] * 1000,
+        )
+        if authenticated and self.params['login_user']:
+            kwargs.update(
+                username=self.params['login_user'],
+                password=self.params['login_password'],
+                authSource=self.params['login_database'],
+            )
+
+        client = self.pymongo.MongoClient(**kwargs)
+        try:
+            client.admin.command('ping')
+        except self.pymongo.errors.OperationFailure as e:
+            client.close()
+            if (authenticated and e.code == MONGODB_ERR_AUTHENTICATION_FAILED
+                    and host in LOCALHOST_ADDRS):
+                self.localhost_exception = True
+                return self.connect(host, port, authenticated=False)
+            self.fail_json(msg=f'Unable to connect to MongoDB server {host}:{port}: {e}')
+        except self.pymongo.errors.PyMongoError as e:
+            self.fail_json(msg=f'Unable to connect to MongoDB server {host}:{port}: {e}')
+        return client
+
+    def reconnect(self, host=None, port=None):
+        """Replace current client with an authenticated one, possibly to another server.
+        """
+        self.client.close()
+        self.localhost_exception = False
+        self.client = self.connect(host, port)
+
+    def hello(self):
+        """Retrieve server topology information.
+        """
+        return self.client.admin.command('hello')
+
+    def wait_for_primary(self, timeout):
+        """Wait until replica set elects a primary.
+
+        Arguments:
+            timeout {int}   -- maximum number of seconds to wait for.
+
+        Returns:
+            hello {dict} last server topology information.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.2
+        while True:
+            hello = self.hello()
+            if hello.get('primary'):
+                return hello
+            if time.monotonic() >= deadline:
+                self.fail_json(msg=f'No replica set primary elected after {timeout}s')
+            time.sleep(delay)
+            delay = min(delay * 2, 2)
+
+    @abc.abstractmethod
+    def run(self):
+        """Function for overriding in inhetired classes, it's executed by default.
+        """
+        pass
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        try:
+            results = self.run()
+            if results and isinstance(results, dict):
+                self.ansible.exit_json(**results)
+        except self.pymongo.errors.PyMongoError as e:
+            params = {
+                'msg': str(e),
+            }
+            self.ansible.fail_json(**params)
+        finally:
+            self.client.close()
+        # if we got to this place, modules didn't exit
+        self.ansible.exit_json(**self.results)
@@ -0,0 +1,341 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: admin_accounts
+short_description: Manage local UNIX admin accounts
+author: The Kowabunga Project
+description:
+  - Create or remove a set of nominative admin accounts, along with their
+    groups membership, password-less sudo rights, shell aliases and SSH
+    authorized keys.
+  - C(/etc/passwd) and C(/etc/group) are parsed once and the delta is computed
+    for all accounts at once. Commands are only issued for accounts which need
+    it and files are only (atomically) written when their content differs.
+options:
+  users:
+    description:
+      - List of accounts.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - Account name.
+        required: true
+        type: str
+      state:
+        description:
+          - Whether account must exist or not.
+          - Absent accounts are removed along with their home directory and sudoers rights.
+        default: present
+        choices: [present, absent]
+        type: str
+      groups:
+        description:
+          - Supplementary groups account must be member of.
+          - Account is never removed from other groups.
+        default: []
+        type: list
+        elements: str
+      sudo:
+        description:
+          - Whether account is granted password-less root privileges.
+        default: true
+        type: bool
+      ssh_keys:
+        description:
+          - Content of account SSH C(authorized_keys) file.
+          - File is left untouched if unspecified.
+        type: str
+  shell:
+    description:
+      - Login shell of created accounts.
+    default: /bin/bash
+    type: str
+  aliases:
+    description:
+      - Path to a shell aliases file accounts C(~/.bash_aliases) must link to.
+    type: path
+  sudoers_dir:
+    description:
+      - Directory where per-account sudoers files are written.
+    default: /etc/sudoers.d
+    type: path
+'''
+
+EXAMPLES = r'''
+- name: Manage admin accounts
+  kowabunga.cloud.admin_accounts:
+    aliases: /etc/bash.aliases.kowabunga
+    users:
+      - name: jdoe
+        groups:
+          - adm
+        ssh_keys: "{{ lookup('ansible.builtin.file', 'keys/jdoe') }}"
+      - name: olduser
+        state: absent
+'''
+
+RETURN = r'''
+users:
+  description: List of changes applied to accounts.
+  returned: On success.
+  type: list
+  elements: dict
+  contains:
+    name:
+      description: Account name
+      type: str
+      sample: "jdoe"
+    changes:
+      description: Applied changes.
+      type: list
+      sample: ["created", "groups", "sudoers", "ssh_keys"]
+'''
+
+import errno
+import os
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule
+
+SUDOERS_TEMPLATE = '{name} ALL=(ALL) NOPASSWD:ALL\n'
+
+class AdminAccountsModule:
+    argument_spec = dict(
+        users=dict(required=True, type='list', elements='dict', options=dict(
+            name=dict(required=True, type='str'),
+            state=dict(default='present', choices=['present', 'absent']),
+            groups=dict(default=[], type='list', elements='str'),
+            sudo=dict(default=True, type='bool'),
+            ssh_keys=dict(type='str', no_log=False),
+        )),
+        shell=dict(default='/bin/bash', type='str'),
+        aliases=dict(type='path'),
+        sudoers_dir=dict(default='/etc/sudoers.d', type='path'),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def __init__(self):
+        self.ansible = AnsibleModule(self.argument_spec, **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+
+    def run(self):
+        self.passwd = self._parse('/etc/passwd')
+        self.members = dict((g[0], set(m for m in g[3].split(',') if m))
+                            for g in self._parse('/etc/group').values())
+
+        changes = []
+        for user in self.params['users']:
+            if user['state'] == 'present':
+                fields = self._present(user)
+            else:
+                fields = self._absent(user)
+            if fields:
+                changes.append(dict(name=user['name'], changes=fields))
+        return dict(changed=bool(changes), users=changes)
+
+    @staticmethod
+    def _parse(path):
+        """Parse a colon-separated database file.
+
+        Returns:
+            entries {dict} entries fields, indexed by name.
+        """
+        entries = {}
+        with open(path) as f:
+            for line in f:
+                fields = line.rstrip('\n').split(':')
+                if fields[0] and not fields[0].startswith(('#', '+', '-')):
+                    entries[fields[0]] = fields
+        return entries
+
+    def _command(self, args):
+        rc, _, err = self.ansible.run_command(args)
+        if rc != 0:
+            self.ansible.fail_json(msg=f"'{' '.join(args)}' failed ({rc}): {err.strip()}")
+
+    def _present(self, user):
+        """Converge an account which must exist.
+
+        Returns:
+            fields {list} applied changes.
+        """
+        name = user['name']
+        fields = []
+        entry = self.passwd.get(name)
+        if not entry:
+            fields.append('created')
+            if self.check_mode:
+                return fields + ['groups'] * bool(user['groups']) + ['sudoers'] * user['sudo']
+            self._command(['useradd', '--create-home', '--user-group',
+                           '--shell', self.params['shell'], name])
+            entry = self._parse('/etc/passwd')[name]
+        uid, gid, home = int(entry[2]), int(entry[3]), entry[5]
+
+        missing = [g for g in user['groups'] if name not in self.members.get(g, set())]
+        if missing:
+            fields.append('groups')
+            if not self.check_mode:
+                self._command(['usermod', '--append', '--groups', ','.join(missing), name])
+
+        if self.params['aliases'] and self._link(os.path.join(home, '.bash_aliases'),
+                                                 self.params['aliases'], uid, gid):
+            fields.append('aliases')
+
+        sudoers = os.path.join(self.params['sudoers_dir'], name)
+        if user['sudo']:
+            if self._write(sudoers, SUDOERS_TEMPLATE.format(name=name), 0, 0, 0o440, validate=True):
+                fields.append('sudoers')
+        elif os.path.exists(sudoers):
+            fields.append('sudoers')
+            if not self.check_mode:
+                os.unlink(sudoers)
+
+        ssh_dir = os.path.join(home, '.ssh')
+        if self._directory(ssh_dir, uid, gid, 0o700):
+            fields.append('ssh_dir')
+        if user['ssh_keys'] is not None:
+            keys = user['ssh_keys'].rstrip('\n') + '\n'
+            if self._write(os.path.join(ssh_dir, 'authorized_keys'), keys, uid, gid, 0o600):
+                fields.append('ssh_keys')
+        return fields
+
+    def _absent(self, user):
+        """Remove an account, along with its home directory and sudoers rights.
+
+        Returns:
+            fields {list} applied changes.
+        """
+        name = user['name']
+        fields = []
+        if name in self.passwd:
+            fields.append('removed')
+            if not self.check_mode:
+                self._command(['userdel', '--remove', name])
+        sudoers = os.path.join(self.params['sudoers_dir'], name)
+        if os.path.exists(sudoers):
+            fields.append('sudoers')
+            if not self.check_mode:
+                os.unlink(sudoers)
+        return fields
+
+    @staticmethod
+    def _owned(st, uid, gid, mode):
+        return st.st_uid == uid and st.st_gid == gid and (st.st_mode & 0o7777) == mode
+
+    def _directory(self, path, uid, gid, mode):
+        """Ensure a directory exists with proper ownership and permissions.
+
+        Directory is opened without following symbolic links, so that a
+        user-controlled link never redirects ownership or permissions changes.
+
+        Returns:
+            changed {bool} whether directory has been updated.
+        """
+        flags = os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW
+        created = False
+        try:
+            fd = os.open(path, flags)
+        except FileNotFoundError:
+            if self.check_mode:
+                return True
+            os.mkdir(path, mode)
+            fd = os.open(path, flags)
+            created = True
+        except OSError as e:
+            if e.errno in (errno.ELOOP, errno.ENOTDIR):
+                self.ansible.fail_json(msg=f'{path} is not a directory, refusing to update it')
+            raise
+        try:
+            if self._owned(os.fstat(fd), uid, gid, mode):
+                return created
+            if not self.check_mode:
+                os.fchown(fd, uid, gid)
+                os.fchmod(fd, mode)
+        finally:
+            os.close(fd)
+        return True
+
+    def _link(self, path, target, uid, gid):
+        """Ensure path is a symbolic link to target.
+
+        Returns:
+            changed {bool} whether link has been updated.
+        """
+        if os.path.islink(path) and os.readlink(path) == target:
+            return False
+        if self.check_mode:
+            return True
+
+        # Link is created under an unpredictable name, as path lies in a
+        # user-owned directory.
+        directory, name = os.path.split(path)
+        while True:
+            tmp = os.path.join(directory, f'.{name}.{os.urandom(8).hex()}')
+            try:
+                os.symlink(target, tmp)
+                break
+            except FileExistsError:
+                continue
+        try:
+            os.lchown(tmp, uid, gid)
+            os.rename(tmp, path)
+        except BaseException:
+            if os.path.lexists(tmp):
+                os.unlink(tmp)
+            raise
+        return True
+
+    def _write(self, path, content, uid, gid, mode, validate=False):
+        """Atomically write a file, only if its content or permissions differ.
+
+        Returns:
+            changed {bool} whether file has been updated.
+        """
+        data = content.encode('utf-8')
+        try:
+            with open(path, 'rb') as f:
+                if f.read() == data and self._owned(os.fstat(f.fileno()), uid, gid, mode):
+                    return False
+        except FileNotFoundError:
+            pass
+        if self.check_mode:
+            return True
+
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chown(tmp, uid, gid)
+            os.chmod(tmp, mode)
+            if validate:
+                self._command(['visudo', '-c', '-q', '-f', tmp])
+            os.rename(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return True
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        self.ansible.exit_json(**self.run())
+
+def main():
+    module = AdminAccountsModule()
+    module()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: ceph_osd
+short_description: Manage Ceph OSDs CRUSH weight and state
+author: The Kowabunga Project
+description:
+  - Ensure local Ceph OSDs have the requested CRUSH weight and are up and running.
+  - Cluster state is read once through C(osd tree) and C(osd dump) and only
+    OSDs whose weight differs beyond tolerance are reweighted, in a single
+    batch.
+  - When all OSDs of a CRUSH host bucket require the same weight, a single
+    C(osd crush reweight-subtree) command is issued.
+  - Only OSDs reported down are started and only disabled units are enabled,
+    through a single C(systemctl) invocation each.
+options:
+  osds:
+    description:
+      - List of local OSDs.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      id:
+        description:
+          - OSD identifier.
+        required: true
+        type: int
+      weight:
+        description:
+          - Requested CRUSH weight.
+        required: true
+        type: float
+  tolerance:
+    description:
+      - Maximum difference between current and requested CRUSH weight for an OSD not to be reweighted.
+    default: 0.01
+    type: float
+  manage_services:
+    description:
+      - Whether OSDs systemd units must be enabled and started.
+    default: true
+    type: bool
+extends_documentation_fragment:
+  - kowabunga.cloud.ceph
+'''
+
+EXAMPLES = r'''
+- name: Converge OSDs
+  kowabunga.cloud.ceph_osd:
+    osds:
+      - id: 0
+        weight: 1.81898
+      - id: 1
+        weight: 1.81898
+'''
+
+RETURN = r'''
+reweighted:
+  description: List of reweighted OSDs.
+  returned: On success.
+  type: list
+  elements: dict
+  sample: [{"id": 0, "from": 1.0, "to": 1.81898}]
+started:
+  description: List of started OSDs identifiers.
+  returned: On success.
+  type: list
+  elements: int
+  sample: [1]
+enabled:
+  description: List of enabled OSDs identifiers.
+  returned: On success.
+  type: list
+  elements: int
+  sample: [1]
+'''
+
+from ansible_collections.kowabunga.cloud.plugins.module_utils.ceph import CephModule, CephError
+
+class CephOsdModule(CephModule):
+    argument_spec = dict(
+        osds=dict(required=True, type='list', elements='dict', options=dict(
+            id=dict(required=True, type='int'),
+            weight=dict(required=True, type='float'),
+        )),
+        tolerance=dict(default=0.01, type='float'),
+        manage_services=dict(default=True, type='bool'),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def run(self):
+        tree = self.mon_command('osd tree')
+        dump = self.mon_command('osd dump')
+
+        enabled = []
+        started = []
+        if self.params['manage_services']:
+            enabled, started = self._services(dump)
+        reweighted = self._reweight(tree)
+
+        return dict(changed=bool(reweighted or started or enabled),
+                    reweighted=reweighted, started=started, enabled=enabled)
+
+    def _build_reweights(self, tree):
+        """Compute OSDs whose CRUSH weight differs from requested one.
+
+        Returns:
+            reweights {dict} requested weight, indexed by OSD ID.
+            current {dict} current weight, indexed by OSD ID.
+        """
+        current = dict((n['id'], n.get('crush_weight', 0))
+                       for n in tree.get('nodes', []) if n.get('type') == 'osd')
+        reweights = {}
+        for osd in self.params['osds']:
+            if osd['id'] not in current:
+                raise CephError(f"osd.{osd['id']} does not exist in CRUSH map")
+            if abs(current[osd['id']] - osd['weight']) > self.params['tolerance']:
+                reweights[osd['id']] = osd['weight']
+        return reweights, current
+
+    def _reweight(self, tree):
+        """Apply CRUSH weight changes in a single batch.
+        """
+        reweights, current = self._build_reweights(tree)
+        result = [{'id': i, 'from': current[i], 'to': w} for i, w in sorted(reweights.items())]
+        if not reweights or self.check_mode:
+            return result
+
+        for node in tree.get('nodes', []):
+            children = set(node.get('children', []))
+            if (node.get('type') == 'host' and children
+                    and children == set(reweights) and len(set(reweights.values())) == 1):
+                self.mon_command('osd crush reweight-subtree', name=node['name'],
+                                 weight=list(reweights.values())[0])
+                return result
+
+        for i, w in sorted(reweights.items()):
+            self.mon_command('osd crush reweight', name=f'osd.{i}', weight=w)
+        return result
+
+    def _services(self, dump):
+        """Enable and start OSDs systemd units which need it.
+
+        Returns:
+            enabled {list} IDs of OSDs whose unit has been enabled.
+            started {list} IDs of OSDs whose unit has been started.
+        """
+        ids = [osd['id'] for osd in self.params['osds']]
+        units = [f'ceph-osd@{i}' for i in ids]
+
+        # is-enabled prints one state per unit, in order, whatever its return code
+        _, out, _ = self.ansible.run_command(['systemctl', 'is-enabled'] + units)
+        states = out.splitlines()
+        if len(states) != len(ids):
+            states = [''] * len(ids)
+        enabled = [i for i, s in zip(ids, states) if s.strip() not in ['enabled', 'enabled-runtime']]
+
+        up = set(o['osd'] for o in dump.get('osds', []) if o.get('up'))
+        started = [i for i in ids if i not in up]
+
+        if self.check_mode:
+            return enabled, started
+
+        if enabled:
+            self._systemctl('enable', enabled)
+        if started:
+            self._systemctl('start', started)
+        return enabled, started
+
+    def _systemctl(self, action, ids):
+        """Run a systemctl action over a set of OSDs units at once.
+        """
+        args = ['systemctl', action] + [f'ceph-osd@{i}' for i in ids]
+        ret, _, err = self.ansible.run_command(args)
+        if ret != 0:
+            raise CephError(f"'{' '.join(args)}' failed ({ret}): {err.strip()}")
+
+def main():
+    module = CephOsdModule()
+    module()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: ceph_pool
+short_description: Manage Ceph OSD pools
+author: The Kowabunga Project
+description:
+  - Create or update a set of Ceph replicated OSD pools.
+  - Existing pools are read once through C(osd pool ls detail) and only
+    settings which differ from requested ones are applied, through a single
+    cluster session.
+options:
+  pools:
+    description:
+      - List of OSD pools.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - Pool name.
+        required: true
+        type: str
+      ptype:
+        description:
+          - Type of storage pool.
+          - C(rbd) pools are initialized for block devices usage.
+          - C(fs) pools get no application enabled, CephFS takes care of it.
+        choices: [rbd, fs]
+        default: rbd
+        type: str
+      pgs:
+        description:
+          - Number of PGs to be allocated to the pool.
+          - Only updated on pools whose PG autoscaler is not C(on).
+        required: true
+        type: int
+      replication:
+        description:
+          - Pool data replication factor.
+        required: true
+        type: dict
+        suboptions:
+          min:
+            description:
+              - Minimum replicas to be alive for the cluster to be safe.
+            required: true
+            type: int
+          request:
+            description:
+              - Target replica count.
+            required: true
+            type: int
+      compression:
+        description:
+          - Data compression settings.
+        type: dict
+        suboptions:
+          mode:
+            description:
+              - Compression mode.
+            default: passive
+            choices: [none, passive, aggressive, force]
+            type: str
+          algorithm:
+            description:
+              - Compression algorithm.
+            default: snappy
+            choices: [lz4, snappy, zlib, zstd]
+            type: str
+      application:
+        description:
+          - Application to be enabled on pool.
+          - Defaults to pool name for non-C(fs) pools.
+        type: str
+extends_documentation_fragment:
+  - kowabunga.cloud.ceph
+'''
+
+EXAMPLES = r'''
+- name: Create pools
+  kowabunga.cloud.ceph_pool:
+    pools:
+      - name: rbd
+        ptype: rbd
+        pgs: 256
+        replication:
+          min: 1
+          request: 2
+        compression:
+          mode: passive
+          algorithm: snappy
+  run_once: true
+'''
+
+RETURN = r'''
+pools:
+  description: List of changes applied to pools.
+  returned: On success.
+  type: list
+  elements: dict
+  contains:
+    name:
+      description: Pool name
+      type: str
+      sample: "rbd"
+    action:
+      description: Action performed on pool.
+      type: str
+      sample: "update"
+    fields:
+      description: Updated pool settings.
+      type: list
+      sample: ["size", "min_size"]
+'''
+
+import importlib
+
+from ansible_collections.kowabunga.cloud.plugins.module_utils.ceph import CephModule, CephError
+
+class CephPoolModule(CephModule):
+    argument_spec = dict(
+        pools=dict(required=True, type='list', elements='dict', options=dict(
+            name=dict(required=True, type='str'),
+            ptype=dict(default='rbd', choices=['rbd', 'fs']),
+            pgs=dict(required=True, type='int'),
+            replication=dict(required=True, type='dict', options=dict(
+                min=dict(required=True, type='int'),
+                request=dict(required=True, type='int'),
+            )),
+            compression=dict(type='dict', default={}, options=dict(
+                mode=dict(default='passive', choices=['none', 'passive', 'aggressive', 'force']),
+                algorithm=dict(default='snappy', choices=['lz4', 'snappy', 'zlib', 'zstd']),
+            )),
+            application=dict(type='str'),
+        )),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def run(self):
+        current = self._read()
+        changes = []
+        for pool in self.params['pools']:
+            change = self._apply(pool, current.get(pool['name']))
+            if change:
+                changes.append(change)
+        return dict(changed=bool(changes), pools=changes)
+
+    def _read(self):
+        """Read all existing pools in a single monitor command.
+
+        Returns:
+            pools {dict} pools details, indexed by name.
+        """
+        pools = self.mon_command('osd pool ls', detail='detail') or []
+        return dict((p['pool_name'], p) for p in pools)
+
+    def _build_settings(self, pool, current):
+        """Compute pool settings which differ from current ones.
+
+        Arguments:
+            pool {dict}     -- requested pool.
+            current {dict}  -- existing pool details.
+
+        Returns:
+            settings {list} ordered list of (var, value) tuples to be set.
+        """
+        compression = pool['compression']
+        options = current.get('options', {})
+        size = pool['replication']['request']
+        min_size = pool['replication']['min']
+
+        replication = [('size', size), ('min_size', min_size)]
+        if size < current.get('min_size', 0):
+            # Lower min_size first, it can't be larger than size
+            replication.reverse()
+
+        settings = []
+        for var, value in replication:
+            if current.get(var) != value:
+                settings.append((var, value))
+        if current.get('pg_autoscale_mode') != 'on':
+            pg_num = current.get('pg_num_target', current.get('pg_num'))
+            if pg_num != pool['pgs']:
+                settings.append(('pg_num', pool['pgs']))
+        for var in ['mode', 'algorithm']:
+            if options.get(f'compression_{var}') != compression[var]:
+                settings.append((f'compression_{var}', compression[var]))
+        return settings
+
+    def _apply(self, pool, current):
+        """Converge a single pool.
+
+        Arguments:
+            pool {dict}     -- requested pool.
+            current {dict}  -- existing pool details, None if pool does not exist.
+
+        Returns:
+            change {dict} applied change, None if nothing changed.
+        """
+        name = pool['name']
+        change = dict(name=name, action='update', fields=[])
+        if not current:
+            change['action'] = 'create'
+            if not self.check_mode:
+                self.mon_command('osd pool create', pool=name, pg_num=pool['pgs'],
+                                 pgp_num=pool['pgs'], pool_type='replicated')
+                current = self._read().get(name, {})
+            else:
+                current = {}
+
+        for var, value in self._build_settings(pool, current):
+            change['fields'].append(var)
+            if not self.check_mode:
+                self.mon_command('osd pool set', pool=name, var=var, val=str(value))
+
+        applications = current.get('application_metadata', {})
+        if pool['ptype'] == 'rbd' and 'rbd' not in applications:
+            change['fields'].append('rbd_init')
+            if not self.check_mode:
+                self._rbd_pool_init(name)
+            applications = dict(applications, rbd={})
+
+        application = pool['application'] or (name if pool['ptype'] != 'fs' else None)
+        if application and application not in applications:
+            change['fields'].append('application')
+            if not self.check_mode:
+                self.mon_command('osd pool application enable', pool=name, app=application)
+
+        if change['action'] == 'update' and not change['fields']:
+            return None
+        return change
+
+    def _rbd_pool_init(self, name):
+        """Initialize pool for RBD usage.
+        """
+        if self.cluster:
+            try:
+                rbd = importlib.import_module('rbd')
+            except ImportError:
+                rbd = None
+            if rbd:
+                ioctx = self.cluster.open_ioctx(name)
+                try:
+                    rbd.RBD().pool_init(ioctx, False)
+                finally:
+                    ioctx.close()
+                return
+
+        args = ['rbd', '--cluster', self.params['cluster'], '--conf', self.conf,
+                '--name', self.params['user'], 'pool', 'init', name]
+        ret, _, err = self.ansible.run_command(args)
+        if ret != 0:
+            raise CephError(f"'rbd pool init {name}' failed ({ret}): {err.strip()}")
+
+def main():
+    module = CephPoolModule()
+    module()
+
+if __name__ == '__main__':
+    main()
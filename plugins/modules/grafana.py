@@ -0,0 +1,348 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: grafana
+short_description: Provision Grafana organization, datasources and users
+author: The Kowabunga Project
+description:
+  - Converge a Grafana instance main organization name, datasources and
+    users through Grafana HTTP API.
+  - Organization, datasources and users are read in bulk, through a single
+    authenticated session, and only required changes are written.
+  - Grafana readiness is polled with an exponential backoff.
+options:
+  url:
+    description:
+      - Grafana base URL.
+    default: http://127.0.0.1:3000
+    type: str
+  username:
+    description:
+      - Grafana admin user name.
+    default: admin
+    type: str
+  password:
+    description:
+      - Grafana admin user password.
+    required: true
+    type: str
+  validate_certs:
+    description:
+      - Whether Grafana TLS certificate must be validated.
+    default: true
+    type: bool
+  timeout:
+    description:
+      - API requests timeout, in seconds.
+    default: 30
+    type: int
+  wait_timeout:
+    description:
+      - Maximum time to wait for Grafana to be ready, in seconds.
+    default: 60
+    type: int
+  org:
+    description:
+      - Main organization settings.
+    type: dict
+    suboptions:
+      id:
+        description:
+          - Organization identifier.
+        default: 1
+        type: int
+      name:
+        description:
+          - Organization name.
+        required: true
+        type: str
+  datasources:
+    description:
+      - List of datasources definitions, as expected by Grafana API.
+      - Each definition must at least include C(name) and C(type).
+      - Existing datasources are updated when one of the requested
+        attributes differs.
+    default: []
+    type: list
+    elements: dict
+  users:
+    description:
+      - List of users to be registered.
+      - Passwords are only set at creation.
+    default: []
+    type: list
+    elements: dict
+    suboptions:
+      login:
+        description:
+          - User login.
+        required: true
+        aliases: [username]
+        type: str
+      name:
+        description:
+          - User full name.
+        type: str
+      email:
+        description:
+          - User email address.
+        type: str
+      password:
+        description:
+          - User initial password.
+        required: true
+        type: str
+requirements:
+  - "python >= 3.8"
+'''
+
+EXAMPLES = r'''
+- name: Provision Grafana
+  kowabunga.cloud.grafana:
+    url: http://127.0.0.1:3000
+    username: admin
+    password: "{{ grafana_admin_password }}"
+    org:
+      name: Acme
+    datasources:
+      - name: prometheus
+        type: prometheus
+        url: http://127.0.0.1:9090
+        access: proxy
+        isDefault: true
+    users:
+      - login: jdoe
+        name: John Doe
+        email: jdoe@acme.com
+        password: "{{ jdoe_password }}"
+'''
+
+RETURN = r'''
+org:
+  description: Whether organization has been renamed.
+  returned: On success.
+  type: bool
+  sample: false
+datasources:
+  description: List of changes applied to datasources.
+  returned: On success.
+  type: list
+  elements: dict
+  sample: [{"name": "prometheus", "action": "create"}]
+users:
+  description: List of changes applied to users.
+  returned: On success.
+  type: list
+  elements: dict
+  sample: [{"login": "jdoe", "action": "update"}]
+'''
+
+import json
+import time
+
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import Request
+
+USERS_PAGE_SIZE = 1000
+
+class GrafanaError(Exception):
+    pass
+
+class GrafanaModule:
+    argument_spec = dict(
+        url=dict(default='http://127.0.0.1:3000', type='str'),
+        username=dict(default='admin', type='str'),
+        password=dict(required=True, type='str', no_log=True),
+        validate_certs=dict(default=True, type='bool'),
+        timeout=dict(default=30, type='int'),
+        wait_timeout=dict(default=60, type='int'),
+        org=dict(type='dict', options=dict(
+            id=dict(default=1, type='int'),
+            name=dict(required=True, type='str'),
+        )),
+        datasources=dict(default=[], type='list', elements='dict'),
+        users=dict(default=[], type='list', elements='dict', options=dict(
+            login=dict(required=True, type='str', aliases=['username']),
+            name=dict(type='str'),
+            email=dict(type='str'),
+            password=dict(required=True, type='str', no_log=True),
+        )),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def __init__(self):
+        self.ansible = AnsibleModule(self.argument_spec, **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+        self.base_url = self.params['url'].rstrip('/') + '/api'
+        self.session = Request(url_username=self.params['username'],
+                               url_password=self.params['password'],
+                               force_basic_auth=True,
+                               validate_certs=self.params['validate_certs'],
+                               timeout=self.params['timeout'],
+                               headers={'Accept': 'application/json',
+                                        'Content-Type': 'application/json'})
+
+    def run(self):
+        self._wait()
+        org = self._org()
+        datasources = self._datasources()
+        users = self._users()
+        return dict(changed=bool(org or datasources or users),
+                    org=org, datasources=datasources, users=users)
+
+    def _request(self, method, path, data=None):
+        """Issue an API request over the authenticated session.
+
+        Returns:
+            output {obj} decoded JSON response, None if response has no content.
+        """
+        body = json.dumps(data) if data is not None else None
+        try:
+            r = self.session.open(method, self.base_url + path, data=body)
+            content = r.read()
+        except HTTPError as e:
+            try:
+                error = json.loads(e.read()).get('message', e.reason)
+            except ValueError:
+                error = e.reason
+            raise GrafanaError(f'{method} {path} failed ({e.code}): {error}') from e
+        if not content:
+            return None
+        return json.loads(content)
+
+    def _wait(self):
+        """Wait for Grafana to be ready, e.g. right after service (re)start.
+        """
+        deadline = time.monotonic() + self.params['wait_timeout']
+        delay = 0.25
+        while True:
+            try:
+                health = self._request('GET', '/health') or {}
+                if health.get('database') == 'ok':
+                    return
+                error = f"database is {health.get('database')}"
+            except (GrafanaError, URLError, ConnectionError) as e:
+                error = str(e)
+            if time.monotonic() + delay > deadline:
+                raise GrafanaError(f'Grafana is not ready: {error}')
+            time.sleep(delay)
+            delay = min(delay * 2, 5)
+
+    def _org(self):
+        """Converge main organization name.
+
+        Returns:
+            changed {bool} whether organization has been renamed.
+        """
+        org = self.params['org']
+        if not org:
+            return False
+        current = self._request('GET', f"/orgs/{org['id']}")
+        if current.get('name') == org['name']:
+            return False
+        if not self.check_mode:
+            self._request('PUT', f"/orgs/{org['id']}", dict(name=org['name']))
+        return True
+
+    @classmethod
+    def _differs(cls, desired, current):
+        """Check whether requested attributes differ from current ones.
+        """
+        if isinstance(desired, dict):
+            if not isinstance(current, dict):
+                return True
+            return any(cls._differs(v, current.get(k)) for k, v in desired.items())
+        return desired != current
+
+    def _datasources(self):
+        """Converge datasources from a single listing.
+
+        Returns:
+            changes {list} applied changes.
+        """
+        if not self.params['datasources']:
+            return []
+        current = dict((ds['name'], ds) for ds in self._request('GET', '/datasources'))
+        changes = []
+        for ds in self.params['datasources']:
+            if 'name' not in ds or 'type' not in ds:
+                raise GrafanaError('Datasources require at least a name and a type')
+            existing = current.get(ds['name'])
+            if not existing:
+                changes.append(dict(name=ds['name'], action='create'))
+                if not self.check_mode:
+                    self._request('POST', '/datasources', ds)
+            elif self._differs(ds, existing):
+                changes.append(dict(name=ds['name'], action='update'))
+                if not self.check_mode:
+                    payload = dict(existing, **ds)
+                    payload['jsonData'] = dict(existing.get('jsonData') or {}, **ds.get('jsonData', {}))
+                    self._request('PUT', f"/datasources/uid/{quote(existing['uid'])}", payload)
+        return changes
+
+    def _list_users(self):
+        """Retrieve all users, indexed by login.
+        """
+        users = {}
+        page = 1
+        while True:
+            batch = self._request('GET', f'/users?perpage={USERS_PAGE_SIZE}&page={page}') or []
+            users.update((u['login'], u) for u in batch)
+            if len(batch) < USERS_PAGE_SIZE:
+                return users
+            page += 1
+
+    def _users(self):
+        """Converge users from a single listing.
+
+        Returns:
+            changes {list} applied changes.
+        """
+        if not self.params['users']:
+            return []
+        current = self._list_users()
+        changes = []
+        for user in self.params['users']:
+            existing = current.get(user['login'])
+            if not existing:
+                changes.append(dict(login=user['login'], action='create'))
+                if not self.check_mode:
+                    data = dict((k, v) for k, v in user.items() if v is not None)
+                    self._request('POST', '/admin/users', data)
+                continue
+            attrs = dict((k, user[k]) for k in ['name', 'email'] if user[k] is not None)
+            if self._differs(attrs, existing):
+                changes.append(dict(login=user['login'], action='update'))
+                if not self.check_mode:
+                    data = dict(login=existing['login'], name=existing.get('name'),
+                                email=existing.get('email'))
+                    data.update(attrs)
+                    self._request('PUT', f"/users/{existing['id']}", data)
+        return changes
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        try:
+            self.ansible.exit_json(**self.run())
+        except (GrafanaError, URLError) as e:
+            self.ansible.fail_json(msg=str(e))
+
+def main():
+    module = GrafanaModule()
+    module()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: libvirt_rbd
+short_description: Manage libvirt Ceph RBD secret and storage pools
+author: The Kowabunga Project
+description:
+  - Define libvirt CephX secret and RBD storage pools.
+  - A single connection to libvirtd is used. Existing secret and pools are
+    compared in memory with requested definitions and only changed objects
+    are (re)defined, started or flagged for autostart.
+options:
+  uri:
+    description:
+      - libvirt connection URI.
+    default: qemu:///system
+    type: str
+  secret:
+    description:
+      - CephX secret definition.
+    required: true
+    type: dict
+    suboptions:
+      uuid:
+        description:
+          - Secret UUID, to be referenced by pools and domains disks.
+        required: true
+        type: str
+      username:
+        description:
+          - Ceph client name the secret belongs to (without C(client.) prefix).
+        required: true
+        type: str
+      value:
+        description:
+          - Base64-encoded CephX key.
+        required: true
+        type: str
+  pools:
+    description:
+      - List of RBD storage pools.
+    default: []
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - libvirt storage pool name.
+        required: true
+        type: str
+      source:
+        description:
+          - Ceph pool name, defaults to libvirt storage pool name.
+        type: str
+      host:
+        description:
+          - Ceph monitor host.
+        required: true
+        type: str
+      port:
+        description:
+          - Ceph monitor port.
+        default: 3300
+        type: int
+      autostart:
+        description:
+          - Whether storage pool must be started with libvirtd.
+        default: true
+        type: bool
+  force_restart:
+    description:
+      - Whether active storage pools whose definition changed must be
+        restarted for it to apply.
+      - Restarting an RBD pool disconnects it from running guests. By default,
+        such pools are only redefined and reported in C(restart_required).
+    default: false
+    type: bool
+requirements:
+  - "python >= 3.8"
+  - "libvirt-python"
+'''
+
+EXAMPLES = r'''
+- name: Provision RBD on libvirt
+  kowabunga.cloud.libvirt_rbd:
+    secret:
+      uuid: 9a9d5ae6-6ee4-4c2d-a5f2-6f7a5f7ee0a1
+      username: libvirt
+      value: "{{ cephx_key }}"
+    pools:
+      - name: rbd
+        host: ceph.storage.acme.local
+        port: 3300
+'''
+
+RETURN = r'''
+secret:
+  description: List of secret attributes which have been updated.
+  returned: On success.
+  type: list
+  sample: ["definition", "value"]
+pools:
+  description: List of changes applied to storage pools.
+  returned: On success.
+  type: list
+  elements: dict
+  contains:
+    name:
+      description: Storage pool name
+      type: str
+      sample: "rbd"
+    fields:
+      description: Storage pool updated attributes.
+      type: list
+      sample: ["definition", "active"]
+restart_required:
+  description: Active storage pools running with an outdated definition.
+  returned: On success.
+  type: list
+  elements: str
+  sample: ["rbd"]
+'''
+
+import base64
+import importlib
+import xml.etree.ElementTree as ET
+
+from ansible.module_utils.basic import AnsibleModule
+
+class LibvirtRbdModule:
+    argument_spec = dict(
+        uri=dict(default='qemu:///system', type='str'),
+        secret=dict(required=True, type='dict', no_log=False, options=dict(
+            uuid=dict(required=True, type='str'),
+            username=dict(required=True, type='str'),
+            value=dict(required=True, type='str', no_log=True),
+        )),
+        pools=dict(default=[], type='list', elements='dict', options=dict(
+            name=dict(required=True, type='str'),
+            source=dict(type='str'),
+            host=dict(required=True, type='str'),
+            port=dict(default=3300, type='int'),
+            autostart=dict(default=True, type='bool'),
+        )),
+        force_restart=dict(default=False, type='bool'),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def __init__(self):
+        self.ansible = AnsibleModule(self.argument_spec, **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+        try:
+            self.libvirt = importlib.import_module('libvirt')
+        except ImportError:
+            self.ansible.fail_json(msg='libvirt-python is required for this module')
+        try:
+            self.conn = self.libvirt.open(self.params['uri'])
+        except self.libvirt.libvirtError as e:
+            self.ansible.fail_json(msg=f"Unable to connect to {self.params['uri']}: {e}")
+
+    def run(self):
+        secret = self._apply_secret()
+        pools = []
+        restart_required = []
+        for p in self.params['pools']:
+            fields, restart = self._apply_pool(p)
+            if fields:
+                pools.append(dict(name=p['name'], fields=fields))
+            if restart:
+                restart_required.append(p['name'])
+        return dict(changed=bool(secret or pools), secret=secret, pools=pools,
+                    restart_required=restart_required)
+
+    def _secret_xml(self):
+        """Build requested secret XML description.
+        """
+        s = self.params['secret']
+        root = ET.Element('secret', ephemeral='no', private='no')
+        ET.SubElement(root, 'uuid').text = s['uuid']
+        usage = ET.SubElement(root, 'usage', type='ceph')
+        ET.SubElement(usage, 'name').text = f"client.{s['username']} secret"
+        return root
+
+    def _pool_xml(self, pool):
+        """Build requested storage pool XML description.
+        """
+        s = self.params['secret']
+        root = ET.Element('pool', type='rbd')
+        ET.SubElement(root, 'name').text = pool['name']
+        source = ET.SubElement(root, 'source')
+        ET.SubElement(source, 'name').text = pool['source'] or pool['name']
+        ET.SubElement(source, 'host', name=pool['host'], port=str(pool['port']))
+        auth = ET.SubElement(source, 'auth', type='ceph', username=s['username'])
+        ET.SubElement(auth, 'secret', uuid=s['uuid'])
+        return root
+
+    @staticmethod
+    def _secret_key(root):
+        """Extract comparable attributes from a secret XML description.
+        """
+        return (root.get('ephemeral'), root.get('private'),
+                root.findtext('uuid'), root.find('usage').get('type'), root.findtext('usage/name'))
+
+    @staticmethod
+    def _pool_key(root):
+        """Extract comparable attributes from a storage pool XML description.
+        """
+        auth = root.find('source/auth')
+        secret = auth.find('secret') if auth is not None else None
+        return (root.get('type'), root.findtext('name'), root.findtext('source/name'),
+                sorted((h.get('name'), h.get('port')) for h in root.findall('source/host')),
+                auth.get('username') if auth is not None else None,
+                secret.get('uuid') if secret is not None else None)
+
+    def _lookup(self, func, name):
+        """Retrieve a libvirt object, None if it does not exist.
+        """
+        try:
+            return func(name)
+        except self.libvirt.libvirtError:
+            return None
+
+    def _apply_secret(self):
+        """Converge CephX secret definition and value.
+
+        Returns:
+            fields {list} updated secret attributes.
+        """
+        fields = []
+        xml = self._secret_xml()
+        secret = self._lookup(self.conn.secretLookupByUUIDString, self.params['secret']['uuid'])
+        if not secret or self._secret_key(ET.fromstring(secret.XMLDesc(0))) != self._secret_key(xml):
+            fields.append('definition')
+            if not self.check_mode:
+                secret = self.conn.secretDefineXML(ET.tostring(xml, encoding='unicode'), 0)
+
+        value = base64.b64decode(self.params['secret']['value'])
+        current = None
+        if secret:
+            try:
+                current = secret.value(0)
+            except self.libvirt.libvirtError:
+                current = None
+        if current != value:
+            fields.append('value')
+            if not self.check_mode:
+                secret.setValue(value, 0)
+        return fields
+
+    def _apply_pool(self, pool):
+        """Converge a single RBD storage pool.
+
+        An active pool is redefined in place, its new definition only
+        applying on next start. It is only restarted when force_restart is
+        set, as this disconnects it from running guests.
+
+        Returns:
+            fields {list} updated pool attributes.
+            restart {bool} whether the active pool runs an outdated definition.
+        """
+        fields = []
+        xml = self._pool_xml(pool)
+        p = self._lookup(self.conn.storagePoolLookupByName, pool['name'])
+        current = None
+        if p:
+            current = ET.fromstring(p.XMLDesc(self.libvirt.VIR_STORAGE_XML_INACTIVE))
+        if current is None or self._pool_key(current) != self._pool_key(xml):
+            fields.append('definition')
+            if self.check_mode:
+                if p and p.isActive():
+                    return fields + (['active'] if self.params['force_restart'] else []), True
+                return fields + ['active'] + (['autostart'] if pool['autostart'] else []), False
+            p = self.conn.storagePoolDefineXML(ET.tostring(xml, encoding='unicode'), 0)
+
+        restart = p.isActive() and self._pool_key(ET.fromstring(p.XMLDesc(0))) != self._pool_key(xml)
+        if restart and self.params['force_restart']:
+            fields.append('active')
+            if not self.check_mode:
+                p.destroy()
+                p.create(0)
+            restart = False
+
+        if bool(p.autostart()) != pool['autostart']:
+            fields.append('autostart')
+            if not self.check_mode:
+                p.setAutostart(1 if pool['autostart'] else 0)
+        if not p.isActive():
+            fields.append('active')
+            if not self.check_mode:
+                p.create(0)
+        return fields, restart
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        try:
+            self.ansible.exit_json(**self.run())
+        except self.libvirt.libvirtError as e:
+            self.ansible.fail_json(msg=str(e))
+        finally:
+            self.conn.close()
+
+def main():
+    module = LibvirtRbdModule()
+    module()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: mongodb_replicaset
+short_description: Manage MongoDB replica set
+author: The Kowabunga Project
+description:
+  - Initiate or reconfigure a MongoDB replica set.
+  - Current configuration is read once through C(replSetGetConfig) and a
+    C(replSetReconfig) is only issued when members differ from expected ones.
+  - Changes are split into successive reconfigurations adding or removing a
+    single voting member each, each one being committed before the next one.
+    Voting members waiting for their turn are first added with no vote.
+options:
+  name:
+    description:
+      - Name of the replica set.
+      - This attribute cannot be updated.
+    required: true
+    type: str
+  members:
+    description:
+      - List of replica set members.
+      - Each member can either be a C(host:port) string or a dictionary.
+    required: true
+    type: list
+    elements: raw
+    suboptions:
+      host:
+        description:
+          - Member C(host:port) address.
+        required: true
+        type: str
+      priority:
+        description:
+          - Member election priority.
+        default: 1
+        type: float
+      votes:
+        description:
+          - Number of votes the member has.
+        default: 1
+        type: int
+      hidden:
+        description:
+          - Whether the member is hidden from clients.
+        default: false
+        type: bool
+      arbiter_only:
+        description:
+          - Whether the member is an arbiter.
+        default: false
+        type: bool
+      tags:
+        description:
+          - Member tags.
+        type: dict
+  wait_timeout:
+    description:
+      - Number of seconds to wait for a primary to be elected after replica set initialization,
+        or for each reconfiguration to be committed.
+    default: 60
+    type: int
+notes:
+  - MongoDB refuses to add or remove more than one voting member per reconfiguration.
+  - Committing a reconfiguration requires MongoDB 4.4 or later.
+extends_documentation_fragment:
+  - kowabunga.cloud.mongodb
+'''
+
+EXAMPLES = r'''
+- name: Setup replica set
+  kowabunga.cloud.mongodb_replicaset:
+    login_user: admin
+    login_password: SECRET
+    name: rs0
+    members:
+      - 10.0.0.1:27017
+      - 10.0.0.2:27017
+      - host: 10.0.0.3:27017
+        priority: 0
+        hidden: true
+  run_once: true
+'''
+
+RETURN = r'''
+replicaset:
+  description: Dictionary describing the replica set.
+  returned: On success.
+  type: dict
+  contains:
+    name:
+      description: Replica set name
+      type: str
+      sample: "rs0"
+    version:
+      description: Replica set configuration version
+      type: int
+      sample: 3
+    members:
+      description: Replica set members
+      type: list
+      sample: [{"_id": 0, "host": "10.0.0.1:27017", "priority": 1, "votes": 1}]
+    primary:
+      description: Current replica set primary address, if any.
+      type: str
+      sample: "10.0.0.1:27017"
+action:
+  description: Action performed on replica set.
+  returned: On change.
+  type: str
+  sample: "reconfigure"
+'''
+
+import copy
+import time
+
+from ansible_collections.kowabunga.cloud.plugins.module_utils.mongodb import MongoDBModule, MONGODB_ERR_NOT_YET_INITIALIZED
+
+MEMBER_DEFAULTS = dict(
+    priority=1,
+    votes=1,
+    hidden=False,
+    arbiterOnly=False,
+    tags={},
+)
+
+class MongoDBReplicaSetModule(MongoDBModule):
+    argument_spec = dict(
+        name=dict(required=True, type='str'),
+        members=dict(required=True, type='list', elements='raw'),
+        wait_timeout=dict(default=60, type='int'),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def run(self):
+        members = self._build_members()
+
+        config = self._read()
+        if config is None:
+            # Initiate replica set
+            config = dict(
+                _id=self.params['name'],
+                members=[dict(_id=i, **m) for i, m in enumerate(members)],
+            )
+            if not self.check_mode:
+                self.client.admin.command('replSetInitiate', config)
+                self.wait_for_primary(self.params['wait_timeout'])
+            return dict(changed=True, replicaset=self._result(config), action="initiate")
+
+        if config['_id'] != self.params['name']:
+            self.fail_json(msg='Cannot update replica set name {0}'.format(config['_id']))
+
+        update, target = self._build_update(config, members)
+        if update and not self.check_mode:
+            # Update replica set, one voting member at a time
+            hello = self.hello()
+            if not hello.get('isWritablePrimary'):
+                host, port = self._primary(hello)
+                self.reconnect(host, port)
+            for step in self._plan(config['members'], target['members']):
+                config = copy.deepcopy(target)
+                config['members'] = step
+                config['version'] = self._read()['version'] + 1
+                config.pop('term', None)
+                self.client.admin.command('replSetReconfig', config)
+                self._wait_committed(self.params['wait_timeout'])
+            target['version'] = config['version']
+        return dict(changed=update, replicaset=self._result(target), action="reconfigure" if update else None)
+
+    def _build_members(self):
+        """Normalize requested members into MongoDB replica set member documents.
+        """
+        members = []
+        for m in self.params['members']:
+            if isinstance(m, str):
+                m = dict(host=m)
+            if not isinstance(m, dict) or 'host' not in m:
+                self.fail_json(msg='Invalid replica set member {0}'.format(m))
+            member = copy.deepcopy(MEMBER_DEFAULTS)
+            member['host'] = m['host']
+            for k in ['priority', 'votes', 'hidden', 'tags']:
+                if m.get(k) is not None:
+                    member[k] = m[k]
+            if m.get('arbiter_only'):
+                member.update(arbiterOnly=True, priority=0)
+            members.append(member)
+        return members
+
+    def _read(self):
+        """Read current replica set configuration.
+
+        Returns:
+            config {dict} replica set configuration, None if not initialized yet.
+        """
+        try:
+            self.client.admin.command('replSetGetStatus')
+        except self.pymongo.errors.OperationFailure as e:
+            if e.code == MONGODB_ERR_NOT_YET_INITIALIZED:
+                return None
+            raise
+        return self.client.admin.command('replSetGetConfig')['config']
+
+    def _build_update(self, config, members):
+        """Merge requested members into current replica set configuration.
+
+        Existing members keep their ID and all attributes not managed by
+        this module.
+
+        Arguments:
+            config {dict}   -- current replica set configuration.
+            members {list}  -- requested members.
+
+        Returns:
+            {bool} whether the configuration has been updated.
+            config {dict} replica set configuration.
+        """
+        current = dict((m['host'], m) for m in config['members'])
+        next_id = max([m['_id'] for m in config['members']] + [-1]) + 1
+
+        updated = []
+        for m in members:
+            member = copy.deepcopy(current.get(m['host'], {}))
+            if not member:
+                member['_id'] = next_id
+                next_id += 1
+            for k, v in m.items():
+                member[k] = v
+            updated.append(member)
+
+        def normalize(m):
+            return dict((k, m.get(k, MEMBER_DEFAULTS.get(k))) for k in ['_id', 'host'] + list(MEMBER_DEFAULTS))
+
+        before = sorted([normalize(m) for m in config['members']], key=lambda m: m['_id'])
+        after = sorted([normalize(m) for m in updated], key=lambda m: m['_id'])
+        if before == after:
+            return False, config
+
+        config = copy.deepcopy(config)
+        config['members'] = updated
+        return True, config
+
+    @staticmethod
+    def _plan(current, target):
+        """Split a members update into steps changing at most one voting member each.
+
+        Voting members additions are applied first, the others being added
+        with no vote (and no priority) until their turn comes. Voting members
+        removals are then applied, one per step. Changes not involving votes
+        are applied at first step.
+
+        Arguments:
+            current {list}  -- current replica set members.
+            target {list}   -- requested replica set members.
+
+        Returns:
+            steps {list} successive members lists, the last one being target.
+        """
+        def voting(m):
+            return m is not None and m.get('votes', 1) > 0
+
+        steps = []
+        state = dict((m['host'], m) for m in current)
+        while True:
+            budget = 1
+            step = []
+            for m in target:
+                prev = state.get(m['host'])
+                if voting(prev) == voting(m):
+                    step.append(m)
+                elif budget:
+                    budget -= 1
+                    step.append(m)
+                elif voting(prev):
+                    step.append(prev)
+                elif not m.get('arbiterOnly'):
+                    step.append(dict(m, votes=0, priority=0))
+            hosts = set(m['host'] for m in target)
+            for host, prev in state.items():
+                if host in hosts or not voting(prev):
+                    continue
+                if budget:
+                    budget -= 1
+                else:
+                    step.append(prev)
+            step.sort(key=lambda m: m['_id'])
+            if step == sorted(state.values(), key=lambda m: m['_id']):
+                return steps
+            steps.append(step)
+            state = dict((m['host'], m) for m in step)
+
+    def _wait_committed(self, timeout):
+        """Wait until last replica set configuration is committed.
+
+        Arguments:
+            timeout {int}   -- maximum number of seconds to wait for.
+        """
+        deadline = time.monotonic() + timeout
+        delay = 0.2
+        while True:
+            status = self.client.admin.command('replSetGetConfig', commitmentStatus=True)
+            if status.get('commitmentStatus'):
+                return
+            if time.monotonic() >= deadline:
+                self.fail_json(msg=f'Replica set configuration not committed after {timeout}s')
+            time.sleep(delay)
+            delay = min(delay * 2, 2)
+
+    def _primary(self, hello):
+        """Extract replica set primary address from topology information.
+        """
+        if not hello.get('primary'):
+            self.fail_json(msg='Cannot reconfigure replica set without a primary')
+        host, _, port = hello['primary'].rpartition(':')
+        return host, int(port)
+
+    def _result(self, config):
+        """Build module result from replica set configuration.
+        """
+        primary = None
+        if not self.check_mode:
+            primary = self.hello().get('primary')
+        return dict(
+            name=config['_id'],
+            version=config.get('version', 1),
+            members=config['members'],
+            primary=primary,
+        )
+
+def main():
+    module = MongoDBReplicaSetModule()
+    module()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: mongodb_users
+short_description: Manage MongoDB users
+author: The Kowabunga Project
+description:
+  - Create, update or delete a set of MongoDB users.
+  - All existing users are read in a single C(usersInfo) round-trip and only
+    users whose roles or password differ are updated.
+  - Passwords are compared against stored SCRAM credentials, without any
+    additional authentication attempt.
+  - When connected to a replica set secondary, nothing is done so that module
+    can be run on all replica set members.
+options:
+  users:
+    description:
+      - List of MongoDB users.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - MongoDB user name.
+        required: true
+        type: str
+      database:
+        description:
+          - MongoDB database the user is defined in.
+        default: admin
+        type: str
+      password:
+        description:
+          - MongoDB user password.
+          - Required if user is to be created.
+        type: str
+      roles:
+        description:
+          - List of roles granted to user.
+          - Each role can either be a role name (granted on user's database) or a dictionary with C(role) and C(db) keys.
+        type: list
+        elements: raw
+        default: []
+      state:
+        description:
+          - Should the user be present or absent.
+        choices: [present, absent]
+        default: present
+        type: str
+  update_password:
+    description:
+      - C(always) updates password of existing users if it differs from requested one.
+      - C(on_create) only sets password on user creation.
+    choices: [always, on_create]
+    default: always
+    type: str
+extends_documentation_fragment:
+  - kowabunga.cloud.mongodb
+'''
+
+EXAMPLES = r'''
+- name: Create MongoDB users
+  kowabunga.cloud.mongodb_users:
+    login_user: admin
+    login_password: SECRET
+    users:
+      - name: admin
+        database: admin
+        password: SECRET
+        roles:
+          - root
+      - name: kahuna
+        database: kowabunga
+        password: KAHUNA_SECRET
+        roles:
+          - dbAdmin
+          - readWrite
+      - name: legacy
+        database: kowabunga
+        state: absent
+'''
+
+RETURN = r'''
+users:
+  description: List of changes applied to users.
+  returned: On success.
+  type: list
+  elements: dict
+  contains:
+    name:
+      description: User name
+      type: str
+      sample: "kahuna"
+    database:
+      description: User database
+      type: str
+      sample: "kowabunga"
+    action:
+      description: Action performed on user.
+      type: str
+      sample: "update"
+    fields:
+      description: Updated user attributes.
+      type: list
+      sample: ["roles"]
+'''
+
+import base64
+import hashlib
+import hmac
+
+from ansible_collections.kowabunga.cloud.plugins.module_utils.mongodb import MongoDBModule
+
+try:
+    from pymongo.saslprep import saslprep
+except ImportError:
+    def saslprep(data):
+        return data
+
+SCRAM_MECHANISMS = [
+    ('SCRAM-SHA-256', 'sha256'),
+    ('SCRAM-SHA-1', 'sha1'),
+]
+
+class MongoDBUsersModule(MongoDBModule):
+    argument_spec = dict(
+        users=dict(required=True, type='list', elements='dict', options=dict(
+            name=dict(required=True, type='str'),
+            database=dict(default='admin', type='str'),
+            password=dict(type='str', no_log=True),
+            roles=dict(default=[], type='list', elements='raw'),
+            state=dict(default='present', choices=['absent', 'present']),
+        )),
+        update_password=dict(default='always', choices=['always', 'on_create']),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def run(self):
+        hello = self.hello()
+        if hello.get('setName') and not hello.get('isWritablePrimary'):
+            # Do nothing, users are replicated from primary
+            return dict(changed=False, users=[], msg='Not a replica set primary, skipping')
+
+        changes = []
+        if self.localhost_exception:
+            changes += self._bootstrap()
+
+        current = self._read()
+        done = [(c['database'], c['name']) for c in changes]
+        for user in self.params['users']:
+            if (user['database'], user['name']) in done:
+                continue
+            change = self._apply(user, current.get((user['database'], user['name'])))
+            if change:
+                changes.append(change)
+
+        return dict(changed=bool(changes), users=changes)
+
+    def _bootstrap(self):
+        """Create login user through MongoDB localhost exception, then authenticate as it.
+        """
+        login = (self.params['login_database'], self.params['login_user'])
+        for user in self.params['users']:
+            if (user['database'], user['name']) == login and user['state'] == 'present':
+                change = self._apply(user, None)
+                if not self.check_mode:
+                    self.reconnect()
+                return [change]
+        self.fail_json(msg='Unable to authenticate as {0} and no such user requested'.format(self.params['login_user']))
+
+    def _read(self):
+        """Read all existing users, with their credentials, in a single round-trip.
+
+        Returns:
+            users {dict} user documents, indexed by (database, name).
+        """
+        if self.localhost_exception:
+            # Check mode bootstrap, nothing can be read yet
+            return {}
+        info = self.client.admin.command('usersInfo', {'forAllDBs': True}, showCredentials=True)
+        return dict(((u['db'], u['user']), u) for u in info.get('users', []))
+
+    def _build_roles(self, user):
+        """Normalize requested roles into MongoDB role documents.
+        """
+        roles = []
+        for r in user['roles']:
+            if isinstance(r, str):
+                r = dict(role=r, db=user['database'])
+            if not isinstance(r, dict) or 'role' not in r:
+                self.fail_json(msg='Invalid role {0} for user {1}'.format(r, user['name']))
+            roles.append(dict(role=r['role'], db=r.get('db', user['database'])))
+        return roles
+
+    def _password_matches(self, doc, user):
+        """Check requested password against user's stored SCRAM credentials.
+
+        Returns:
+            {bool} whether password matches.
+        """
+        credentials = doc.get('credentials', {})
+        for mechanism, digest in SCRAM_MECHANISMS:
+            c = credentials.get(mechanism)
+            if not c:
+                continue
+            password = user['password']
+            if mechanism == 'SCRAM-SHA-1':
+                password = hashlib.md5(f"{user['name']}:mongo:{password}".encode('utf-8')).hexdigest()
+            else:
+                password = saslprep(password)
+            salted = hashlib.pbkdf2_hmac(digest, password.encode('utf-8'),
+                                         base64.b64decode(c['salt']), c['iterationCount'])
+            client_key = hmac.new(salted, b'Client Key', digest).digest()
+            stored_key = hashlib.new(digest, client_key).digest()
+            return hmac.compare_digest(base64.b64encode(stored_key).decode('ascii'), c['storedKey'])
+        return False
+
+    def _apply(self, user, doc):
+        """Converge a single user.
+
+        Arguments:
+            user {dict}   -- requested user.
+            doc {dict}    -- existing user document, None if user does not exist.
+
+        Returns:
+            change {dict} applied change, None if nothing changed.
+        """
+        db = self.client[user['database']]
+        change = dict(name=user['name'], database=user['database'])
+
+        if user['state'] == 'absent':
+            if not doc:
+                return None
+            if not self.check_mode:
+                db.command('dropUser', user['name'])
+            return dict(change, action='delete', fields=[])
+
+        roles = self._build_roles(user)
+        if not doc:
+            if user['password'] is None:
+                self.fail_json(msg='Password is required to create user {0}'.format(user['name']))
+            if not self.check_mode:
+                db.command('createUser', user['name'], pwd=user['password'], roles=roles)
+            return dict(change, action='create', fields=['password', 'roles'])
+
+        updates = {}
+        current_roles = set((r['role'], r['db']) for r in doc.get('roles', []))
+        if current_roles != set((r['role'], r['db']) for r in roles):
+            updates['roles'] = roles
+        if (self.params['update_password'] == 'always' and user['password'] is not None
+                and not self._password_matches(doc, user)):
+            updates['pwd'] = user['password']
+        if not updates:
+            return None
+        if not self.check_mode:
+            db.command('updateUser', user['name'], **updates)
+        return dict(change, action='update', fields=sorted('password' if k == 'pwd' else k for k in updates))
+
+def main():
+    module = MongoDBUsersModule()
+    module()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: mysql_schema
+short_description: Bootstrap a MySQL/MariaDB database schema from SQL files
+author: The Kowabunga Project
+description:
+  - Apply a set of SQL schema files, read locally on target, to a database.
+  - A fingerprint of the schema files is recorded in the database once they
+    have been applied. Files are only read and applied again when their
+    fingerprint differs from the recorded one.
+  - Statements are rewritten to be idempotent (i.e. C(IF NOT EXISTS) clauses)
+    so that a schema which has been partially applied, or applied before being
+    fingerprinted, can safely be applied again.
+  - Schema statements are not transactional, MySQL implicitly committing each
+    DDL statement. A failure leaves the schema partially applied and no
+    fingerprint recorded, so that it is applied again on next run. Changes
+    made by statements which cannot be rewritten to be idempotent
+    (e.g. C(INSERT), C(ALTER TABLE ... ADD COLUMN)) must then be cleaned up by
+    hand.
+options:
+  name:
+    description:
+      - Schema name, used to record its fingerprint.
+    required: true
+    type: str
+  files:
+    description:
+      - Ordered list of SQL files to be applied.
+    required: true
+    type: list
+    elements: path
+  database:
+    description:
+      - Database the schema is applied to.
+    required: true
+    type: str
+  login_host:
+    description:
+      - Database server host.
+    default: localhost
+    type: str
+  login_port:
+    description:
+      - Database server port.
+    default: 3306
+    type: int
+  login_user:
+    description:
+      - Database user name.
+    required: true
+    type: str
+  login_password:
+    description:
+      - Database user password.
+    type: str
+  connect_timeout:
+    description:
+      - Database connection timeout, in seconds.
+    default: 30
+    type: int
+requirements:
+  - "python >= 3.8"
+  - "mysqlclient or PyMySQL"
+'''
+
+EXAMPLES = r'''
+- name: Bootstrap PowerDNS schema
+  kowabunga.cloud.mysql_schema:
+    name: pdns
+    database: powerdns
+    login_user: powerdns
+    login_password: "{{ db_password }}"
+    files:
+      - /usr/share/pdns-backend-mysql/schema/schema.mysql.sql
+      - /usr/share/pdns-backend-mysql/schema/enable-foreign-keys.mysql.sql
+'''
+
+RETURN = r'''
+checksum:
+  description: Fingerprint of schema files.
+  returned: On success.
+  type: str
+  sample: "1f0c7b1f3c3e8d1a..."
+statements:
+  description: Number of applied SQL statements.
+  returned: On success.
+  type: int
+  sample: 12
+'''
+
+import hashlib
+import importlib
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+
+SCHEMA_TABLE = 'ansible_schema'
+
+# Rewrites making schema statements idempotent
+REWRITES = [
+    (re.compile(r'\bCREATE TABLE\b(?!\s+IF NOT EXISTS)', re.IGNORECASE), 'CREATE TABLE IF NOT EXISTS'),
+    (re.compile(r'\b((?:CREATE|ADD)\s+(?:UNIQUE\s+)?INDEX)\b(?!\s+IF NOT EXISTS)', re.IGNORECASE), r'\1 IF NOT EXISTS'),
+    (re.compile(r'\bFOREIGN KEY\b(?!\s+IF NOT EXISTS)', re.IGNORECASE), 'FOREIGN KEY IF NOT EXISTS'),
+]
+
+class MySQLSchemaModule:
+    argument_spec = dict(
+        name=dict(required=True, type='str'),
+        files=dict(required=True, type='list', elements='path'),
+        database=dict(required=True, type='str'),
+        login_host=dict(default='localhost', type='str'),
+        login_port=dict(default=3306, type='int'),
+        login_user=dict(required=True, type='str'),
+        login_password=dict(type='str', no_log=True),
+        connect_timeout=dict(default=30, type='int'),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def __init__(self):
+        self.ansible = AnsibleModule(self.argument_spec, **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+        self.conn = self.connect()
+
+    def connect(self):
+        """Connect to database, through mysqlclient or PyMySQL binding.
+        """
+        driver = None
+        for name in ['MySQLdb', 'pymysql']:
+            try:
+                driver = importlib.import_module(name)
+                break
+            except ImportError:
+                continue
+        if not driver:
+            self.ansible.fail_json(msg='mysqlclient or PyMySQL is required for this module')
+
+        self.error = driver.Error
+        kwargs = dict(host=self.params['login_host'], port=self.params['login_port'],
+                      user=self.params['login_user'], database=self.params['database'],
+                      connect_timeout=self.params['connect_timeout'])
+        if self.params['login_password'] is not None:
+            kwargs['password'] = self.params['login_password']
+        try:
+            return driver.connect(**kwargs)
+        except driver.Error as e:
+            self.ansible.fail_json(msg=f'Unable to connect to database: {e}')
+
+    def run(self):
+        checksum = self._checksum()
+        if self._recorded() == checksum:
+            return dict(changed=False, checksum=checksum, statements=0)
+
+        statements = []
+        for path in self.params['files']:
+            with open(path) as f:
+                statements += self._split(self._rewrite(f.read()))
+        if self.check_mode:
+            return dict(changed=True, checksum=checksum, statements=len(statements))
+
+        # DDL statements are implicitly committed one by one, there is no
+        # rolling back a failure: the fingerprint is only recorded last.
+        cursor = self.conn.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(f'CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} ('
+                           'name VARCHAR(255) NOT NULL PRIMARY KEY, '
+                           'checksum CHAR(64) NOT NULL, '
+                           'applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)')
+            cursor.execute(f'REPLACE INTO {SCHEMA_TABLE} (name, checksum) VALUES (%s, %s)',
+                           (self.params['name'], checksum))
+            self.conn.commit()
+        finally:
+            cursor.close()
+        return dict(changed=True, checksum=checksum, statements=len(statements))
+
+    def _checksum(self):
+        """Compute schema files fingerprint, streaming their content.
+        """
+        h = hashlib.sha256()
+        for path in self.params['files']:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    h.update(chunk)
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def _recorded(self):
+        """Retrieve schema fingerprint recorded in database, None if none.
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute('SELECT COUNT(*) FROM information_schema.tables '
+                           'WHERE table_schema = %s AND table_name = %s',
+                           (self.params['database'], SCHEMA_TABLE))
+            if not cursor.fetchone()[0]:
+                return None
+            cursor.execute(f'SELECT checksum FROM {SCHEMA_TABLE} WHERE name = %s', (self.params['name'],))
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _rewrite(sql):
+        for regexp, repl in REWRITES:
+            sql = regexp.sub(repl, sql)
+        return sql
+
+    @staticmethod
+    def _split(sql):
+        """Split SQL script into statements, skipping comments.
+        """
+        statements = []
+        current = []
+        quote = None
+        i = 0
+        while i < len(sql):
+            c = sql[i]
+            if quote:
+                current.append(c)
+                if c == '\\':
+                    current.append(sql[i + 1:i + 2])
+                    i += 1
+                elif c == quote:
+                    quote = None
+            elif c in '\'"`':
+                quote = c
+                current.append(c)
+            elif sql.startswith('--', i) or c == '#':
+                end = sql.find('\n', i)
+                i = len(sql) if end < 0 else end
+                continue
+            elif sql.startswith('/*', i):
+                end = sql.find('*/', i + 2)
+                i = len(sql) if end < 0 else end + 2
+                continue
+            elif c == ';':
+                statements.append(''.join(current).strip())
+                current = []
+            else:
+                current.append(c)
+            i += 1
+        statements.append(''.join(current).strip())
+        return [s for s in statements if s]
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        try:
+            self.ansible.exit_json(**self.run())
+        except (IOError, OSError) as e:
+            self.ansible.fail_json(msg=f'Unable to read schema file: {e}')
+        except self.error as e:
+            self.ansible.fail_json(msg=f'Unable to apply schema, which may be partially applied: {e}')
+        finally:
+            self.conn.close()
+
+def main():
+    module = MySQLSchemaModule()
+    module()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: nftables_ruleset
+short_description: Atomically apply an nftables ruleset
+author: The Kowabunga Project
+description:
+  - Flatten an nftables ruleset and its included files in memory, validate it
+    and apply it in a single atomic C(nft -f) transaction.
+  - Ruleset is only applied when its normalized content (i.e. without comments
+    and whitespaces) changed since last run, or when live tables it declares
+    have drifted from the ones applied last, as reported by
+    C(nft -j list ruleset). Tables created at runtime by other services
+    (e.g. libvirt, docker, fail2ban) are ignored by this comparison.
+  - Flattened ruleset is persisted to I(dest), along with its fingerprints,
+    so that it is loaded again at boot time.
+options:
+  ruleset:
+    description:
+      - Main ruleset content, usually starting with C(flush ruleset).
+    required: true
+    type: str
+  includes:
+    description:
+      - Dictionary of files content, indexed by path.
+      - Matching C(include) statements from I(ruleset) (and included files) are
+        replaced in memory by their content.
+    default: {}
+    type: dict
+  dest:
+    description:
+      - Path where flattened ruleset is persisted.
+    default: /etc/nftables.conf
+    type: path
+  mode:
+    description:
+      - Permissions of persisted ruleset file.
+    default: '0644'
+    type: raw
+requirements:
+  - "nftables"
+'''
+
+EXAMPLES = r'''
+- name: Apply firewall ruleset
+  kowabunga.cloud.nftables_ruleset:
+    ruleset: "{{ lookup('ansible.builtin.template', 'nftables.conf.j2') }}"
+    includes:
+      /etc/nftables/defines.nft: "{{ lookup('ansible.builtin.template', 'defines.nft.j2') }}"
+    dest: /etc/nftables.conf
+'''
+
+RETURN = r'''
+applied:
+  description: Whether ruleset has been loaded into kernel.
+  returned: On success.
+  type: bool
+  sample: true
+rules:
+  description: Rule-level difference between previous and new live ruleset.
+  returned: When ruleset has been applied.
+  type: dict
+  contains:
+    added:
+      description: Added rules.
+      type: list
+      sample: ["table inet firewall chain input: tcp dport 443 accept"]
+    removed:
+      description: Removed rules.
+      type: list
+      sample: []
+'''
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule
+
+HEADER_PREFIX = '# ansible-nftables'
+INCLUDE_RE = re.compile(r'^(\s*)include\s+"([^"]+)"\s*;?\s*$', re.MULTILINE)
+TABLE_RE = re.compile(r'^\s*(?:(?:add|create)\s+)?table\s+(?:(ip|ip6|inet|arp|bridge|netdev)\s+)?([^\s{;]+)',
+                      re.MULTILINE)
+
+class NftablesRulesetModule:
+    argument_spec = dict(
+        ruleset=dict(required=True, type='str'),
+        includes=dict(default={}, type='dict'),
+        dest=dict(default='/etc/nftables.conf', type='path'),
+        mode=dict(default='0644', type='raw'),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def __init__(self):
+        self.ansible = AnsibleModule(self.argument_spec, **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+        self.nft = self.ansible.get_bin_path('nft', required=True)
+
+    def run(self):
+        ruleset = self._flatten(self.params['ruleset'])
+        source_hash = self._hash(self._normalize(ruleset))
+
+        recorded, persisted = self._read_dest()
+        tables = self._tables(ruleset)
+        before, live_hash = self._live(tables)
+
+        apply = recorded.get('source') != source_hash or recorded.get('live') != live_hash
+        result = dict(changed=False, applied=False)
+
+        if apply:
+            self._nft('-c', ruleset)
+            result.update(changed=True, applied=True)
+            if self.check_mode:
+                return result
+            self._nft('', ruleset)
+            after, live_hash = self._live(tables)
+            result['rules'] = self._diff(before, after)
+            result['diff'] = dict(before=before, after=after)
+
+        if apply or persisted != ruleset:
+            result['changed'] = True
+            if not self.check_mode:
+                self._write_dest(ruleset, source_hash, live_hash)
+        return result
+
+    def _flatten(self, content, depth=0):
+        """Recursively inline included files content.
+        """
+        if depth > 16:
+            self.ansible.fail_json(msg='Too many nested includes')
+
+        def inline(m):
+            path = m.group(2)
+            if path not in self.params['includes']:
+                return m.group(0)
+            content = self._flatten(self.params['includes'][path], depth + 1).rstrip('\n')
+            return '\n'.join(m.group(1) + line if line else line for line in content.splitlines())
+        return INCLUDE_RE.sub(inline, content)
+
+    @staticmethod
+    def _normalize(content):
+        """Strip comments, blank lines and redundant whitespaces.
+        """
+        lines = []
+        for line in content.splitlines():
+            # Only strip comments outside of quoted strings
+            out, quoted = '', False
+            for c in line:
+                if c == '"':
+                    quoted = not quoted
+                elif c == '#' and not quoted:
+                    break
+                out += c
+            out = ' '.join(out.split())
+            if out:
+                lines.append(out)
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _hash(data):
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _tables(ruleset):
+        """List tables declared by a ruleset, as (family, name) tuples.
+        """
+        return set((m.group(1) or 'ip', m.group(2)) for m in TABLE_RE.finditer(ruleset))
+
+    def _live(self, tables):
+        """Retrieve live ruleset.
+
+        Arguments:
+            tables {set}  -- (family, name) of tables to fingerprint.
+
+        Returns:
+            text {str} stateless ruleset listing.
+            hash {str} fingerprint of stateless JSON ruleset, restricted to tables.
+        """
+        rc, out, err = self.ansible.run_command([self.nft, '-j', '-s', 'list', 'ruleset'])
+        if rc != 0:
+            self.ansible.fail_json(msg=f'Unable to list live ruleset: {err.strip()}')
+
+        def table(o):
+            kind, attrs = next(iter(o.items()))
+            return attrs.get('family'), attrs.get('name' if kind == 'table' else 'table')
+        objects = [o for o in json.loads(out or '{}').get('nftables', [])
+                   if 'metainfo' not in o and table(o) in tables]
+        live_hash = self._hash(json.dumps(objects, sort_keys=True))
+
+        rc, text, err = self.ansible.run_command([self.nft, '-s', 'list', 'ruleset'])
+        if rc != 0:
+            self.ansible.fail_json(msg=f'Unable to list live ruleset: {err.strip()}')
+        return text, live_hash
+
+    @staticmethod
+    def _rules(text):
+        """Index ruleset listing lines by their enclosing table and chain.
+        """
+        rules = set()
+        scope = []
+        for line in text.splitlines():
+            line = line.strip()
+            if line.endswith('{'):
+                scope.append(line[:-1].strip())
+            elif line == '}':
+                if scope:
+                    scope.pop()
+            elif line:
+                rules.add(f"{' '.join(scope)}: {line}")
+        return rules
+
+    def _diff(self, before, after):
+        """Compute rule-level difference between two ruleset listings.
+        """
+        old = self._rules(before)
+        new = self._rules(after)
+        return dict(added=sorted(new - old), removed=sorted(old - new))
+
+    def _nft(self, flags, ruleset):
+        """Load (or only check, with -c flag) a ruleset in a single transaction.
+        """
+        fd, path = tempfile.mkstemp(prefix='nftables-', suffix='.nft')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(ruleset)
+            args = [self.nft] + ([flags] if flags else []) + ['-f', path]
+            rc, _, err = self.ansible.run_command(args)
+            if rc != 0:
+                action = 'validate' if flags == '-c' else 'apply'
+                self.ansible.fail_json(msg=f'Unable to {action} ruleset: {err.strip()}')
+        finally:
+            os.unlink(path)
+
+    def _read_dest(self):
+        """Read persisted ruleset and its recorded fingerprints.
+
+        Returns:
+            recorded {dict} source and live ruleset fingerprints.
+            ruleset {str} persisted ruleset, without header.
+        """
+        try:
+            with open(self.params['dest']) as f:
+                content = f.read()
+        except (IOError, OSError):
+            return {}, None
+
+        first, _, rest = content.partition('\n')
+        if not first.startswith(HEADER_PREFIX):
+            return {}, content
+        recorded = dict(kv.split('=', 1) for kv in first[len(HEADER_PREFIX):].split() if '=' in kv)
+        return recorded, rest
+
+    def _write_dest(self, ruleset, source_hash, live_hash):
+        """Atomically persist flattened ruleset along with its fingerprints.
+        """
+        dest = self.params['dest']
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest) or '.', prefix='.nftables-')
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'{HEADER_PREFIX} source={source_hash} live={live_hash}\n')
+            f.write(ruleset)
+        mode = self.params['mode']
+        if isinstance(mode, str):
+            mode = int(mode, 8)
+        os.chmod(tmp, mode)
+        self.ansible.atomic_move(tmp, dest)
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        self.ansible.exit_json(**self.run())
+
+def main():
+    module = NftablesRulesetModule()
+    module()
+
+if __name__ == '__main__':
+    main()
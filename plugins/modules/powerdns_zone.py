@@ -0,0 +1,398 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) The Kowabunga Project
+# Apache License, Version 2.0 (see LICENSE or https://www.apache.org/licenses/LICENSE-2.0.txt)
+# SPDX-License-Identifier: Apache-2.0
+
+DOCUMENTATION = r'''
+---
+module: powerdns_zone
+short_description: Manage PowerDNS zones and records
+author: The Kowabunga Project
+description:
+  - Create PowerDNS authoritative zones and converge their records through
+    PowerDNS HTTP API.
+  - Each zone is fetched once, along with all its RRsets, and differences with
+    requested records are submitted as a single batched C(PATCH) request.
+  - Zones are processed concurrently.
+options:
+  api_url:
+    description:
+      - PowerDNS API base URL.
+    default: http://127.0.0.1:8081
+    type: str
+  api_key:
+    description:
+      - PowerDNS API key.
+    required: true
+    type: str
+  server_id:
+    description:
+      - PowerDNS server identifier.
+    default: localhost
+    type: str
+  validate_certs:
+    description:
+      - Whether API server TLS certificate must be validated.
+    default: true
+    type: bool
+  timeout:
+    description:
+      - API requests timeout, in seconds.
+    default: 30
+    type: int
+  wait_timeout:
+    description:
+      - Maximum time to wait for PowerDNS API to be reachable, in seconds.
+    default: 30
+    type: int
+  concurrency:
+    description:
+      - Maximum number of zones to be processed in parallel.
+    default: 4
+    type: int
+  zones:
+    description:
+      - List of zones.
+    required: true
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - Zone name.
+        required: true
+        type: str
+      kind:
+        description:
+          - Zone kind, only used at creation.
+        default: Native
+        choices: [Native, Master, Slave, Producer, Consumer]
+        type: str
+      nameservers:
+        description:
+          - Zone nameservers, only used at creation.
+        default: []
+        type: list
+        elements: str
+      purge:
+        description:
+          - Whether existing RRsets not listed in I(records) must be removed,
+            and listed RRsets must only hold requested records.
+          - Otherwise, requested records are added to existing RRsets, records
+            created by other means being preserved.
+          - Zone apex C(SOA) and C(NS) RRsets are always preserved.
+        default: false
+        type: bool
+      records:
+        description:
+          - List of zone records.
+          - Records sharing the same name and type are grouped into a single RRset.
+        default: []
+        type: list
+        elements: dict
+        suboptions:
+          name:
+            description:
+              - Record name, either relative to zone, fully-qualified or C(@) for zone apex.
+            required: true
+            type: str
+          rtype:
+            description:
+              - Record type.
+            default: A
+            type: str
+          ttl:
+            description:
+              - Record Time-To-Live (TTL) value.
+            default: 3600
+            type: int
+          value:
+            description:
+              - Record content.
+            required: true
+            type: str
+requirements:
+  - "python >= 3.8"
+'''
+
+EXAMPLES = r'''
+- name: Converge DNS zones
+  kowabunga.cloud.powerdns_zone:
+    api_url: http://10.0.0.1:9000
+    api_key: "{{ powerdns_api_key }}"
+    zones:
+      - name: acme.local
+        nameservers:
+          - ns1.acme.local
+        records:
+          - name: www
+            value: 10.0.0.10
+          - name: www
+            value: 10.0.0.11
+          - name: api
+            rtype: CNAME
+            value: www.acme.local
+'''
+
+RETURN = r'''
+zones:
+  description: List of changes applied to zones.
+  returned: On success.
+  type: list
+  elements: dict
+  contains:
+    name:
+      description: Zone name
+      type: str
+      sample: "acme.local."
+    action:
+      description: Action performed on zone.
+      type: str
+      sample: "update"
+    rrsets:
+      description: Changed RRsets.
+      type: list
+      sample: [{"name": "www.acme.local.", "type": "A", "changetype": "REPLACE"}]
+'''
+
+import json
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.urls import open_url
+
+# Records types whose content is a domain name
+FQDN_TYPES = ['CNAME', 'DNAME', 'NS', 'PTR']
+
+class PowerDNSError(Exception):
+    pass
+
+class PowerDNSZoneModule:
+    argument_spec = dict(
+        api_url=dict(default='http://127.0.0.1:8081', type='str'),
+        api_key=dict(required=True, type='str', no_log=True),
+        server_id=dict(default='localhost', type='str'),
+        validate_certs=dict(default=True, type='bool'),
+        timeout=dict(default=30, type='int'),
+        wait_timeout=dict(default=30, type='int'),
+        concurrency=dict(default=4, type='int'),
+        zones=dict(required=True, type='list', elements='dict', options=dict(
+            name=dict(required=True, type='str'),
+            kind=dict(default='Native', choices=['Native', 'Master', 'Slave', 'Producer', 'Consumer']),
+            nameservers=dict(default=[], type='list', elements='str'),
+            purge=dict(default=False, type='bool'),
+            records=dict(default=[], type='list', elements='dict', options=dict(
+                name=dict(required=True, type='str'),
+                rtype=dict(default='A', type='str'),
+                ttl=dict(default=3600, type='int'),
+                value=dict(required=True, type='str'),
+            )),
+        )),
+    )
+    module_kwargs = dict(
+        supports_check_mode=True
+    )
+
+    def __init__(self):
+        self.ansible = AnsibleModule(self.argument_spec, **self.module_kwargs)
+        self.params = self.ansible.params
+        self.check_mode = self.ansible.check_mode
+        self.base_url = f"{self.params['api_url'].rstrip('/')}/api/v1/servers/{quote(self.params['server_id'])}"
+
+    def run(self):
+        self._wait()
+        zones = self.params['zones']
+        with ThreadPoolExecutor(max_workers=max(1, min(self.params['concurrency'], len(zones)))) as pool:
+            results = list(pool.map(self._apply, zones))
+        changes = [r for r in results if r]
+        return dict(changed=bool(changes), zones=changes)
+
+    def _request(self, method, path, data=None):
+        """Issue an API request.
+
+        Arguments:
+            method {str}    -- HTTP method.
+            path {str}      -- resource path, relative to server.
+            data {obj}      -- request body, to be JSON-encoded.
+
+        Returns:
+            output {obj} decoded JSON response, None if response has no content.
+
+        Raises:
+            PowerDNSError: on HTTP or network error, the original exception
+                           being its cause.
+        """
+        headers = {'X-API-Key': self.params['api_key'], 'Accept': 'application/json'}
+        body = None
+        if data is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(data)
+        try:
+            r = open_url(self.base_url + path, method=method, data=body, headers=headers,
+                         validate_certs=self.params['validate_certs'],
+                         timeout=self.params['timeout'])
+            content = r.read()
+        except HTTPError as e:
+            try:
+                error = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                error = e.reason
+            raise PowerDNSError(f'{method} {path} failed ({e.code}): {error}') from e
+        except (URLError, OSError) as e:
+            raise PowerDNSError(f'{method} {path} failed: {getattr(e, "reason", e)}') from e
+        if not content:
+            return None
+        return json.loads(content)
+
+    def _wait(self):
+        """Wait for API to be reachable, e.g. right after service (re)start.
+        """
+        deadline = time.monotonic() + self.params['wait_timeout']
+        delay = 0.5
+        while True:
+            try:
+                self._request('GET', '')
+                return
+            except PowerDNSError as e:
+                if isinstance(e.__cause__, HTTPError):
+                    raise
+                if time.monotonic() + delay > deadline:
+                    raise PowerDNSError(f'PowerDNS API is unreachable: {e.__cause__}') from e.__cause__
+            time.sleep(delay)
+            delay = min(delay * 2, 5)
+
+    @staticmethod
+    def _canonical(name, zone):
+        """Compute fully-qualified name of a record.
+        """
+        if name in ['', '@']:
+            return zone
+        if name.endswith('.'):
+            return name
+        if name == zone[:-1] or name.endswith('.' + zone[:-1]):
+            return name + '.'
+        return f'{name}.{zone}'
+
+    @staticmethod
+    def _content(rtype, value):
+        """Compute record content as stored by PowerDNS.
+        """
+        if rtype in FQDN_TYPES and not value.endswith('.'):
+            return value + '.'
+        if rtype in ['TXT', 'SPF'] and not value.startswith('"'):
+            return f'"{value}"'
+        return value
+
+    def _build_rrsets(self, zone, name):
+        """Group requested records into RRsets.
+
+        Returns:
+            rrsets {dict} (ttl, contents) tuples, indexed by (name, type).
+        """
+        rrsets = {}
+        for r in zone['records']:
+            rtype = r['rtype'].upper()
+            key = (self._canonical(r['name'], name), rtype)
+            ttl, contents = rrsets.get(key, (r['ttl'], set()))
+            contents.add(self._content(rtype, r['value']))
+            rrsets[key] = (min(ttl, r['ttl']), contents)
+        return rrsets
+
+    def _build_changes(self, zone, name, current):
+        """Compute RRsets changes between requested and existing records.
+
+        Arguments:
+            zone {dict}     -- requested zone.
+            name {str}      -- canonical zone name.
+            current {list}  -- existing zone RRsets.
+
+        Returns:
+            changes {list} RRsets to be submitted in a single PATCH.
+        """
+        existing = {}
+        records = {}
+        for rr in current:
+            contents = set(r['content'] for r in rr.get('records', []) if not r.get('disabled'))
+            existing[(rr['name'], rr['type'])] = (rr.get('ttl'), contents)
+            records[(rr['name'], rr['type'])] = rr.get('records', [])
+
+        desired = self._build_rrsets(zone, name)
+        changes = []
+        for (rname, rtype), (ttl, contents) in sorted(desired.items()):
+            if zone['purge']:
+                if existing.get((rname, rtype)) == (ttl, contents):
+                    continue
+                rrset = [dict(content=c, disabled=False) for c in sorted(contents)]
+            else:
+                # REPLACE substitutes whole RRset, keep records created by other means
+                current_ttl, current_contents = existing.get((rname, rtype), (None, set()))
+                if current_ttl == ttl and contents <= current_contents:
+                    continue
+                rrset = [dict(content=r['content'], disabled=bool(r.get('disabled')))
+                         for r in records.get((rname, rtype), []) if r['content'] not in contents]
+                rrset += [dict(content=c, disabled=False) for c in sorted(contents)]
+            changes.append(dict(name=rname, type=rtype, ttl=ttl, changetype='REPLACE', records=rrset))
+
+        if zone['purge']:
+            for (rname, rtype) in sorted(existing):
+                if (rname, rtype) in desired:
+                    continue
+                if rname == name and rtype in ['SOA', 'NS']:
+                    continue
+                changes.append(dict(name=rname, type=rtype, changetype='DELETE'))
+        return changes
+
+    def _apply(self, zone):
+        """Converge a single zone.
+
+        Returns:
+            change {dict} applied change, None if nothing changed.
+        """
+        name = zone['name'].rstrip('.') + '.'
+        path = f'/zones/{quote(name)}'
+        try:
+            current = self._request('GET', path)
+        except PowerDNSError as e:
+            if not isinstance(e.__cause__, HTTPError) or e.__cause__.code not in [404, 422]:
+                raise
+            current = None
+
+        if current is None:
+            changes = self._build_changes(zone, name, [])
+            if not self.check_mode:
+                nameservers = [ns.rstrip('.') + '.' for ns in zone['nameservers']]
+                rrsets = [dict((k, v) for k, v in c.items() if k != 'changetype') for c in changes]
+                self._request('POST', '/zones', dict(name=name, kind=zone['kind'],
+                                                     nameservers=nameservers, rrsets=rrsets))
+            action = 'create'
+        else:
+            changes = self._build_changes(zone, name, current.get('rrsets', []))
+            if not changes:
+                return None
+            if not self.check_mode:
+                self._request('PATCH', path, dict(rrsets=changes))
+            action = 'update'
+
+        rrsets = [dict(name=c['name'], type=c['type'], changetype=c['changetype']) for c in changes]
+        return dict(name=name, action=action, rrsets=rrsets)
+
+    def __call__(self):
+        """Execute `run` function when calling the class.
+        """
+        try:
+            self.ansible.exit_json(**self.run())
+        except PowerDNSError as e:
+            self.ansible.fail_json(msg=str(e))
+
+def main():
+    module = PowerDNSZoneModule()
+    module()
+
+if __name__ == '__main__':
+    main()
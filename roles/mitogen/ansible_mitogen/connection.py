@@ -103,6 +103,21 @@ def default(value, default):
     return value
 
 
+def _with_stream_compression(spec, hop):
+    """
+    Add any Mitogen message compression configured for `spec` to the
+    ContextService arguments of its transport hop. Become hops are local, so
+    never compressed.
+    """
+    method = spec.mitogen_stream_compression()
+    if method:
+        hop['kwargs']['stream_compression'] = method
+        threshold = spec.mitogen_stream_compression_threshold()
+        if threshold is not None:
+            hop['kwargs']['stream_compression_threshold'] = int(threshold)
+    return hop
+
+
 def _connect_local(spec):
     """
     Return ContextService arguments for a local connection.
@@ -768,7 +783,9 @@ class Connection(ansible.plugins.connection.ConnectionBase):
                 seen_names=seen_names + (spec.inventory_name(),),
             )
 
-        stack += (CONNECTION_METHOD[spec.transport()](spec),)
+        stack += (_with_stream_compression(
+            spec, CONNECTION_METHOD[spec.transport()](spec)
+        ),)
         if spec.become() and ((spec.become_user() != spec.remote_user()) or
                               C.BECOME_ALLOW_SAME_USER):
             stack += (CONNECTION_METHOD[spec.become_method()](spec),)
@@ -1019,6 +1036,56 @@ class Connection(ansible.plugins.connection.ConnectionBase):
             return self.init_child_result['fork_context'].default_call_chain
         return self.chain
 
+    def _call_stat_service_async(self, method_name, **kwargs):
+        self._connect()
+        return self.binding.get_service_context().call_service_async(
+            service_name='ansible_mitogen.services.FileStatService',
+            method_name=method_name,
+            context=self.context,
+            **kwargs
+        )
+
+    def get_prefetched_stat(self, scope, path, follow):
+        """
+        Consume the stat of `path` if it was prefetched by a previous task of
+        the task list identified by `scope`.
+
+        :returns:
+            Stat dict, or :data:`None`.
+        """
+        return self._call_stat_service_async(
+            'get',
+            scope=ansible_mitogen.utils.unsafe.cast(scope),
+            path=ansible_mitogen.utils.unsafe.cast(path),
+            follow=bool(follow),
+        ).get().unpickle()
+
+    def put_prefetched_stats(self, scope, follow, stats):
+        """
+        Record stats prefetched for upcoming tasks of the task list identified
+        by `scope`.
+        """
+        self._call_stat_service_async(
+            'put',
+            scope=ansible_mitogen.utils.unsafe.cast(scope),
+            follow=bool(follow),
+            stats=stats,
+        ).get().unpickle()
+
+    def forget_prefetched_stats(self, paths=()):
+        """
+        Forget prefetched stats of `paths`, or all of them if `paths` is
+        empty, since the target filesystem may be about to change.
+
+        :returns:
+            :class:`mitogen.core.Receiver` the caller must wait on before
+            reporting the change as complete.
+        """
+        return self._call_stat_service_async(
+            'forget',
+            paths=ansible_mitogen.utils.unsafe.cast(list(paths)),
+        )
+
     def spawn_isolated_child(self):
         """
         Fork or launch a new child off the target context.
@@ -42,6 +42,7 @@ import ansible.utils.unsafe_proxy
 import ansible.vars.clean
 
 from ansible.module_utils.common.text.converters import to_bytes, to_text
+from ansible.module_utils.six import string_types
 from ansible.module_utils.six.moves import shlex_quote
 
 import mitogen.core
@@ -165,6 +166,127 @@ class ActionModuleMixin(ansible.plugins.action.ActionBase):
             ansible_mitogen.utils.unsafe.cast(path)
         )
 
+    #: Actions whose destination stat is prefetched by the first task of a
+    #: task list needing a stat, see :meth:`_execute_remote_stat`.
+    STAT_PREFETCH_ACTIONS = frozenset(
+        prefix + name
+        for prefix in ('', 'ansible.builtin.', 'ansible.legacy.')
+        for name in ('copy', 'template')
+    )
+
+    #: Maximum number of destinations prefetched at once.
+    STAT_PREFETCH_MAX = 128
+
+    #: Modules only modifying the file or directory tree designated by one of
+    #: their arguments. Any other module causes every prefetched stat to be
+    #: forgotten.
+    STAT_PATH_ARGS_BY_MODULE = {
+        'copy': ('dest',),
+        'file': ('path', 'dest', 'name'),
+        'stat': (),
+    }
+
+    def _get_stat_prefetch_scope(self):
+        """
+        Return the identifier of the task list the current task belongs to,
+        or :data:`None`.
+        """
+        return getattr(self._task._parent, '_uuid', None)
+
+    def _get_stat_prefetch_paths(self, follow):
+        """
+        Return destinations of copy and template tasks following the current
+        one in its task list, whose stat could be required next.
+        """
+        tasks = getattr(self._task._parent, 'block', None) or []
+        paths = []
+        found = False
+        for task in tasks:
+            if getattr(task, '_uuid', None) == self._task._uuid:
+                found = True
+                continue
+            if (not found or
+                    getattr(task, 'action', None) not in self.STAT_PREFETCH_ACTIONS or
+                    task.loop is not None or task.loop_with or task.delegate_to):
+                continue
+            try:
+                dest = self._templar.template(task.args.get('dest'))
+                task_follow = self._templar.template(task.args.get('follow', False))
+            except Exception:
+                continue
+            if not isinstance(dest, string_types):
+                continue
+            if (not dest.startswith('/') or dest.endswith('/') or
+                    bool(task_follow) != bool(follow)):
+                continue
+            paths.append(ansible_mitogen.utils.unsafe.cast(dest))
+            if len(paths) >= self.STAT_PREFETCH_MAX:
+                break
+        return paths
+
+    def _execute_remote_stat(self, path, all_vars, follow, tmp=None, checksum=True):
+        """
+        Fetch the stat of `path` along with those of upcoming copy and
+        template destinations of the task list in a single call to
+        :func:`ansible_mitogen.target.stat_paths`, rather than running the
+        ``stat`` module for each task.
+        """
+        scope = self._get_stat_prefetch_scope()
+        if scope is None:
+            return super(ActionModuleMixin, self)._execute_remote_stat(
+                path, all_vars, follow, tmp=tmp, checksum=checksum,
+            )
+
+        path = ansible_mitogen.utils.unsafe.cast(path)
+        st = self._connection.get_prefetched_stat(scope, path, follow)
+        if st is None:
+            paths = [path] + [
+                p for p in self._get_stat_prefetch_paths(follow)
+                if p != path
+            ]
+            LOG.debug('_execute_remote_stat(%r): prefetching %d paths',
+                      path, len(paths))
+            stats = self._connection.get_chain().call(
+                ansible_mitogen.target.stat_paths,
+                paths,
+                follow=bool(follow),
+            )
+            st = stats.pop(path)
+            prefetched = dict(
+                (p, pst) for p, pst in stats.items()
+                if pst is not None
+            )
+            if prefetched:
+                self._connection.put_prefetched_stats(scope, follow, prefetched)
+
+        if st is None:
+            return super(ActionModuleMixin, self)._execute_remote_stat(
+                path, all_vars, follow, tmp=tmp, checksum=checksum,
+            )
+
+        # Mimic ActionBase._execute_remote_stat() fixups.
+        if not st['exists']:
+            st['checksum'] = '1'
+        elif 'checksum' not in st:
+            st['checksum'] = ''
+        return ansible.utils.unsafe_proxy.wrap_var(st)
+
+    def _forget_prefetched_stats(self, module_name, module_args):
+        """
+        Forget prefetched stats which running `module_name` may invalidate.
+        """
+        name = module_name.rsplit('.', 1)[-1]
+        if name not in self.STAT_PATH_ARGS_BY_MODULE:
+            return self._connection.forget_prefetched_stats()
+        paths = [
+            module_args[key]
+            for key in self.STAT_PATH_ARGS_BY_MODULE[name]
+            if module_args.get(key)
+        ]
+        if paths:
+            return self._connection.forget_prefetched_stats(paths)
+        return None
+
     def _configure_module(self, module_name, module_args, task_vars=None):
         """
         Mitogen does not use the Ansiballz framework. This call should never
@@ -373,6 +495,10 @@ class ActionModuleMixin(ansible.plugins.action.ActionBase):
             self._connection.context = None
 
         self._connection._connect()
+        forget_recv = self._forget_prefetched_stats(
+            ansible_mitogen.utils.unsafe.cast(mitogen.core.to_text(module_name)),
+            ansible_mitogen.utils.unsafe.cast(module_args),
+        )
         result = ansible_mitogen.planner.invoke(
             ansible_mitogen.planner.Invocation(
                 action=self,
@@ -387,6 +513,9 @@ class ActionModuleMixin(ansible.plugins.action.ActionBase):
             )
         )
 
+        if forget_recv is not None:
+            forget_recv.get().unpickle()
+
         if tmp and delete_remote_tmp and ansible_mitogen.utils.ansible_version[:2] < (2, 5):
             # Built-in actions expected tmpdir to be cleaned up automatically
             # on _execute_module().
@@ -485,6 +614,8 @@ class ActionModuleMixin(ansible.plugins.action.ActionBase):
         else:
             # not used, just adding a filler value
             possible_pythons = ['python']
+            # Arbitrary commands may change any file.
+            self._connection.forget_prefetched_stats().get().unpickle()
 
         for possible_python in possible_pythons:
             try:
@@ -176,6 +176,7 @@ def setup_pool(pool):
     pool.add(mitogen.service.PushFileService(router=pool.router))
     pool.add(ansible_mitogen.services.ContextService(router=pool.router))
     pool.add(ansible_mitogen.services.ModuleDepService(pool.router))
+    pool.add(ansible_mitogen.services.FileStatService(pool.router))
     LOG.debug('Service pool configured: size=%d', pool.size)
 
 
@@ -201,6 +202,10 @@ def _setup_responder(responder):
         is_pkg=True,
     )
 
+    # Every target requests these, build their payloads before the first
+    # connection rather than on the broker thread at first request.
+    responder.precompress(ansible_mitogen.services.ContextService.ALWAYS_PRELOAD)
+
 
 def increase_open_file_limit():
     """
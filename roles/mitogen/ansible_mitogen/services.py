@@ -120,6 +120,11 @@ class ContextService(mitogen.service.Service):
     the connection parameters (sharding).
     """
     max_interpreters = int(os.getenv('MITOGEN_MAX_INTERPRETERS', '20'))
+    #: If :data:`True`, targets keep received module payloads in a cache
+    #: directory below their good temporary directory, and are only sent
+    #: modules missing from it on later connections. The directory is pruned
+    #: to :attr:`mitogen.core.Importer.module_cache_max_size` on connection.
+    module_cache = os.getenv('MITOGEN_TARGET_MODULE_CACHE', '') not in ('', '0')
 
     def __init__(self, *args, **kwargs):
         super(ContextService, self).__init__(*args, **kwargs)
@@ -404,12 +409,18 @@ class ContextService(mitogen.service.Service):
         mitogen.core.listen(context, 'disconnect',
             lambda: self._on_context_disconnect(context))
 
-        self._send_module_forwards(context)
+        # With the module cache, forward modules only once the target
+        # advertised its cache content from init_child().
+        if not self.module_cache:
+            self._send_module_forwards(context)
         init_child_result = context.call(
             ansible_mitogen.target.init_child,
             log_level=LOG.getEffectiveLevel(),
             candidate_temp_dirs=self._get_candidate_temp_dirs(),
+            module_cache=self.module_cache,
         )
+        if self.module_cache:
+            self._send_module_forwards(context)
 
         if os.environ.get('MITOGEN_DUMP_THREAD_STACKS'):
             from mitogen import debug
@@ -557,3 +568,107 @@ class ModuleDepService(mitogen.service.Service):
                 'custom': custom,
             }
         return self._cache[key]
+
+
+class FileStatService(mitogen.service.Service):
+    """
+    Cache target file stat results prefetched in bulk by workers.
+
+    When a template or copy task requires the stat of its destination, the
+    worker also fetches, in the same round-trip, the stat of every destination
+    of template and copy tasks following it in its task list, and stores them
+    here. Subsequent tasks of the same task list then find their stat without
+    a round-trip to the target.
+
+    Entries are scoped to a target context and task list, are consumed by the
+    first lookup, and are forgotten by workers as soon as a module that could
+    modify the target filesystem runs.
+    """
+    def __init__(self, *args, **kwargs):
+        super(FileStatService, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        #: Mapping of :class:`mitogen.core.Context` -> (scope, dict) tuple,
+        #: where dict maps (path, follow) to stat dict.
+        self._stats_by_context = {}
+
+    def _on_context_disconnect(self, context):
+        self._lock.acquire()
+        try:
+            self._stats_by_context.pop(context, None)
+        finally:
+            self._lock.release()
+
+    @mitogen.service.expose(mitogen.service.AllowParents())
+    @mitogen.service.arg_spec({
+        'context': mitogen.core.Context,
+        'scope': mitogen.core.UnicodeType,
+        'follow': bool,
+        'stats': dict,
+    })
+    def put(self, context, scope, follow, stats):
+        """
+        Record prefetched stats of a task list, replacing those of any other
+        task list for the same context.
+        """
+        self._lock.acquire()
+        try:
+            if context not in self._stats_by_context:
+                mitogen.core.listen(context, 'disconnect',
+                                    lambda: self._on_context_disconnect(context))
+            current_scope, cache = self._stats_by_context.get(context, (None, {}))
+            if current_scope != scope:
+                cache = {}
+            for path, st in stats.items():
+                cache[path, follow] = st
+            self._stats_by_context[context] = (scope, cache)
+        finally:
+            self._lock.release()
+
+    @mitogen.service.expose(mitogen.service.AllowParents())
+    @mitogen.service.arg_spec({
+        'context': mitogen.core.Context,
+        'scope': mitogen.core.UnicodeType,
+        'path': mitogen.core.UnicodeType,
+        'follow': bool,
+    })
+    def get(self, context, scope, path, follow):
+        """
+        Consume the prefetched stat of `path`.
+
+        :returns:
+            Stat dict, or :data:`None` if it was not prefetched.
+        """
+        self._lock.acquire()
+        try:
+            current_scope, cache = self._stats_by_context.get(context, (None, {}))
+            if current_scope != scope:
+                return None
+            return cache.pop((path, follow), None)
+        finally:
+            self._lock.release()
+
+    @mitogen.service.expose(mitogen.service.AllowParents())
+    @mitogen.service.arg_spec({
+        'context': mitogen.core.Context,
+        'paths': list,
+    })
+    def forget(self, context, paths):
+        """
+        Forget prefetched stats of `paths` and anything below them, or all of
+        them if `paths` is empty.
+        """
+        roots = set(path.rstrip('/') or '/' for path in paths)
+        prefixes = tuple(root.rstrip('/') + '/' for root in roots)
+        self._lock.acquire()
+        try:
+            if context not in self._stats_by_context:
+                return
+            if not paths:
+                del self._stats_by_context[context]
+                return
+            _, cache = self._stats_by_context[context]
+            for key in list(cache):
+                if key[0] in roots or key[0].startswith(prefixes):
+                    del cache[key]
+        finally:
+            self._lock.release()
@@ -38,6 +38,7 @@ __metaclass__ = type
 
 import errno
 import grp
+import hashlib
 import json
 import logging
 import operator
@@ -319,7 +320,7 @@ def find_good_temp_dir(candidate_temp_dirs):
 
 
 @mitogen.core.takes_econtext
-def init_child(econtext, log_level, candidate_temp_dirs):
+def init_child(econtext, log_level, candidate_temp_dirs, module_cache=False):
     """
     Called by ContextService immediately after connection; arranges for the
     (presently) spotless Python interpreter to be forked, where the newly
@@ -335,6 +336,10 @@ def init_child(econtext, log_level, candidate_temp_dirs):
     :param list[str] candidate_temp_dirs:
         List of $variable-expanded and tilde-expanded directory names to add to
         candidate list of temporary directories.
+    :param bool module_cache:
+        If :data:`True`, keep received module payloads in a cache directory
+        below the selected temporary directory, advertising those already
+        present to the master. See :meth:`mitogen.core.Importer.use_module_cache`.
 
     :returns:
         Dict like::
@@ -363,6 +368,14 @@ def init_child(econtext, log_level, candidate_temp_dirs):
     global good_temp_dir
     good_temp_dir = find_good_temp_dir(candidate_temp_dirs)
 
+    if module_cache:
+        path = os.path.join(good_temp_dir, 'mitogen_module_cache')
+        try:
+            econtext.importer.use_module_cache(path)
+        except OSError:
+            e = sys.exc_info()[1]
+            LOG.warning('module cache %r unusable: %s', path, e)
+
     return {
         u'fork_context': _fork_parent,
         u'home_dir': mitogen.core.to_text(os.path.expanduser('~')),
@@ -754,3 +767,90 @@ def file_exists(path):
     Python versions.
     """
     return os.path.exists(path)
+
+
+def _stat_path(path, follow, checksum):
+    """
+    Produce the subset of the ``stat`` module result used by action plug-ins
+    to decide whether a file must be transferred, or :data:`None` if `path`
+    cannot be inspected and the ``stat`` module must be run instead.
+    """
+    b_path = os.path.expanduser(os.path.expandvars(path))
+    try:
+        st = os.stat(b_path) if follow else os.lstat(b_path)
+    except OSError as e:
+        if e.args[0] in (errno.ENOENT, errno.ENOTDIR):
+            return {'exists': False}
+        return None
+
+    mode = st.st_mode
+    dct = {
+        'exists': True,
+        'path': path,
+        'mode': '%04o' % stat.S_IMODE(mode),
+        'isdir': stat.S_ISDIR(mode),
+        'ischr': stat.S_ISCHR(mode),
+        'isblk': stat.S_ISBLK(mode),
+        'isreg': stat.S_ISREG(mode),
+        'isfifo': stat.S_ISFIFO(mode),
+        'islnk': stat.S_ISLNK(mode),
+        'issock': stat.S_ISSOCK(mode),
+        'uid': st.st_uid,
+        'gid': st.st_gid,
+        'size': st.st_size,
+        'inode': st.st_ino,
+        'dev': st.st_dev,
+        'nlink': st.st_nlink,
+        'atime': st.st_atime,
+        'mtime': st.st_mtime,
+        'ctime': st.st_ctime,
+        'readable': os.access(b_path, os.R_OK),
+        'writeable': os.access(b_path, os.W_OK),
+        'executable': os.access(b_path, os.X_OK),
+    }
+    try:
+        dct['pw_name'] = pwd.getpwuid(st.st_uid).pw_name
+    except KeyError:
+        pass
+    try:
+        dct['gr_name'] = grp.getgrgid(st.st_gid).gr_name
+    except KeyError:
+        pass
+    if dct['islnk']:
+        dct['lnk_source'] = os.path.realpath(b_path)
+        dct['lnk_target'] = os.readlink(b_path)
+
+    if checksum and dct['isreg'] and dct['readable']:
+        h = hashlib.sha1()
+        try:
+            fp = open(b_path, 'rb')
+            try:
+                for chunk in iter(lambda: fp.read(mitogen.core.CHUNK_SIZE), b''):
+                    h.update(chunk)
+            finally:
+                fp.close()
+        except (IOError, OSError):
+            return None
+        dct['checksum'] = h.hexdigest()
+    return dct
+
+
+def stat_paths(paths, follow=False, checksum=True):
+    """
+    Inspect a batch of filesystem paths in a single call, as the ``stat``
+    module would with ``checksum_algorithm=sha1``.
+
+    :param list paths:
+        Paths to inspect.
+    :param bool follow:
+        If :data:`True`, follow symbolic links.
+    :param bool checksum:
+        If :data:`True`, compute the SHA1 checksum of regular files.
+    :returns:
+        Dict mapping each path to its stat dict, or to :data:`None` when it
+        could not be inspected.
+    """
+    return dict(
+        (path, _stat_path(path, follow, checksum))
+        for path in paths
+    )
@@ -394,6 +394,19 @@ class Spec(with_metaclass(abc.ABCMeta, object)):
         Whether SSH compression is enabled.
         """
 
+    @abc.abstractmethod
+    def mitogen_stream_compression(self):
+        """
+        Mitogen message compression method for the connection, "zlib" or
+        "lzma", or :data:`None` to disable it.
+        """
+
+    @abc.abstractmethod
+    def mitogen_stream_compression_threshold(self):
+        """
+        Minimum message size compressed by :meth:`mitogen_stream_compression`.
+        """
+
     @abc.abstractmethod
     def extra_args(self):
         """
@@ -598,6 +611,14 @@ class PlayContextSpec(Spec):
     def mitogen_ssh_compression(self):
         return self._connection.get_task_var('mitogen_ssh_compression')
 
+    def mitogen_stream_compression(self):
+        return self._connection.get_task_var('mitogen_stream_compression')
+
+    def mitogen_stream_compression_threshold(self):
+        return self._connection.get_task_var(
+            'mitogen_stream_compression_threshold'
+        )
+
     def extra_args(self):
         return self._connection.get_extra_args()
 
@@ -845,6 +866,12 @@ class MitogenViaSpec(Spec):
     def mitogen_ssh_compression(self):
         return self._host_vars.get('mitogen_ssh_compression')
 
+    def mitogen_stream_compression(self):
+        return self._host_vars.get('mitogen_stream_compression')
+
+    def mitogen_stream_compression_threshold(self):
+        return self._host_vars.get('mitogen_stream_compression_threshold')
+
     def extra_args(self):
         return []  # TODO
 
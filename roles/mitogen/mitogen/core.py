@@ -109,6 +109,11 @@ except ImportError:
 # Absolute imports for <2.5.
 select = __import__('select')
 
+try:
+    from hashlib import sha1
+except ImportError:
+    from sha import new as sha1  # Python 2.4
+
 try:
     import cProfile
 except ImportError:
@@ -152,6 +157,8 @@ FORWARD_MODULE = 108
 DETACHING = 109
 CALL_SERVICE = 110
 STUB_CALL_SERVICE = 111
+CACHED_MODULES = 112
+FRAGMENT = 113
 
 #: Special value used to signal disconnection or the inability to route a
 #: message, when it appears in the `reply_to` field. Usually causes
@@ -193,6 +200,18 @@ else:
 
 AnyTextType = (BytesType, UnicodeType)
 
+# Python 3.8+: out-of-band pickle buffers.
+PickleBuffer = getattr(pickle, 'PickleBuffer', None)
+
+#: Highest pickle protocol this interpreter uses for messages. Protocol 5 is
+#: only used towards contexts known to support it, see
+#: :meth:`Message.pickled`.
+PICKLE_PROTOCOL = 5 if PickleBuffer else 2
+
+#: Mapping of context ID to the highest pickle protocol that context announced
+#: during bootstrap. Contexts missing from the map are sent protocol 2.
+_pickle_protocol_by_id = {}
+
 try:
     next = next
 except NameError:
@@ -284,6 +303,12 @@ class Blob(BytesType):
     def __reduce__(self):
         return (Blob, (BytesType(self),))
 
+    def __reduce_ex__(self, protocol):
+        # Under protocol 5 the payload may be transmitted out of band.
+        if protocol >= 5:
+            return (Blob, (PickleBuffer(self),))
+        return self.__reduce__()
+
 
 class Secret(UnicodeType):
     """
@@ -398,6 +423,9 @@ def to_text(o):
 # Documented in api.rst to work around Sphinx limitation.
 now = getattr(time, 'monotonic', time.time)
 
+# Python 3.7+: CPU time of the calling thread, used for per-stream accounting.
+thread_time = getattr(time, 'thread_time', now)
+
 
 # Python 2.4
 try:
@@ -604,6 +632,32 @@ def io_op(func, *args):
             raise
 
 
+if hasattr(os, 'readv'):
+    def _readinto(fd, buf):
+        return os.readv(fd, [buf])
+else:
+    def _readinto(fd, buf):
+        # Python 2.x lacks os.readv(), this costs an extra copy.
+        s = os.read(fd, len(buf))
+        buf[:len(s)] = s
+        return len(s)
+
+if hasattr(os, 'writev'):
+    _writev = os.writev
+else:
+    def _writev(fd, bufs):
+        # Python 2.x lacks os.writev(), this costs an extra copy.
+        return os.write(fd, b('').join([BytesType(buf) for buf in bufs]))
+
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError):
+    IOV_MAX = -1
+if IOV_MAX < 16:
+    # POSIX guarantees at least 16 entries (_XOPEN_IOV_MAX).
+    IOV_MAX = 16
+
+
 class PidfulStreamHandler(logging.StreamHandler):
     """
     A :class:`logging.StreamHandler` subclass used when
@@ -812,64 +866,82 @@ class Message(object):
     the :ref:`stream-protocol` header, an optional reference to the receiving
     :class:`mitogen.core.Router` for ingress messages, and helper methods for
     deserialization and generating replies.
-    """
-    #: Integer target context ID. :class:`Router` delivers messages locally
-    #: when their :attr:`dst_id` matches :data:`mitogen.context_id`, otherwise
-    #: they are routed up or downstream.
-    dst_id = None
-
-    #: Integer source context ID. Used as the target of replies if any are
-    #: generated.
-    src_id = None
-
-    #: Context ID under whose authority the message is acting. See
-    #: :ref:`source-verification`.
-    auth_id = None
-
-    #: Integer target handle in the destination context. This is one of the
-    #: :ref:`standard-handles`, or a dynamically generated handle used to
-    #: receive a one-time reply, such as the return value of a function call.
-    handle = None
 
-    #: Integer target handle to direct any reply to this message. Used to
-    #: receive a one-time reply, such as the return value of a function call.
-    #: :data:`IS_DEAD` has a special meaning when it appears in this field.
-    reply_to = None
-
-    #: Raw message data bytes.
-    data = b('')
-
-    _unpickled = object()
-
-    #: The :class:`Router` responsible for routing the message. This is
-    #: :data:`None` for locally originated messages.
-    router = None
-
-    #: The :class:`Receiver` over which the message was last received. Part of
-    #: the :class:`mitogen.select.Select` interface. Defaults to :data:`None`.
-    receiver = None
+    Fields are held in :attr:`__slots__`, as many messages are constructed
+    per second on the broker thread during large fan-outs.
+    """
+    __slots__ = ('dst_id', 'src_id', 'auth_id', 'handle', 'reply_to', 'data',
+                 'router', 'receiver', '_unpickled')
 
     HEADER_FMT = '>hLLLLLL'
     HEADER_LEN = struct.calcsize(HEADER_FMT)
     HEADER_MAGIC = 0x4d49  # 'MI'
+    #: Precompiled :data:`HEADER_FMT`.
+    HEADER_STRUCT = struct.Struct(HEADER_FMT)
+    #: Replaces :data:`HEADER_MAGIC` for payloads compressed using the
+    #: :class:`Compression` negotiated for the stream.
+    HEADER_MAGIC_COMPRESSED = 0x4d5a  # 'MZ'
+
+    #: Protocol 5 pickles having out-of-band buffers are framed as
+    #: :data:`OOB_HEADER_STRUCT` (magic, pickle length, buffer count), one
+    #: 32-bit length per buffer, the pickle, then the buffers.
+    OOB_HEADER_STRUCT = struct.Struct('>4sLL')
+    OOB_MAGIC = b('\x00MOB')
+
+    #: Payloads larger than :attr:`MitogenProtocol.fragment_size` travel as
+    #: :data:`FRAGMENT` messages, each prefixed by :data:`FRAGMENT_STRUCT`
+    #: (original handle, fragment ID, total size, offset).
+    FRAGMENT_STRUCT = struct.Struct('>LQQQ')
+
+    def __init__(self, dst_id=None, src_id=None, auth_id=None, handle=None,
+                 reply_to=None, data=b(''), router=None, receiver=None):
+        """
+        Construct a message from from the supplied fields. :attr:`src_id` and
+        :attr:`auth_id` default to :data:`mitogen.context_id`.
+        """
+        #: Integer target context ID. :class:`Router` delivers messages
+        #: locally when their :attr:`dst_id` matches
+        #: :data:`mitogen.context_id`, otherwise they are routed up or
+        #: downstream.
+        self.dst_id = dst_id
+        #: Integer source context ID. Used as the target of replies if any are
+        #: generated.
+        self.src_id = mitogen.context_id if src_id is None else src_id
+        #: Context ID under whose authority the message is acting. See
+        #: :ref:`source-verification`.
+        self.auth_id = mitogen.context_id if auth_id is None else auth_id
+        #: Integer target handle in the destination context. This is one of
+        #: the :ref:`standard-handles`, or a dynamically generated handle used
+        #: to receive a one-time reply, such as the return value of a function
+        #: call.
+        self.handle = handle
+        #: Integer target handle to direct any reply to this message. Used to
+        #: receive a one-time reply, such as the return value of a function
+        #: call. :data:`IS_DEAD` has a special meaning when it appears in this
+        #: field.
+        self.reply_to = reply_to
+        #: Raw message data bytes.
+        self.data = data
+        #: The :class:`Router` responsible for routing the message. This is
+        #: :data:`None` for locally originated messages.
+        self.router = router
+        #: The :class:`Receiver` over which the message was last received.
+        #: Part of the :class:`mitogen.select.Select` interface. Defaults to
+        #: :data:`None`.
+        self.receiver = receiver
+        # _unpickled is only set once unpickle() succeeded.
+        assert isinstance(data, BytesType), 'Message data is not Bytes'
 
-    def __init__(self, **kwargs):
+    def pack_header(self):
         """
-        Construct a message from from the supplied `kwargs`. :attr:`src_id` and
-        :attr:`auth_id` are always set to :data:`mitogen.context_id`.
+        Return the encoded header for this message, without its payload.
         """
-        self.src_id = mitogen.context_id
-        self.auth_id = mitogen.context_id
-        vars(self).update(kwargs)
-        assert isinstance(self.data, BytesType), 'Message data is not Bytes'
+        return self.HEADER_STRUCT.pack(self.HEADER_MAGIC, self.dst_id,
+                                       self.src_id, self.auth_id, self.handle,
+                                       self.reply_to or 0, len(self.data))
 
     def pack(self):
-        return (
-            struct.pack(self.HEADER_FMT, self.HEADER_MAGIC, self.dst_id,
-                        self.src_id, self.auth_id, self.handle,
-                        self.reply_to or 0, len(self.data))
-            + self.data
-        )
+        return self.pack_header() + self.data
 
     def _unpickle_context(self, context_id, name):
         return _unpickle_context(context_id, name, router=self.router)
@@ -881,6 +953,11 @@ class Message(object):
         s, n = LATIN1_CODEC.encode(s)
         return s
 
+    def _unpickle_bytearray(self, s=u'', encoding=None):
+        if isinstance(s, UnicodeType):
+            s, _ = LATIN1_CODEC.encode(s)
+        return bytearray(s)
+
     def _find_global(self, module, func):
         """
         Return the class implementing `module_name.class_name` or raise
@@ -903,6 +980,15 @@ class Message(object):
             return self._unpickle_bytes
         elif module == '__builtin__' and func == 'bytes':
             return BytesType
+        elif module in ('__builtin__', 'builtins'):
+            # Protocol 5 encodes these as opcodes rather than globals, accept
+            # them from protocol 2 peers too.
+            if func == 'set':
+                return set
+            elif func == 'frozenset':
+                return frozenset
+            elif func == 'bytearray':
+                return self._unpickle_bytearray
         raise StreamError('cannot unpickle %r/%r', module, func)
 
     @property
@@ -934,12 +1020,54 @@ class Message(object):
         """
         self = cls(**kwargs)
         try:
-            self.data = pickle__dumps(obj, protocol=2)
+            if _pickle_protocol_by_id.get(self.dst_id, 2) >= 5 and \
+                    PICKLE_PROTOCOL >= 5:
+                self.data = self._dumps_oob(obj)
+            else:
+                self.data = pickle__dumps(obj, protocol=2)
         except pickle.PicklingError:
             e = sys.exc_info()[1]
             self.data = pickle__dumps(CallError(e), protocol=2)
         return self
 
+    @classmethod
+    def _dumps_oob(cls, obj):
+        """
+        Serialize `obj` using protocol 5, framing any out-of-band buffers after
+        the pickle rather than copying them into it.
+        """
+        buffers = []
+        body = pickle__dumps(obj, protocol=5, buffer_callback=buffers.append)
+        if not buffers:
+            return body
+
+        views = [buf.raw() for buf in buffers]
+        return b('').join([
+            cls.OOB_HEADER_STRUCT.pack(cls.OOB_MAGIC, len(body), len(views)),
+            struct.pack('>%dL' % (len(views),), *[len(v) for v in views]),
+            body,
+        ] + views)
+
+    def _split_oob(self):
+        """
+        Split :attr:`data` framed by :meth:`_dumps_oob` into the pickle and
+        a list of :class:`memoryview` over each out-of-band buffer.
+        """
+        data = memoryview(self.data)
+        _, body_len, count = self.OOB_HEADER_STRUCT.unpack_from(data)
+        offset = self.OOB_HEADER_STRUCT.size
+        lengths = struct.unpack_from('>%dL' % (count,), data, offset)
+        offset += 4 * count
+        body = data[offset:offset + body_len]
+        offset += body_len
+        buffers = []
+        for length in lengths:
+            buffers.append(data[offset:offset + length])
+            offset += length
+        if offset != len(data):
+            raise ValueError('out-of-band buffers do not match message size')
+        return body, buffers
+
     def reply(self, msg, router=None, **kwargs):
         """
         Compose a reply to this message and send it using :attr:`router`, or
@@ -954,10 +1082,11 @@ class Message(object):
             Optional keyword parameters overriding message fields in the reply.
         """
         if not isinstance(msg, Message):
-            msg = Message.pickled(msg)
+            msg = Message.pickled(msg, dst_id=self.src_id)
         msg.dst_id = self.src_id
         msg.handle = self.reply_to
-        vars(msg).update(kwargs)
+        for name, value in kwargs.items():
+            setattr(msg, name, value)
         if msg.handle:
             (self.router or router).route(msg)
         else:
@@ -994,20 +1123,26 @@ class Message(object):
         if throw_dead and self.is_dead:
             self._throw_dead()
 
-        obj = self._unpickled
-        if obj is Message._unpickled:
-            fp = BytesIO(self.data)
-            unpickler = _Unpickler(fp, **self.UNPICKLER_KWARGS)
-            unpickler.find_global = self._find_global
+        try:
+            obj = self._unpickled
+        except AttributeError:
             try:
                 # Must occur off the broker thread.
                 try:
+                    if self.data[:4] == self.OOB_MAGIC:
+                        body, buffers = self._split_oob()
+                        unpickler = _Unpickler(BytesIO(body), buffers=buffers,
+                                               **self.UNPICKLER_KWARGS)
+                    else:
+                        unpickler = _Unpickler(BytesIO(self.data),
+                                               **self.UNPICKLER_KWARGS)
+                    unpickler.find_global = self._find_global
                     obj = unpickler.load()
                 except:
                     LOG.error('raw pickle was: %r', self.data)
                     raise
                 self._unpickled = obj
-            except (TypeError, ValueError):
+            except (TypeError, ValueError, struct.error):
                 e = sys.exc_info()[1]
                 raise StreamError('invalid message: %s', e)
 
@@ -1046,7 +1181,9 @@ class Sender(object):
         Send `data` to the remote end.
         """
         _vv and IOLOG.debug('%r.send(%r..)', self, repr(data)[:100])
-        self.context.send(Message.pickled(data, handle=self.dst_handle))
+        self.context.send(Message.pickled(data,
+                                          dst_id=self.context.context_id,
+                                          handle=self.dst_handle))
 
     explicit_close_msg = 'Sender was explicitly closed'
 
@@ -1340,6 +1477,14 @@ class Importer(object):
     if PY3:
         ALWAYS_BLACKLIST += ['cStringIO']
 
+    #: Total size in bytes :meth:`use_module_cache` prunes the on-disk module
+    #: cache to, removing the least recently used payloads first.
+    module_cache_max_size = 64 * 1048576
+
+    #: Age in seconds after which leftover temporary files of interrupted
+    #: module cache writes are removed.
+    module_cache_tmp_max_age = 3600
+
     def __init__(self, router, context, core_src, whitelist=(), blacklist=()):
         self._log = logging.getLogger('mitogen.importer')
         self._context = context
@@ -1356,6 +1501,10 @@ class Importer(object):
         # Presence of an entry in this map indicates in-flight GET_MODULE.
         self._callbacks = {}
         self._cache = {}
+        #: Directory of the on-disk module cache, see :meth:`use_module_cache`.
+        self._module_cache_dir = None
+        #: SHA-1 digests of payloads present in :attr:`_module_cache_dir`.
+        self._module_cache_digests = set()
         if core_src:
             self._update_linecache('x/mitogen/core.py', core_src)
             self._cache['mitogen.core'] = (
@@ -1574,6 +1723,143 @@ class Importer(object):
             # later.
             os.environ['PBR_VERSION'] = '0.0.0'
 
+    def use_module_cache(self, path):
+        """
+        Persist compressed module payloads received from now on in the
+        directory `path`, named by the SHA-1 digest of their content, and
+        advertise payloads already present there to the parent, so it may
+        omit them from :data:`LOAD_MODULE` messages. The directory is first
+        pruned to :attr:`module_cache_max_size`.
+
+        Only a parent that is the master honours the advertisement; the
+        directory must be owned by the current user and not writeable by
+        others, as its content is executed.
+
+        :raises OSError:
+            `path` could not be created or is unsafe.
+        """
+        if not os.path.isdir(path):
+            os.makedirs(path, int('0700', 8))
+        st = os.stat(path)
+        if st.st_uid != os.geteuid() or st.st_mode & int('022', 8):
+            raise OSError(errno.EPERM, 'unsafe module cache directory', path)
+
+        digests = self._prune_module_cache(path)
+        self._lock.acquire()
+        try:
+            self._module_cache_dir = path
+            self._module_cache_digests = digests
+        finally:
+            self._lock.release()
+
+        self._log.debug('module cache %r holds %d payloads', path, len(digests))
+        if digests and self._context.context_id == 0:
+            self._context.send(
+                Message(data=b(' '.join(sorted(digests))),
+                        handle=CACHED_MODULES)
+            )
+
+    def _prune_module_cache(self, path):
+        """
+        Remove the least recently used payloads of the module cache in `path`
+        beyond :attr:`module_cache_max_size`, and leftover temporary files.
+
+        :returns:
+            Set of digests of the remaining payloads.
+        """
+        payloads = []
+        tmp_deadline = time.time() - self.module_cache_tmp_max_age
+        for name in os.listdir(path):
+            name_path = os.path.join(path, name)
+            try:
+                st = os.lstat(name_path)
+                if len(name) == 40 and not name.strip('0123456789abcdef'):
+                    payloads.append((st.st_mtime, st.st_size, name))
+                elif name.endswith('.tmp') and st.st_mtime < tmp_deadline:
+                    os.unlink(name_path)
+            except OSError:
+                pass
+
+        # Most recently used first, as reads refresh the modification time.
+        payloads.sort(reverse=True)
+        digests = set()
+        total = 0
+        for _, size, name in payloads:
+            total += size
+            if total <= self.module_cache_max_size:
+                digests.add(name)
+                continue
+            try:
+                os.unlink(os.path.join(path, name))
+            except OSError:
+                pass
+        return digests
+
+    def _read_module_cache(self, digest):
+        """
+        Return the payload named `digest` from the module cache, or
+        :data:`None` if it is missing or corrupt.
+        """
+        path = os.path.join(self._module_cache_dir, digest)
+        try:
+            fp = open(path, 'rb')
+            try:
+                compressed = fp.read()
+            finally:
+                fp.close()
+        except (IOError, OSError):
+            compressed = None
+
+        if compressed is None or sha1(compressed).hexdigest() != digest:
+            self._log.debug('module cache payload %s unusable', digest)
+            self._lock.acquire()
+            try:
+                self._module_cache_digests.discard(digest)
+            finally:
+                self._lock.release()
+            return None
+
+        try:
+            # Mark as recently used for _prune_module_cache().
+            os.utime(path, None)
+        except OSError:
+            pass
+        return compressed
+
+    def _write_module_cache(self, compressed):
+        digest = sha1(compressed).hexdigest()
+        self._lock.acquire()
+        try:
+            if digest in self._module_cache_digests:
+                return
+        finally:
+            self._lock.release()
+
+        path = os.path.join(self._module_cache_dir, digest)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                         int('0600', 8))
+            try:
+                os.write(fd, compressed)
+            finally:
+                os.close(fd)
+            os.rename(tmp_path, path)
+        except OSError:
+            self._log.debug('could not write module cache payload %s',
+                            digest, exc_info=True)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self._lock.acquire()
+        try:
+            self._module_cache_digests.add(digest)
+        finally:
+            self._lock.release()
+
     def _on_load_module(self, msg):
         if msg.is_dead:
             return
@@ -1582,6 +1868,19 @@ class Importer(object):
         fullname = tup[0]
         _v and self._log.debug('received %s', fullname)
 
+        # 5:digest, when the payload is omitted as held by the module cache.
+        if len(tup) > 5:
+            compressed = self._read_module_cache(tup[5])
+            if compressed is None:
+                # Vanished since it was advertised: request it again in full,
+                # leaving callbacks registered.
+                self._context.send(Message(data=b(fullname),
+                                           handle=GET_MODULE))
+                return
+            tup = tup[:3] + (compressed, tup[4])
+        elif self._module_cache_dir and tup[3] is not None:
+            self._write_module_cache(tup[3])
+
         self._lock.acquire()
         try:
             self._cache[fullname] = tup
@@ -1907,17 +2206,14 @@ class Stream(object):
         :meth:`Broker.start_receive`, and the method must invoke
         :meth:`on_disconnect` if reading produces an empty string.
 
-        The default implementation reads :attr:`Protocol.read_size` bytes and
-        passes the resulting bytestring to :meth:`Protocol.on_receive`. If the
-        bytestring is 0 bytes, invokes :meth:`on_disconnect` instead.
+        The default implementation lets :meth:`Protocol.on_readable` read from
+        :attr:`receive_side`. If it detects disconnection, invokes
+        :meth:`on_disconnect` instead.
         """
-        buf = self.receive_side.read(self.protocol.read_size)
-        if not buf:
+        if not self.protocol.on_readable(broker, self.receive_side):
             LOG.debug('%r: empty read, disconnecting', self.receive_side)
             return self.on_disconnect(broker)
 
-        self.protocol.on_receive(broker, buf)
-
     def on_transmit(self, broker):
         """
         Invoked by :class:`Broker` when the stream's :attr:`transmit_side` has
@@ -1993,6 +2289,21 @@ class Protocol(object):
             self.stream and self.stream.name,
         )
 
+    def on_readable(self, broker, side):
+        """
+        Called by :meth:`Stream.on_receive` when `side` is readable. The
+        default implementation reads :attr:`read_size` bytes and passes the
+        resulting bytestring to :meth:`on_receive`.
+
+        :returns:
+            :data:`False` if `side` was disconnected, otherwise :data:`True`.
+        """
+        buf = side.read(self.read_size)
+        if not buf:
+            return False
+        self.on_receive(broker, buf)
+        return True
+
     def on_shutdown(self, broker):
         _v and LOG.debug('%r: shutting down', self)
         self.stream.on_disconnect(broker)
@@ -2082,55 +2393,122 @@ class BufferedWriter(object):
     Implement buffered output while avoiding quadratic string operations. This
     is currently constructed by each protocol, in future it may become fixed
     for each stream instead.
+
+    Output is passed as sequences of buffers that are written using a single
+    vectored write, so callers need not concatenate headers and payloads, and
+    any backlog is drained using as few system calls as possible.
     """
+    #: Maximum bytes passed to a single vectored write while draining the
+    #: backlog. At most :data:`IOV_MAX` buffers are passed in any case.
+    max_writev_size = 4 * CHUNK_SIZE
+
     def __init__(self, broker, protocol):
         self._broker = broker
         self._protocol = protocol
         self._buf = collections.deque()
         self._len = 0
+        #: Count of write system calls issued.
+        self.write_count = 0
+        #: Count of bytes successfully written.
+        self.write_bytes = 0
+
+    def _transmit(self, bufs):
+        self.write_count += 1
+        written = self._protocol.stream.transmit_side.writev(bufs)
+        if written:
+            self.write_bytes += written
+        return written
 
     def write(self, s):
         """
         Transmit `s` immediately, falling back to enqueuing it and marking the
         stream writeable if no OS buffer space is available.
         """
+        self.writev((s,))
+
+    def writev(self, bufs):
+        """
+        Like :meth:`write`, but transmit the concatenation of the sequence of
+        buffers `bufs` without first copying them into a single string.
+        """
+        bufs = [buf for buf in bufs if buf]
+        if not bufs:
+            return
+
         if not self._len:
             # Modifying epoll/Kqueue state is expensive, as are needless broker
             # loops. Rather than wait for writeability, just write immediately,
             # and fall back to the broker loop on error or full buffer.
             try:
-                n = self._protocol.stream.transmit_side.write(s)
-                if n:
-                    if n == len(s):
-                        return
-                    s = s[n:]
+                n = self._transmit(bufs)
             except OSError:
-                pass
+                n = 0
+            if n:
+                for i, buf in enumerate(bufs):
+                    if n < len(buf):
+                        bufs = [BufferType(buf, n)] + bufs[i+1:]
+                        break
+                    n -= len(buf)
+                else:
+                    return
 
             self._broker._start_transmit(self._protocol.stream)
-        self._buf.append(s)
-        self._len += len(s)
+
+        for buf in bufs:
+            self._buf.append(buf)
+            self._len += len(buf)
+
+    def _gather(self):
+        """
+        Return a prefix of the backlog suitable for one vectored write, and
+        its total size.
+        """
+        bufs = []
+        size = 0
+        for buf in self._buf:
+            bufs.append(buf)
+            size += len(buf)
+            if len(bufs) == IOV_MAX or size >= self.max_writev_size:
+                break
+        return bufs, size
 
     def on_transmit(self, broker):
         """
         Respond to stream writeability by retrying previously buffered
-        :meth:`write` calls.
+        :meth:`write` calls, coalescing as many as possible into each vectored
+        write. Writing continues until the backlog is empty or the OS buffer
+        fills, so edge-triggered pollers are guaranteed a further event.
         """
-        if self._buf:
-            buf = self._buf.popleft()
-            written = self._protocol.stream.transmit_side.write(buf)
+        while self._buf:
+            bufs, size = self._gather()
+            try:
+                written = self._transmit(bufs)
+            except OSError:
+                e = sys.exc_info()[1]
+                if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+                # Spurious readiness, wait for the next event.
+                return
+
             if not written:
                 _v and LOG.debug('disconnected during write to %r', self)
                 self._protocol.stream.on_disconnect(broker)
                 return
-            elif written != len(buf):
-                self._buf.appendleft(BufferType(buf, written))
 
             _vv and IOLOG.debug('transmitted %d bytes to %r', written, self)
             self._len -= written
+            short = written < size
+            while written:
+                n = len(self._buf[0])
+                if written < n:
+                    self._buf[0] = BufferType(self._buf[0], written)
+                    break
+                self._buf.popleft()
+                written -= n
+            if short:
+                return
 
-        if not self._buf:
-            broker._stop_transmit(self._protocol.stream)
+        broker._stop_transmit(self._protocol.stream)
 
 
 class Side(object):
@@ -2225,6 +2603,22 @@ class Side(object):
             return b('')
         return s
 
+    def readinto(self, buf):
+        """
+        Like :meth:`read`, but receive into the writeable buffer `buf`, such
+        as a :class:`memoryview`, rather than allocating a new bytestring.
+
+        :returns:
+            Number of bytes read, or 0 to indicate disconnection was detected.
+        """
+        if self.closed:
+            return 0
+        n, disconnected = io_op(_readinto, self.fd, buf)
+        if disconnected:
+            LOG.debug('%r: disconnected during read: %s', self, disconnected)
+            return 0
+        return n
+
     def write(self, s):
         """
         Write as much of the bytes from `s` as possible to the file descriptor,
@@ -2245,6 +2639,190 @@ class Side(object):
             return None
         return written
 
+    def writev(self, bufs):
+        """
+        Like :meth:`write`, but write as much as possible of the concatenation
+        of the sequence of buffers `bufs` using a single :func:`os.writev`
+        call.
+
+        :returns:
+            Number of bytes written, or :data:`None` if disconnection was
+            detected.
+        """
+        if self.closed:
+            return None
+
+        written, disconnected = io_op(_writev, self.fd, bufs)
+        if disconnected:
+            LOG.debug('%r: disconnected during write: %s', self, disconnected)
+            return None
+        return written
+
+
+class Compression(object):
+    """
+    Compress message payloads on one stream, using the method negotiated with
+    the peer during bootstrap. Payloads smaller than :attr:`threshold` are sent
+    as they are. Subclasses implement a method, and
+    :data:`COMPRESSION_BY_NAME` maps method names to them.
+
+    Only used on the broker thread.
+
+    :param int threshold:
+        If not :data:`None`, overrides :attr:`threshold`.
+    """
+    #: Method name exchanged during bootstrap.
+    name = None
+
+    #: Minimum payload size to compress.
+    threshold = 512
+
+    def __init__(self, threshold=None):
+        if threshold is not None:
+            self.threshold = threshold
+        #: Count of payloads compressed.
+        self.compress_count = 0
+        #: Payload bytes before compression.
+        self.compress_in_bytes = 0
+        #: Payload bytes after compression.
+        self.compress_out_bytes = 0
+        #: Broker thread CPU seconds spent compressing.
+        self.compress_secs = 0.0
+        #: Count of payloads decompressed.
+        self.decompress_count = 0
+        #: Payload bytes before decompression.
+        self.decompress_in_bytes = 0
+        #: Payload bytes after decompression.
+        self.decompress_out_bytes = 0
+        #: Broker thread CPU seconds spent decompressing.
+        self.decompress_secs = 0.0
+
+    def __repr__(self):
+        return '%s(threshold=%d)' % (type(self).__name__, self.threshold)
+
+    def compress(self, data):
+        """
+        Return the compressed form of `data`.
+        """
+        t0 = thread_time()
+        out = self._compress(data)
+        self.compress_secs += thread_time() - t0
+        self.compress_count += 1
+        self.compress_in_bytes += len(data)
+        self.compress_out_bytes += len(out)
+        return out
+
+    def decompress(self, data, max_size):
+        """
+        Return the decompressed form of `data`.
+
+        :raises StreamError:
+            The payload is corrupt, or decompresses to more than `max_size`
+            bytes.
+        """
+        t0 = thread_time()
+        try:
+            out = self._decompress(data, max_size)
+        except Exception:
+            e = sys.exc_info()[1]
+            raise StreamError('%r: corrupt compressed payload: %s', self, e)
+        self.decompress_secs += thread_time() - t0
+        if out is None:
+            raise StreamError('%r: compressed payload exceeds %d bytes',
+                              self, max_size)
+        self.decompress_count += 1
+        self.decompress_in_bytes += len(data)
+        self.decompress_out_bytes += len(out)
+        return out
+
+    def get_stats(self):
+        """
+        Return a dict of the counters above, with `compress_ratio` and
+        `decompress_ratio` giving the size after compression as a fraction of
+        the size before.
+        """
+        return {
+            'name': self.name,
+            'threshold': self.threshold,
+            'compress_count': self.compress_count,
+            'compress_in_bytes': self.compress_in_bytes,
+            'compress_out_bytes': self.compress_out_bytes,
+            'compress_ratio': (
+                float(self.compress_out_bytes) / self.compress_in_bytes
+                if self.compress_in_bytes else None
+            ),
+            'compress_secs': self.compress_secs,
+            'decompress_count': self.decompress_count,
+            'decompress_in_bytes': self.decompress_in_bytes,
+            'decompress_out_bytes': self.decompress_out_bytes,
+            'decompress_ratio': (
+                float(self.decompress_in_bytes) / self.decompress_out_bytes
+                if self.decompress_out_bytes else None
+            ),
+            'decompress_secs': self.decompress_secs,
+        }
+
+
+class ZlibCompression(Compression):
+    """
+    One zlib stream per direction, flushed after each payload, so later
+    payloads benefit from the history of earlier ones.
+    """
+    name = 'zlib'
+    level = 6
+
+    def __init__(self, threshold=None):
+        super(ZlibCompression, self).__init__(threshold)
+        self._compressor = zlib.compressobj(self.level)
+        self._decompressor = zlib.decompressobj()
+
+    def _compress(self, data):
+        return (self._compressor.compress(data) +
+                self._compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def _decompress(self, data, max_size):
+        out = self._decompressor.decompress(data, max_size + 1)
+        if len(out) > max_size or self._decompressor.unconsumed_tail:
+            return None
+        return out
+
+
+class LzmaCompression(Compression):
+    """
+    Raw LZMA2, compressing each payload independently since Python's
+    :mod:`lzma` cannot flush a stream without ending it. Requires Python 3.3+
+    built with liblzma, otherwise construction raises :class:`ImportError`.
+    """
+    name = 'lzma'
+    preset = 2
+
+    def __init__(self, threshold=None):
+        super(LzmaCompression, self).__init__(threshold)
+        import lzma
+        self._lzma = lzma
+        self._filters = [{'id': lzma.FILTER_LZMA2, 'preset': self.preset}]
+
+    def _compress(self, data):
+        return self._lzma.compress(data, format=self._lzma.FORMAT_RAW,
+                                   filters=self._filters)
+
+    def _decompress(self, data, max_size):
+        decompressor = self._lzma.LZMADecompressor(
+            format=self._lzma.FORMAT_RAW,
+            filters=self._filters,
+        )
+        out = decompressor.decompress(data, max_size + 1)
+        if len(out) > max_size or not decompressor.eof:
+            return None
+        return out
+
+
+#: Mapping of method name to :class:`Compression` subclass.
+COMPRESSION_BY_NAME = {
+    ZlibCompression.name: ZlibCompression,
+    LzmaCompression.name: LzmaCompression,
+}
+
 
 class MitogenProtocol(Protocol):
     """
@@ -2260,6 +2838,43 @@ class MitogenProtocol(Protocol):
     #: peer.
     on_message = None
 
+    #: Initial size of the receive buffer. It grows as needed to hold the
+    #: whole of a message, and shrinks back once drained when larger than
+    #: :attr:`max_idle_receive_size`.
+    receive_size = CHUNK_SIZE
+    max_idle_receive_size = 8 * CHUNK_SIZE
+
+    #: If not :data:`None`, the :class:`Compression` negotiated with the peer
+    #: during bootstrap.
+    compression = None
+
+    #: When :attr:`buffered` is at or above this many bytes, threads other
+    #: than the broker routing messages towards this stream block in
+    #: :meth:`throttle` until it falls to :attr:`low_watermark`. If
+    #: :data:`None`, output is buffered without limit.
+    high_watermark = 32 * CHUNK_SIZE
+    low_watermark = 8 * CHUNK_SIZE
+
+    #: Messages that must never block, such as :data:`FORWARD_LOG`, are
+    #: admitted past :attr:`high_watermark` until :attr:`buffered` reaches this
+    #: many bytes, then dropped.
+    drop_watermark = 128 * CHUNK_SIZE
+
+    #: When forwarding a message received on another stream leaves this many
+    #: bytes or more in :attr:`buffered`, stop receiving from that stream until
+    #: this stream drains to :attr:`low_watermark`. This bounds what a context
+    #: forwarding from a fast to a slow peer buffers, at the cost of stalling
+    #: every message arriving on the paused stream, including those for other
+    #: peers. It is therefore well above :attr:`high_watermark`, so it only
+    #: engages when the peer stopped draining. If :data:`None`, forwarded
+    #: messages are buffered without limit.
+    forward_watermark = 128 * CHUNK_SIZE
+
+    #: Messages with larger payloads are split into :data:`FRAGMENT` messages
+    #: of at most this many bytes each, bounding the receive buffer of every
+    #: hop. Only the destination reassembles them.
+    fragment_size = 8 * CHUNK_SIZE
+
     def __init__(self, router, remote_id, auth_id=None,
                  local_id=None, parent_ids=None):
         self._router = router
@@ -2278,29 +2893,107 @@ class MitogenProtocol(Protocol):
             auth_id in ([local_id] + parent_ids)
         )
         self.sent_modules = set(['mitogen', 'mitogen.core'])
-        self._input_buf = collections.deque()
-        self._input_buf_len = 0
+        #: SHA-1 digests of module payloads advertised by the remote as held
+        #: in its on-disk module cache, see :data:`CACHED_MODULES`.
+        self.cached_modules = set()
+        #: Receive buffer, where :attr:`_input_start` to :attr:`_input_end`
+        #: hold bytes not yet framed into messages.
+        self._input_buf = bytearray(self.receive_size)
+        self._input_start = 0
+        self._input_end = 0
+        #: Minimum bytes still missing to complete the message at
+        #: :attr:`_input_start`.
+        self._input_need = 0
+        #: Size of the last message received.
+        self._input_last_len = 0
         self._writer = BufferedWriter(router.broker, self)
 
         #: Routing records the dst_id of every message arriving from this
         #: stream. Any arriving DEL_ROUTE is rebroadcast for any such ID.
         self.egress_ids = set()
 
+        #: Bytes admitted by :meth:`throttle` not yet processed by the broker.
+        self._routing = 0
+        self._flow_lock = threading.Lock()
+        #: Latches of threads blocked in :meth:`throttle`.
+        self._throttled = []
+        #: Streams no longer received from due to :meth:`pause`. Broker
+        #: thread only.
+        self._paused = []
+        self._disconnected = False
+        #: Largest value :attr:`buffered` has reached.
+        self.buffered_max = 0
+        #: Count of :meth:`throttle` calls that blocked.
+        self.throttle_count = 0
+        #: Total seconds threads spent blocked in :meth:`throttle`.
+        self.throttle_secs = 0.0
+        #: Count of non-blocking :meth:`throttle` calls refused due to
+        #: :attr:`drop_watermark`.
+        self.drop_count = 0
+        #: Count of streams paused due to :attr:`forward_watermark`.
+        self.pause_count = 0
+
+    def _reserve(self, n):
+        """
+        Ensure :attr:`_input_buf` has room for `n` bytes past
+        :attr:`_input_end`, moving pending bytes to its start or reallocating
+        it as necessary.
+        """
+        buf = self._input_buf
+        if len(buf) - self._input_end >= n:
+            return
+
+        pending = self._input_end - self._input_start
+        size = len(buf)
+        if pending * 4 > size and size * 2 <= self.max_idle_receive_size:
+            # Moving large partial messages dominates, amortize it.
+            size *= 2
+        if pending + n > size:
+            size = pending + n
+        if size != len(buf):
+            self._input_buf = bytearray(size)
+        self._input_buf[:pending] = buf[self._input_start:self._input_end]
+        self._input_start = 0
+        self._input_end = pending
+
+    def on_readable(self, broker, side):
+        """
+        Receive directly into the free space of the receive buffer, first
+        growing it to fit the whole of any partially received message.
+        """
+        # Never reallocate for more than the message in progress lacks.
+        self._reserve(self._input_need or self.read_size)
+        n = side.readinto(memoryview(self._input_buf)[self._input_end:])
+        if not n:
+            return False
+
+        self._input_end += n
+        self._receive_all(broker)
+        return True
+
     def on_receive(self, broker, buf):
         """
         Handle the next complete message on the stream. Raise
         :class:`StreamError` on failure.
         """
         _vv and IOLOG.debug('%r.on_receive()', self)
-        if self._input_buf and self._input_buf_len < 128:
-            self._input_buf[0] += buf
-        else:
-            self._input_buf.append(buf)
+        self._reserve(len(buf))
+        self._input_buf[self._input_end:self._input_end + len(buf)] = buf
+        self._input_end += len(buf)
+        self._receive_all(broker)
 
-        self._input_buf_len += len(buf)
+    def _receive_all(self, broker):
         while self._receive_one(broker):
             pass
 
+        if self._input_start == self._input_end:
+            self._input_start = self._input_end = 0
+            # Keep an oversized buffer while large messages keep arriving,
+            # reallocating it per message costs more than filling it.
+            if (len(self._input_buf) > self.max_idle_receive_size and
+                    self._input_last_len <= self.max_idle_receive_size):
+                self._input_buf = bytearray(self.receive_size)
+
     corrupt_msg = (
         '%s: Corruption detected: frame signature incorrect. This likely means'
         ' some external process is interfering with the connection. Received:'
@@ -2309,19 +3002,23 @@ class MitogenProtocol(Protocol):
     )
 
     def _receive_one(self, broker):
-        if self._input_buf_len < Message.HEADER_LEN:
+        start = self._input_start
+        pending = self._input_end - start
+        if pending < Message.HEADER_LEN:
+            self._input_need = Message.HEADER_LEN - pending
             return False
 
-        msg = Message()
-        msg.router = self._router
-        (magic, msg.dst_id, msg.src_id, msg.auth_id,
-         msg.handle, msg.reply_to, msg_len) = struct.unpack(
-            Message.HEADER_FMT,
-            self._input_buf[0][:Message.HEADER_LEN],
+        (magic, dst_id, src_id, auth_id,
+         handle, reply_to, msg_len) = Message.HEADER_STRUCT.unpack_from(
+            self._input_buf,
+            start,
         )
 
-        if magic != Message.HEADER_MAGIC:
-            LOG.error(self.corrupt_msg, self.stream.name, self._input_buf[0][:2048])
+        if magic != Message.HEADER_MAGIC and not (
+                magic == Message.HEADER_MAGIC_COMPRESSED and
+                self.compression is not None):
+            LOG.error(self.corrupt_msg, self.stream.name,
+                      bytes(self._input_buf[start:start + 2048]))
             self.stream.on_disconnect(broker)
             return False
 
@@ -2332,28 +3029,40 @@ class MitogenProtocol(Protocol):
             return False
 
         total_len = msg_len + Message.HEADER_LEN
-        if self._input_buf_len < total_len:
+        if pending < total_len:
             _vv and IOLOG.debug(
                 '%r: Input too short (want %d, got %d)',
-                self, msg_len, self._input_buf_len - Message.HEADER_LEN
+                self, msg_len, pending - Message.HEADER_LEN
             )
+            self._input_need = total_len - pending
             return False
 
-        start = Message.HEADER_LEN
-        prev_start = start
-        remain = total_len
-        bits = []
-        while remain:
-            buf = self._input_buf.popleft()
-            bit = buf[start:remain]
-            bits.append(bit)
-            remain -= len(bit) + start
-            prev_start = start
-            start = 0
-
-        msg.data = b('').join(bits)
-        self._input_buf.appendleft(buf[prev_start+len(bit):])
-        self._input_buf_len -= total_len
+        # The only copy of the payload after it was read.
+        data = memoryview(self._input_buf)[
+            start + Message.HEADER_LEN:start + total_len
+        ].tobytes()
+        if magic == Message.HEADER_MAGIC_COMPRESSED:
+            try:
+                data = self.compression.decompress(
+                    data, self._router.max_message_size
+                )
+            except StreamError:
+                LOG.error('%r: %s', self, sys.exc_info()[1])
+                self.stream.on_disconnect(broker)
+                return False
+
+        msg = Message(
+            dst_id=dst_id,
+            src_id=src_id,
+            auth_id=auth_id,
+            handle=handle,
+            reply_to=reply_to,
+            data=data,
+            router=self._router,
+        )
+        self._input_start = start + total_len
+        self._input_need = 0
+        self._input_last_len = total_len
         self._router._async_route(msg, self.stream)
         return True
 
@@ -2374,10 +3083,165 @@ class MitogenProtocol(Protocol):
         """
         _vv and IOLOG.debug('%r.on_transmit()', self)
         self._writer.on_transmit(broker)
+        self._unthrottle()
+
+    @property
+    def buffered(self):
+        """
+        Bytes of messages routed towards this stream that are not yet written
+        to the OS.
+        """
+        return self._routing + self._writer._len
+
+    def throttle(self, n, block=True):
+        """
+        Admit `n` bytes about to be routed towards this stream by a thread
+        other than the broker, first blocking the calling thread while
+        :attr:`buffered` is at or above :attr:`high_watermark`. The broker
+        must call :meth:`_routed` once it has processed the message.
+
+        :param bool block:
+            If :data:`False`, never block, instead admitting `n` bytes unless
+            :attr:`buffered` is at or above :attr:`drop_watermark`.
+        :returns:
+            :attr:`buffered` after admitting `n` bytes, or :data:`None` if
+            they were refused.
+        """
+        self._flow_lock.acquire()
+        try:
+            if (self.high_watermark is None or self._disconnected or
+                    self.buffered < self.high_watermark or
+                    (not block and self.buffered < self.drop_watermark)):
+                self._routing += n
+                return self.buffered
+            if not block:
+                self.drop_count += 1
+                return None
+            latch = Latch()
+            self._throttled.append(latch)
+        finally:
+            self._flow_lock.release()
+
+        _v and LOG.debug('%r: throttling sender at %d bytes buffered',
+                         self, self.buffered)
+        t0 = now()
+        latch.get()
+        self._flow_lock.acquire()
+        try:
+            self.throttle_count += 1
+            self.throttle_secs += now() - t0
+            self._routing += n
+            return self.buffered
+        finally:
+            self._flow_lock.release()
+
+    def _routed(self, n):
+        """
+        Release `n` bytes admitted by :meth:`throttle`. Called on the broker
+        thread after the message was passed to :meth:`_send`.
+        """
+        self._flow_lock.acquire()
+        try:
+            self._routing -= n
+        finally:
+            self._flow_lock.release()
+        self._unthrottle()
+
+    def pause(self, stream):
+        """
+        Stop receiving from `stream`, which a message just forwarded towards
+        this stream arrived on, if :attr:`buffered` reached
+        :attr:`forward_watermark`. Broker thread only.
+
+        Since contexts form a tree and routes never double back, a stream
+        paused here waits on a peer further from it, which at worst waits on
+        one further still, ending at a context that forwards nothing and so
+        never pauses. Pausing therefore cannot deadlock.
+        """
+        if (self.forward_watermark is None or stream in self._paused or
+                self.buffered < self.forward_watermark):
+            return
+        _v and LOG.debug('%r: pausing %r at %d bytes buffered',
+                         self, stream, self.buffered)
+        self.pause_count += 1
+        self._paused.append(stream)
+        self._router.broker.stop_receive(stream)
+
+    def _unthrottle(self):
+        """
+        Wake any threads blocked in :meth:`throttle`, and resume any streams
+        paused by :meth:`pause`, if :attr:`buffered` has fallen to
+        :attr:`low_watermark`, or the stream disconnected. The lock is always
+        taken, so a thread that began blocking concurrently with the backlog
+        draining is never missed.
+        """
+        if self._paused and (self._disconnected or
+                             self.buffered <= self.low_watermark):
+            paused = self._paused
+            self._paused = []
+            for stream in paused:
+                if not stream.receive_side.closed:
+                    self._router.broker.start_receive(stream)
+
+        self._flow_lock.acquire()
+        try:
+            if not (self._throttled and (self._disconnected or
+                    self.buffered <= self.low_watermark)):
+                return
+            latches = self._throttled
+            self._throttled = []
+        finally:
+            self._flow_lock.release()
+
+        for latch in latches:
+            latch.put(None)
+
+    def _send_frame(self, msg, handle, bufs):
+        """
+        Write the header of `msg` with `handle`, followed by the concatenation
+        of `bufs`, compressing it if configured.
+        """
+        size = sum(len(buf) for buf in bufs)
+        magic = Message.HEADER_MAGIC
+        compression = self.compression
+        if compression is not None and size >= compression.threshold:
+            bufs = (compression.compress(b('').join(bufs)),)
+            size = len(bufs[0])
+            magic = Message.HEADER_MAGIC_COMPRESSED
+
+        header = Message.HEADER_STRUCT.pack(
+            magic, msg.dst_id, msg.src_id, msg.auth_id, handle,
+            msg.reply_to or 0, size,
+        )
+        self._writer.writev((header,) + tuple(bufs))
+
+    def _send_fragments(self, msg):
+        """
+        Send `msg` as a sequence of :data:`FRAGMENT` messages of at most
+        :attr:`fragment_size` payload bytes, referencing rather than copying
+        the payload.
+        """
+        data = msg.data
+        total = len(data)
+        size = self.fragment_size - Message.FRAGMENT_STRUCT.size
+        frag_id = self._router._allocate_fragment_id()
+        _v and LOG.debug('%r: sending %r as fragment %#x', self, msg, frag_id)
+        for offset in range(0, total, size):
+            header = Message.FRAGMENT_STRUCT.pack(msg.handle, frag_id, total,
+                                                  offset)
+            chunk = BufferType(data, offset)[:size]
+            self._send_frame(msg, FRAGMENT, (header, chunk))
 
     def _send(self, msg):
         _vv and IOLOG.debug('%r._send(%r)', self, msg)
-        self._writer.write(msg.pack())
+        if len(msg.data) > self.fragment_size and msg.handle != FRAGMENT:
+            self._send_fragments(msg)
+        else:
+            self._send_frame(msg, msg.handle, (msg.data,))
+
+        buffered = self.buffered
+        if buffered > self.buffered_max:
+            self.buffered_max = buffered
 
     def send(self, msg):
         """
@@ -2392,6 +3256,19 @@ class MitogenProtocol(Protocol):
         """
         _v and LOG.debug('%r: shutting down', self)
 
+    def on_disconnect(self, broker):
+        """
+        Release any threads blocked in :meth:`throttle`, their messages will
+        be answered as undeliverable, before disconnecting.
+        """
+        self._flow_lock.acquire()
+        try:
+            self._disconnected = True
+        finally:
+            self._flow_lock.release()
+        self._unthrottle()
+        super(MitogenProtocol, self).on_disconnect(broker)
+
 
 class Context(object):
     """
@@ -2466,7 +3343,8 @@ class Context(object):
         _v and LOG.debug('calling service %s.%s of %r, args: %r',
                          service_name, method_name, self, kwargs)
         tup = (service_name, to_text(method_name), Kwargs(kwargs))
-        msg = Message.pickled(tup, handle=CALL_SERVICE)
+        msg = Message.pickled(tup, dst_id=self.context_id,
+                              handle=CALL_SERVICE)
         return self.send_async(msg)
 
     def send(self, msg):
@@ -2671,7 +3549,9 @@ class Latch(object):
     Latches implement queues using the UNIX self-pipe trick, and a per-thread
     :func:`socket.socketpair` that is lazily created the first time any
     latch attempts to sleep on a thread, and dynamically associated with the
-    waiting Latch only for duration of the wait.
+    waiting Latch only for duration of the wait. Where :func:`os.eventfd` is
+    available, a pooled eventfd with its own permanently registered
+    :func:`select.poll` object replaces the socketpair and poller.
 
     See :ref:`waking-sleeping-threads` for further discussion.
     """
@@ -2701,6 +3581,16 @@ class Latch(object):
     #: reference the same underlying kernel object in use by the parent.
     _cls_all_sockets = []
 
+    #: If :data:`True`, sleep using eventfds rather than socketpairs. Linux
+    #: with Python 3.10+ only.
+    use_eventfd = hasattr(os, 'eventfd') and hasattr(select, 'poll')
+
+    #: Like :attr:`_cls_idle_socketpairs`, but of `(efd, pollobj)` tuples.
+    _cls_idle_eventfds = []
+
+    #: Like :attr:`_cls_all_sockets`, but of eventfd descriptors.
+    _cls_all_eventfds = []
+
     def __init__(self):
         self.closed = False
         self._lock = threading.Lock()
@@ -2722,6 +3612,9 @@ class Latch(object):
         cls._cls_idle_socketpairs = []
         while cls._cls_all_sockets:
             cls._cls_all_sockets.pop().close()
+        cls._cls_idle_eventfds = []
+        while cls._cls_all_eventfds:
+            os.close(cls._cls_all_eventfds.pop())
 
     def close(self):
         """
@@ -2787,6 +3680,19 @@ class Latch(object):
             self._cls_all_sockets.extend((rsock, wsock))
             return rsock, wsock
 
+    def _get_eventfd(self):
+        """
+        Return an unused `(efd, pollobj)` tuple, creating one if none exist.
+        """
+        try:
+            return self._cls_idle_eventfds.pop()  # pop() must be atomic
+        except IndexError:
+            efd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+            self._cls_all_eventfds.append(efd)
+            pollobj = select.poll()
+            pollobj.register(efd, select.POLLIN)
+            return efd, pollobj
+
     COOKIE_MAGIC, = struct.unpack('L', b('LTCH') * (struct.calcsize('L')//4))
     COOKIE_FMT = '>Qqqq'  # #545: id() and get_ident() may exceed long on armhfp.
     COOKIE_SIZE = struct.calcsize(COOKIE_FMT)
@@ -2832,12 +3738,20 @@ class Latch(object):
                 return self._queue.pop(i)
             if not block:
                 raise TimeoutError()
-            rsock, wsock = self._get_socketpair()
-            cookie = self._make_cookie()
-            self._sleeping.append((wsock, cookie))
+            if self.use_eventfd:
+                efd, pollobj = self._get_eventfd()
+                # A cookie of None marks eventfd sleepers for _wake().
+                self._sleeping.append((efd, None))
+            else:
+                rsock, wsock = self._get_socketpair()
+                cookie = self._make_cookie()
+                self._sleeping.append((wsock, cookie))
         finally:
             self._lock.release()
 
+        if self.use_eventfd:
+            return self._get_sleep_eventfd(timeout, efd, pollobj)
+
         poller = self.poller_class()
         poller.start_receive(rsock.fileno())
         try:
@@ -2895,6 +3809,47 @@ class Latch(object):
         finally:
             self._lock.release()
 
+    def _get_sleep_eventfd(self, timeout, efd, pollobj):
+        """
+        Like :meth:`_get_sleep`, but wait for :meth:`put` to signal our
+        eventfd.
+        """
+        _vv and IOLOG.debug('%r._get_sleep_eventfd(timeout=%r, fd=%d)',
+                            self, timeout, efd)
+
+        e = None
+        try:
+            if timeout is not None:
+                timeout = max(0, timeout * 1000)
+            io_op(pollobj.poll, timeout)
+        except Exception:
+            e = sys.exc_info()[1]
+
+        self._lock.acquire()
+        try:
+            i = self._sleeping.index((efd, None))
+            del self._sleeping[i]
+            woken = i < self._waking
+            if woken:
+                self._waking -= 1
+                if not pollobj.poll(0):
+                    # put() assigned us an element but has yet to signal the
+                    # eventfd. Wait for it, so a late signal cannot wake the
+                    # eventfd's next user.
+                    io_op(pollobj.poll, None)
+                os.eventfd_read(efd)
+            self._cls_idle_eventfds.append((efd, pollobj))
+            if e:
+                raise e
+            if not woken:
+                raise TimeoutError()
+            if self.closed:
+                raise LatchError()
+            _vv and IOLOG.debug('%r.get() wake -> %r', self, self._queue[i])
+            return self._queue.pop(i)
+        finally:
+            self._lock.release()
+
     def put(self, obj=None):
         """
         Enqueue an object, waking the first thread waiting for a result, if one
@@ -2917,8 +3872,7 @@ class Latch(object):
             if self._waking < len(self._sleeping):
                 wsock, cookie = self._sleeping[self._waking]
                 self._waking += 1
-                _vv and IOLOG.debug('%r.put() -> waking wfd=%r',
-                                    self, wsock.fileno())
+                _vv and IOLOG.debug('%r.put() -> waking %r', self, wsock)
             elif self.notify:
                 self.notify(self)
         finally:
@@ -2928,6 +3882,9 @@ class Latch(object):
             self._wake(wsock, cookie)
 
     def _wake(self, wsock, cookie):
+        if cookie is None:
+            os.eventfd_write(wsock, 1)
+            return
         written, disconnected = io_op(os.write, wsock.fileno(), cookie)
         assert written == len(cookie) and not disconnected
 
@@ -2945,6 +3902,10 @@ class Waker(Protocol):
     :class:`Broker` when another thread needs to modify its state, by enqueing
     a function call to run on the :class:`Broker` thread.
 
+    Only one wake byte is written per batch: calls deferred while a wake is
+    still pending are queued without touching the pipe, and the whole queue
+    is run by the next :meth:`on_receive`.
+
     .. _UNIX self-pipe trick: https://cr.yp.to/docs/selfpipe.html
     """
     read_size = 1
@@ -2959,7 +3920,19 @@ class Waker(Protocol):
 
     def __init__(self, broker):
         self._broker = broker
+        self._lock = threading.Lock()
         self._deferred = collections.deque()
+        #: :data:`True` while a wake byte is written but not yet consumed by
+        #: :meth:`on_receive`. Further :meth:`defer` calls skip the write.
+        self._wake_pending = False
+        #: Count of functions queued from other threads.
+        self.defer_count = 0
+        #: Count of wake bytes written.
+        self.wake_count = 0
+        #: Count of :meth:`on_receive` passes that ran deferred functions.
+        self.drain_count = 0
+        #: Largest number of functions run by a single pass.
+        self.drain_max = 0
 
     def __repr__(self):
         return 'Waker(fd=%r/%r)' % (
@@ -2976,17 +3949,25 @@ class Waker(Protocol):
 
     def on_receive(self, broker, buf):
         """
-        Drain the pipe and fire callbacks. Since :attr:`_deferred` is
-        synchronized, :meth:`defer` and :meth:`on_receive` can conspire to
-        ensure only one byte needs to be pending regardless of queue length.
+        Drain the pipe and fire callbacks. The queue is swapped out and
+        :attr:`_wake_pending` cleared under :attr:`_lock` before any callback
+        runs, so only one byte needs to be pending regardless of queue length,
+        and a :meth:`defer` racing with the drain always writes a fresh byte.
         """
         _vv and IOLOG.debug('%r.on_receive()', self)
-        while True:
-            try:
-                func, args, kwargs = self._deferred.popleft()
-            except IndexError:
-                return
+        self._lock.acquire()
+        try:
+            deferred = self._deferred
+            self._deferred = collections.deque()
+            self._wake_pending = False
+        finally:
+            self._lock.release()
+
+        if deferred:
+            self.drain_count += 1
+            self.drain_max = max(self.drain_max, len(deferred))
 
+        for func, args, kwargs in deferred:
             try:
                 func(*args, **kwargs)
             except Exception:
@@ -2994,6 +3975,22 @@ class Waker(Protocol):
                               func, args, kwargs)
                 broker.shutdown()
 
+    def get_stats(self):
+        """
+        Return a dict of the counters above, with `calls_per_wake` giving the
+        mean number of deferred functions run for each wake byte written.
+        """
+        return {
+            'defer_count': self.defer_count,
+            'wake_count': self.wake_count,
+            'drain_count': self.drain_count,
+            'drain_max': self.drain_max,
+            'calls_per_wake': (
+                float(self.defer_count) / self.wake_count
+                if self.wake_count else None
+            ),
+        }
+
     def _wake(self):
         """
         Wake the multiplexer by writing a byte. If Broker is midway through
@@ -3027,10 +4024,20 @@ class Waker(Protocol):
         if self._broker._exitted:
             raise Error(self.broker_shutdown_msg)
 
-        _vv and IOLOG.debug('%r.defer() [fd=%r]', self,
-                            self.stream.transmit_side.fd)
-        self._deferred.append((func, args, kwargs))
-        self._wake()
+        self._lock.acquire()
+        try:
+            self._deferred.append((func, args, kwargs))
+            self.defer_count += 1
+            wake = not self._wake_pending
+            self._wake_pending = True
+            self.wake_count += wake
+        finally:
+            self._lock.release()
+
+        if wake:
+            _vv and IOLOG.debug('%r.defer() [fd=%r]', self,
+                                self.stream.transmit_side.fd)
+            self._wake()
 
 
 class IoLoggerProtocol(DelimitedProtocol):
@@ -3106,8 +4113,24 @@ class Router(object):
     #: interface, as done in :class:`mitogen.parent.Router`.
     context_class = Context
 
+    #: Largest frame accepted from a stream. Messages larger than
+    #: :attr:`MitogenProtocol.fragment_size` travel as :data:`FRAGMENT`
+    #: messages, so only :attr:`max_reassembly_size` limits their size.
     max_message_size = 128 * 1048576
 
+    #: Number of bytes of messages split in :data:`FRAGMENT` messages that may
+    #: be reassembled at once for a single stream, charged from the size
+    #: announced by their first fragment, and so the largest message that can
+    #: be sent. Further messages are refused until some complete. Never less
+    #: than :attr:`max_message_size`, so raising it keeps permitting messages
+    #: that large.
+    max_reassembly_size = 1024 * 1048576
+
+    #: Number of bytes of messages split in :data:`FRAGMENT` messages that may
+    #: be reassembled at once across every stream. Never less than
+    #: :attr:`max_message_size`.
+    max_reassembly_total = 2048 * 1048576
+
     #: When :data:`True`, permit children to only communicate with the current
     #: context or a parent of the current context. Routing between siblings or
     #: children of parents is prohibited, ensuring no communication is possible
@@ -3129,6 +4152,7 @@ class Router(object):
     refused_msg = 'refused by policy'
     invalid_handle_msg = 'invalid handle'
     too_large_msg = 'message too large (max %d bytes)'
+    reassembly_busy_msg = 'too many bytes being reassembled (max %d bytes)'
     respondent_disconnect_msg = 'the respondent Context has disconnected'
     broker_exit_msg = 'Broker has exitted'
     no_route_msg = 'no route to %r, my ID is %r'
@@ -3152,6 +4176,14 @@ class Router(object):
         self._handle_map = {}
         #: Context -> set { handle, .. }
         self._handles_by_respondent = {}
+        #: (src_id, fragment ID) -> [bytearray or None, bytes received,
+        #: ingress Stream, bytes charged] for messages being reassembled.
+        #: Broker thread only.
+        self._fragments = {}
+        #: ingress Stream -> bytes charged by its messages being reassembled.
+        self._reassembly_by_stream = {}
+        self._reassembly_bytes = 0
+        self._last_fragment_id = 0
         self.add_handler(self._on_del_route, DEL_ROUTE)
 
     def __repr__(self):
@@ -3189,6 +4221,10 @@ class Router(object):
             LOG.debug('DEL_ROUTE for unknown ID %r: %r', target_id, msg)
 
     def _on_stream_disconnect(self, stream):
+        for key, state in list(self._fragments.items()):
+            if state[2] is stream:
+                self._drop_fragments(key)
+
         notify = []
         self._write_lock.acquire()
         try:
@@ -3427,23 +4463,36 @@ class Router(object):
                 )
             )
 
-    def _invoke(self, msg, stream):
-        # IOLOG.debug('%r._invoke(%r)', self, msg)
+    def _admit(self, msg, stream):
+        """
+        Return the :attr:`_handle_map` entry `msg` is dispatched to, or send a
+        dead reply and return :data:`None` if its handle is unknown, or its
+        respondent or policy refuses it.
+        """
         try:
-            persist, fn, policy, respondent = self._handle_map[msg.handle]
+            entry = self._handle_map[msg.handle]
         except KeyError:
             self._maybe_send_dead(True, msg, reason=self.invalid_handle_msg)
-            return
+            return None
 
+        _, _, policy, respondent = entry
         if respondent and not (msg.is_dead or
                                msg.src_id == respondent.context_id):
             self._maybe_send_dead(True, msg, 'reply from unexpected context')
-            return
+            return None
 
         if policy and not policy(msg, stream):
             self._maybe_send_dead(True, msg, self.refused_msg)
+            return None
+        return entry
+
+    def _invoke(self, msg, stream):
+        # IOLOG.debug('%r._invoke(%r)', self, msg)
+        entry = self._admit(msg, stream)
+        if entry is None:
             return
 
+        persist, fn, _, _ = entry
         if not persist:
             self.del_handler(msg.handle)
 
@@ -3468,10 +4517,9 @@ class Router(object):
         """
         _vv and IOLOG.debug('%r._async_route(%r, %r)', self, msg, in_stream)
 
-        if len(msg.data) > self.max_message_size:
-            self._maybe_send_dead(False, msg, self.too_large_msg % (
-                self.max_message_size,
-            ))
+        max_size, _ = self._reassembly_limits()
+        if len(msg.data) > max_size:
+            self._maybe_send_dead(False, msg, self.too_large_msg % (max_size,))
             return
 
         parent_stream = self._stream_by_id.get(mitogen.parent_id)
@@ -3508,6 +4556,8 @@ class Router(object):
             in_stream.protocol.egress_ids.add(msg.dst_id)
 
         if msg.dst_id == mitogen.context_id:
+            if msg.handle == FRAGMENT:
+                return self._on_fragment(msg, in_stream)
             return self._invoke(msg, in_stream)
 
         out_stream = self._stream_by_id.get(msg.dst_id)
@@ -3534,6 +4584,131 @@ class Router(object):
             return
 
         out_stream.protocol._send(msg)
+        if in_stream:
+            out_stream.protocol.pause(in_stream)
+
+    def _allocate_fragment_id(self):
+        """
+        Return an ID for a fragmented message, unique across every context by
+        including our context ID. Broker thread only.
+        """
+        self._last_fragment_id = (self._last_fragment_id + 1) & 0xffffffff
+        return (mitogen.context_id << 32) | self._last_fragment_id
+
+    def _reassembly_limits(self):
+        """
+        Return the effective :attr:`max_reassembly_size` and
+        :attr:`max_reassembly_total`.
+        """
+        return (max(self.max_message_size, self.max_reassembly_size),
+                max(self.max_message_size, self.max_reassembly_total))
+
+    def _reserve_fragments(self, msg, stream, total):
+        """
+        Decide whether to reassemble the message whose first :data:`FRAGMENT`
+        is `msg`, announcing `total` bytes, and charge them to `stream` and
+        the router if so. Otherwise send a dead reply.
+
+        :returns:
+            Number of bytes charged, or :data:`None` if the message is refused.
+        """
+        if self._admit(msg, stream) is None:
+            return None
+
+        max_size, max_total = self._reassembly_limits()
+        if total > max_size:
+            self._maybe_send_dead(False, msg, self.too_large_msg % (max_size,))
+            return None
+
+        used = self._reassembly_by_stream.get(stream, 0)
+        if used + total > max_size:
+            self._maybe_send_dead(False, msg,
+                                  self.reassembly_busy_msg % (max_size,))
+            return None
+        if self._reassembly_bytes + total > max_total:
+            self._maybe_send_dead(False, msg,
+                                  self.reassembly_busy_msg % (max_total,))
+            return None
+
+        self._reassembly_by_stream[stream] = used + total
+        self._reassembly_bytes += total
+        return total
+
+    def _drop_fragments(self, key):
+        """
+        Forget the message being reassembled under `key`, releasing what it
+        was charged.
+        """
+        state = self._fragments.pop(key)
+        charged, stream = state[3], state[2]
+        if charged:
+            self._reassembly_bytes -= charged
+            used = self._reassembly_by_stream[stream] - charged
+            if used:
+                self._reassembly_by_stream[stream] = used
+            else:
+                del self._reassembly_by_stream[stream]
+
+    def _on_fragment(self, msg, in_stream):
+        """
+        Append a :data:`FRAGMENT` message to the buffer of the message it
+        belongs to, and dispatch that message once complete.
+
+        The first fragment is checked against the handler of the message
+        before anything is buffered, and the size it announces is charged to
+        :attr:`max_reassembly_size` and :attr:`max_reassembly_total`. Refused
+        messages get a dead reply and their remaining fragments are discarded.
+        Buffers only grow as fragments arrive, so a peer cannot make us
+        allocate more than it sent.
+        """
+        size = Message.FRAGMENT_STRUCT.size
+        try:
+            (handle, frag_id,
+             total, offset) = Message.FRAGMENT_STRUCT.unpack_from(msg.data)
+        except struct.error:
+            LOG.error('%r: invalid fragment: %r', self, msg)
+            return
+
+        key = (msg.src_id, frag_id)
+        state = self._fragments.get(key)
+        if state is None:
+            if offset:
+                # Tail of a message whose stream disconnected, or that was
+                # discarded due to an invalid fragment.
+                return
+            msg.handle = handle
+            charged = self._reserve_fragments(msg, in_stream, total)
+            buf = None
+            if charged is not None:
+                buf = bytearray()
+            state = self._fragments[key] = [buf, 0, in_stream, charged]
+
+        buf = state[0]
+        n = len(msg.data) - size
+        if offset != state[1] or offset + n > total:
+            LOG.error('%r: fragment %#x: got %d bytes at offset %d, '
+                      'expected offset %d of %d bytes',
+                      self, frag_id, n, offset, state[1], total)
+            self._drop_fragments(key)
+            return
+
+        if buf is not None:
+            buf += BufferType(msg.data, size)
+        state[1] += n
+        if state[1] < total:
+            return
+
+        self._drop_fragments(key)
+        if buf is not None:
+            self._invoke(Message(
+                dst_id=msg.dst_id,
+                src_id=msg.src_id,
+                auth_id=msg.auth_id,
+                handle=handle,
+                reply_to=msg.reply_to,
+                data=BytesType(buf),
+                router=self,
+            ), in_stream)
 
     def route(self, msg):
         """
@@ -3543,9 +4718,87 @@ class Router(object):
         is destined for the local context, it is dispatched using the handles
         registered with :meth:`add_handler`.
 
-        This may be called from any thread.
+        This may be called from any thread. On threads other than the broker,
+        it blocks while the stream `msg` will leave by has more than
+        :attr:`MitogenProtocol.high_watermark` bytes buffered.
+
+        :data:`FORWARD_LOG` messages never block, as their sender holds
+        :mod:`logging` handler locks the broker thread may need to drain the
+        stream. They are instead dropped once
+        :attr:`MitogenProtocol.drop_watermark` bytes are buffered.
+
+        :returns:
+            Bytes buffered on the stream `msg` will leave by, or 0 if it is
+            dispatched locally or no route is known.
+        """
+        stream = None
+        if msg.dst_id != mitogen.context_id:
+            stream = self.stream_by_id(msg.dst_id)
+        if stream is None:
+            self.broker.defer(self._async_route, msg)
+            return 0
+
+        protocol = stream.protocol
+        if thread.get_ident() == self.broker._waker.protocol.broker_ident:
+            self._async_route(msg)
+            return protocol.buffered
+
+        n = len(msg.data)
+        buffered = protocol.throttle(n, block=msg.handle != FORWARD_LOG)
+        if buffered is None:
+            return protocol.buffered
+        self.broker.defer(self._async_route_admitted, msg, protocol, n)
+        return buffered
+
+    def _async_route_admitted(self, msg, protocol, n):
         """
-        self.broker.defer(self._async_route, msg)
+        Route `msg` admitted by :meth:`MitogenProtocol.throttle`, then release
+        its admission.
+        """
+        try:
+            self._async_route(msg)
+        finally:
+            protocol._routed(n)
+
+    def get_stats(self):
+        """
+        Return flow control statistics for every connected stream.
+
+        :returns:
+            Dict containing the key `streams`, mapping the remote context ID
+            of each stream to a dict containing:
+
+            * `buffered_bytes`: Integer bytes currently buffered for
+              transmission.
+            * `buffered_max`: Integer largest `buffered_bytes` observed.
+            * `throttle_count`: Integer count of senders blocked due to
+              :attr:`MitogenProtocol.high_watermark`.
+            * `throttle_secs`: Floating point total seconds senders spent
+              blocked.
+            * `drop_count`: Integer count of :data:`FORWARD_LOG` messages
+              dropped due to :attr:`MitogenProtocol.drop_watermark`.
+            * `pause_count`: Integer count of streams paused due to
+              :attr:`MitogenProtocol.forward_watermark`.
+        """
+        self._write_lock.acquire()
+        try:
+            streams = set(self._stream_by_id.values())
+        finally:
+            self._write_lock.release()
+
+        return {
+            'streams': dict(
+                (stream.protocol.remote_id, {
+                    'buffered_bytes': stream.protocol.buffered,
+                    'buffered_max': stream.protocol.buffered_max,
+                    'throttle_count': stream.protocol.throttle_count,
+                    'throttle_secs': stream.protocol.throttle_secs,
+                    'drop_count': stream.protocol.drop_count,
+                    'pause_count': stream.protocol.pause_count,
+                })
+                for stream in streams
+            )
+        }
 
 
 class NullTimerList(object):
@@ -3580,7 +4833,7 @@ class Broker(object):
         #: thread, or immediately if the current thread is the broker thread.
         #: Safe to call from any thread.
         self.defer = self._waker.protocol.defer
-        self.poller = self.poller_class()
+        self.poller = (poller_class or self.poller_class)()
         self.poller.start_receive(
             self._waker.receive_side.fd,
             (self._waker.receive_side, self._waker.on_receive)
@@ -4041,10 +5294,27 @@ class ExternalContext(object):
         self.stream.accept(in_fp, out_fp)
         self.stream.name = 'parent'
         self.stream.receive_side.keep_alive = False
+        self.stream.protocol.compression = self._get_compression()
 
         listen(self.stream, 'disconnect', self._on_parent_disconnect)
         listen(self.broker, 'exit', self._on_broker_exit)
 
+    def _get_compression(self):
+        """
+        Return the :class:`Compression` requested by the parent, falling back
+        to zlib if the requested method is unavailable here. The parent
+        learns the result from the bootstrap completion marker.
+        """
+        name = self.config.get('compression')
+        if not name:
+            return None
+        threshold = self.config.get('compression_threshold')
+        try:
+            return COMPRESSION_BY_NAME[name](threshold)
+        except ImportError:
+            # Logging is not setup yet, the parent warns instead.
+            return ZlibCompression(threshold)
+
     def _reap_first_stage(self):
         try:
             os.wait()  # Reap first stage.
@@ -4109,6 +5379,7 @@ class ExternalContext(object):
         mitogen.context_id = self.config['context_id']
         mitogen.parent_ids = self.config['parent_ids'][:]
         mitogen.parent_id = mitogen.parent_ids[0]
+        _pickle_protocol_by_id.update(self.config.get('pickle_protocols', {}))
 
     def _nullify_stdio(self):
         """
@@ -4202,7 +5473,13 @@ class ExternalContext(object):
                 _v and LOG.debug('Recovered sys.executable: %r', sys.executable)
 
                 if self.config.get('send_ec2', True):
-                    self.stream.transmit_side.write(b('MITO002\n'))
+                    # Announce the pickle protocol we accept and any
+                    # compression enabled to the parent.
+                    compression = self.stream.protocol.compression
+                    self.stream.transmit_side.write(b('MITO002 %d %s\n' % (
+                        PICKLE_PROTOCOL,
+                        compression.name if compression else '',
+                    )))
                 self.broker._py24_25_compat()
                 self.log_handler.uncork()
                 self.dispatcher.run()
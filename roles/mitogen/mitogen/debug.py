@@ -95,12 +95,23 @@ def get_router_info():
                 'streams': len(set(router._stream_by_id.values())),
                 'contexts': len(set(router._context_by_id.values())),
                 'handles': len(router._handle_map),
+                'defer': router.broker._waker.protocol.get_stats(),
             })
             for id_, router in get_routers().items()
         )
     }
 
 
+def _writer(stream):
+    return getattr(getattr(stream, 'protocol', None), '_writer', None)
+
+
+def _compression_stats(stream):
+    compression = getattr(getattr(stream, 'protocol', None), 'compression',
+                          None)
+    return compression and compression.get_stats()
+
+
 def get_stream_info(router_id):
     router = get_routers().get(router_id)
     return {
@@ -110,6 +121,9 @@ def get_stream_info(router_id):
                 'remote_id': stream.remote_id,
                 'sent_module_count': len(getattr(stream, 'sent_modules', [])),
                 'routes': sorted(getattr(stream, 'routes', [])),
+                'write_count': getattr(_writer(stream), 'write_count', 0),
+                'write_bytes': getattr(_writer(stream), 'write_bytes', 0),
+                'compression': _compression_stats(stream),
                 'type': type(stream).__module__,
             }))
             for via_id, stream in router._stream_by_id.items()
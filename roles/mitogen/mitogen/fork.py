@@ -202,6 +202,9 @@ class Connection(mitogen.parent.Connection):
         config['core_src_fd'] = None
         config['importer'] = self.options.importer
         config['send_ec2'] = False
+        # The parent only learns of compression from ExternalContext's
+        # bootstrap marker, and it is pointless over a local socketpair.
+        config['compression'] = None
         config['setup_package'] = False
         if self.options.on_start:
             config['on_start'] = self.options.on_start
@@ -213,7 +216,7 @@ class Connection(mitogen.parent.Connection):
             self.options.on_fork()
         mitogen.core.set_blocking(childfp.fileno(), True)
 
-        childfp.send(b('MITO002\n'))
+        childfp.send(b('MITO002 %d\n' % (mitogen.core.PICKLE_PROTOCOL,)))
 
         # Expected by the ExternalContext.main().
         os.dup2(childfp.fileno(), 1)
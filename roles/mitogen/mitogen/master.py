@@ -37,6 +37,7 @@ contexts.
 
 import dis
 import errno
+import hashlib
 import inspect
 import itertools
 import logging
@@ -912,6 +913,142 @@ class ParentSpecEnumerationMethod(ParentImpEnumerationMethod):
                          % (self.__class__.__name__, fullname))
 
 
+class ModuleCache(object):
+    """
+    Optional content-addressed on-disk cache of values derived from module
+    source code, such as compressed :data:`mitogen.core.LOAD_MODULE` payloads
+    and import scans, allowing warm controller starts to skip recomputing them.
+
+    Keys are a hash of everything an entry is derived from, including the
+    source code itself, so entries are validated lazily: a changed module
+    simply produces a key that is not found, and stale entries are never
+    matched. Any error reading or writing the cache is treated as a miss.
+
+    Entries are raw bytes prefixed by their SHA-1 digest, which is verified on
+    read. Since entries end up executed, the cache is disabled unless its
+    directory is owned by the current user and not writeable by others.
+
+    :param str path:
+        Cache directory, created with mode 0700 if it does not exist.
+    """
+    #: Bumped whenever the format or derivation of entries changes.
+    format_version = 2
+
+    def __init__(self, path):
+        self.path = path
+        #: :data:`False` if the directory is missing or unsafe.
+        self.enabled = self._check_dir()
+        #: Guards counters, updated by precompress threads.
+        self._lock = threading.Lock()
+        #: Number of entries found in the cache.
+        self.hits = 0
+        #: Number of entries not found in the cache.
+        self.misses = 0
+        #: Number of entries written to the cache.
+        self.writes = 0
+
+    def __repr__(self):
+        return 'ModuleCache(%r)' % (self.path,)
+
+    def _check_dir(self):
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, int('0700', 8))
+            st = os.stat(self.path)
+        except OSError:
+            e = sys.exc_info()[1]
+            LOG.warning('%r: disabled, cannot create directory: %s', self, e)
+            return False
+        if st.st_uid != os.geteuid() or st.st_mode & int('022', 8):
+            LOG.warning('%r: disabled, directory must be owned by uid %d and '
+                        'not writeable by group or others', self, os.geteuid())
+            return False
+        return True
+
+    def key(self, kind, *parts):
+        """
+        Return the key of an entry of type `kind` derived from `parts`.
+
+        :param str kind:
+            Entry type, e.g. ``tuple`` or ``related``.
+        :param parts:
+            Bytes or text strings the entry is derived from.
+        """
+        h = hashlib.sha1(b('%s:%r:%r' % (kind, self.format_version,
+                                         mitogen.__version__)))
+        for part in parts:
+            if not isinstance(part, mitogen.core.BytesType):
+                part = to_text(part).encode('utf-8')
+            h.update(b('\0'))
+            h.update(part)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def get(self, key):
+        """
+        Return the bytes stored for `key`, or :data:`None`.
+        """
+        data = None
+        if self.enabled:
+            try:
+                fp = open(self._path(key), 'rb')
+                try:
+                    data = fp.read()
+                finally:
+                    fp.close()
+            except (IOError, OSError):
+                pass
+        hit = data is not None and data[:40] == b(hashlib.sha1(data[41:]).hexdigest())
+        self._lock.acquire()
+        try:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        finally:
+            self._lock.release()
+        if hit:
+            return data[41:]
+        return None
+
+    def put(self, key, data):
+        """
+        Atomically store the bytes `data` for `key`.
+        """
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp_path = '%s.%d.%d.tmp' % (path, os.getpid(), id(data))
+        try:
+            try:
+                os.makedirs(os.path.dirname(path), int('0700', 8))
+            except OSError:
+                e = sys.exc_info()[1]
+                if e.args[0] != errno.EEXIST:
+                    raise
+            fp = open(tmp_path, 'wb')
+            try:
+                fp.write(b(hashlib.sha1(data).hexdigest() + '\n'))
+                fp.write(data)
+            finally:
+                fp.close()
+            os.rename(tmp_path, path)
+            self._lock.acquire()
+            try:
+                self.writes += 1
+            finally:
+                self._lock.release()
+        except (IOError, OSError):
+            e = sys.exc_info()[1]
+            LOG.debug('%r: cannot write %s: %s', self, key, e)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
 class ModuleFinder(object):
     """
     Given the name of a loaded module, make a best-effort attempt at finding
@@ -926,6 +1063,9 @@ class ModuleFinder(object):
         #: Avoid repeated dependency scanning, which is expensive.
         self._related_cache = {}
 
+        #: Optional :class:`ModuleCache` persisting dependency scans.
+        self.disk_cache = None
+
     def __repr__(self):
         return 'ModuleFinder()'
 
@@ -1026,6 +1166,41 @@ class ModuleFinder(object):
         if src is None:
             return []
 
+        key = None
+        maybe_names = None
+        if self.disk_cache:
+            # resolve_relpath() depends on whether fullname is a package.
+            is_pkg = hasattr(sys.modules.get(fullname, None), '__path__')
+            key = self.disk_cache.key('related', fullname, modpath,
+                                      str(is_pkg), src)
+            data = self.disk_cache.get(key)
+            if data is not None:
+                maybe_names = [name for name in data.decode('utf-8').split('\n')
+                               if name]
+
+        if maybe_names is None:
+            maybe_names = self._scan_related_names(fullname, modpath, src)
+            if key:
+                self.disk_cache.put(key, '\n'.join(
+                    to_text(name) for name in maybe_names
+                ).encode('utf-8'))
+
+        return self._related_cache.setdefault(fullname, sorted(
+            set(
+                mitogen.core.to_text(name)
+                for name in maybe_names
+                if sys.modules.get(name) is not None
+                and not is_stdlib_name(name)
+                and u'six.moves' not in name  # TODO: crap
+            )
+        ))
+
+    def _scan_related_names(self, fullname, modpath, src):
+        """
+        Return the names of every module `fullname` may import, whether they
+        are loaded or not, by compiling its source and examining all
+        IMPORT_NAME ops.
+        """
         maybe_names = list(self.generate_parent_names(fullname))
 
         co = compile(src, modpath, 'exec')
@@ -1043,16 +1218,7 @@ class ModuleFinder(object):
                 for mname in modnames
                 for name in namelist
             )
-
-        return self._related_cache.setdefault(fullname, sorted(
-            set(
-                mitogen.core.to_text(name)
-                for name in maybe_names
-                if sys.modules.get(name) is not None
-                and not is_stdlib_name(name)
-                and u'six.moves' not in name  # TODO: crap
-            )
-        ))
+        return [to_text(name) for name in maybe_names]
 
     def find_related(self, fullname):
         """
@@ -1080,11 +1246,33 @@ class ModuleFinder(object):
 
 
 class ModuleResponder(object):
+    #: Directory of the optional on-disk :class:`ModuleCache`, defaulting to
+    #: the ``MITOGEN_MODULE_CACHE_DIR`` environment variable. When unset,
+    #: module payloads and import scans are only cached in memory.
+    cache_dir = os.environ.get('MITOGEN_MODULE_CACHE_DIR') or None
+
+    #: Number of threads building and compressing :data:`LOAD_MODULE
+    #: <mitogen.core.LOAD_MODULE>` payloads off the broker thread, started
+    #: the first time work is submitted. When 0, payloads are built on the
+    #: broker thread as requests arrive.
+    precompress_threads = 2
+
     def __init__(self, router):
         self._log = logging.getLogger('mitogen.responder')
         self._router = router
         self._finder = ModuleFinder()
         self._cache = {}  # fullname -> pickled
+        #: Serializes :class:`ModuleFinder` use and guards :attr:`_building`.
+        self._lock = threading.Lock()
+        #: fullname -> threading.Event set once its tuple is built.
+        self._building = {}
+        #: Latch of `(fullnames, callback)` consumed by precompress threads.
+        self._precompress_latch = None
+        self._precompress_threads = []
+        self.disk_cache = None
+        if self.cache_dir:
+            self.disk_cache = ModuleCache(self.cache_dir)
+            self._finder.disk_cache = self.disk_cache
         self.blacklist = []
         self.whitelist = ['']
 
@@ -1103,11 +1291,28 @@ class ModuleResponder(object):
         self.good_load_module_size = 0
         #: Number of negative LOAD_MODULE messages sent.
         self.bad_load_module_count = 0
+        #: Number of GET_MODULE messages whose reply had to wait for the
+        #: precompress threads.
+        self.precompress_wait_count = 0
+        #: Number of LOAD_MODULE messages sent without payload, as held by the
+        #: remote's on-disk module cache.
+        self.cached_load_module_count = 0
+        #: Total payload bytes not sent as held by remote module caches.
+        self.cached_load_module_size = 0
+        #: fullname -> SHA-1 digest of its compressed payload.
+        self._digest_by_fullname = {}
 
         router.add_handler(
             fn=self._on_get_module,
             handle=mitogen.core.GET_MODULE,
         )
+        router.add_handler(
+            fn=self._on_cached_modules,
+            handle=mitogen.core.CACHED_MODULES,
+            policy=mitogen.parent.is_immediate_child,
+        )
+        mitogen.core.listen(router.broker, 'shutdown',
+                            self._on_broker_shutdown)
 
     def __repr__(self):
         return 'ModuleResponder'
@@ -1158,13 +1363,55 @@ class ModuleResponder(object):
     minify_safe_re = re.compile(b(r'\s+#\s*!mitogen:\s*minify_safe'))
 
     def _build_tuple(self, fullname):
-        if fullname in self._cache:
-            return self._cache[fullname]
+        tup = self._cache.get(fullname)
+        if tup is not None:
+            return tup
+
+        # Only one thread builds a given tuple, others wait for its result.
+        # Should the builder fail, waiters retry and raise on their own.
+        self._lock.acquire()
+        try:
+            event = self._building.get(fullname)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._building[fullname] = event
+        finally:
+            self._lock.release()
+
+        if not owner:
+            event.wait()
+            return self._build_tuple(fullname)
 
+        try:
+            return self._build_tuple_uncached(fullname)
+        finally:
+            self._lock.acquire()
+            try:
+                del self._building[fullname]
+            finally:
+                self._lock.release()
+            event.set()
+
+    def _find_module_source(self, fullname):
+        self._lock.acquire()
+        try:
+            return self._finder.get_module_source(fullname)
+        finally:
+            self._lock.release()
+
+    def _find_related(self, fullname):
+        self._lock.acquire()
+        try:
+            return self._finder.find_related(fullname)
+        finally:
+            self._lock.release()
+
+    def _build_tuple_uncached(self, fullname):
         if mitogen.core.is_blacklisted_import(self, fullname):
             raise ImportError('blacklisted')
 
-        path, source, is_pkg = self._finder.get_module_source(fullname)
+        path, source, is_pkg = self._find_module_source(fullname)
         if path and is_stdlib_path(path):
             # Prevent loading of 2.x<->3.x stdlib modules! This costs one
             # RTT per hit, so a client-side solution is also required.
@@ -1181,12 +1428,6 @@ class ModuleResponder(object):
             self._cache[fullname] = tup
             return tup
 
-        if self.minify_safe_re.search(source):
-            # If the module contains a magic marker, it's safe to minify.
-            t0 = mitogen.core.now()
-            source = mitogen.minify.minimize_source(source).encode('utf-8')
-            self.minify_secs += mitogen.core.now() - t0
-
         if is_pkg:
             pkg_present = get_child_modules(path, fullname)
             self._log.debug('%s is a package at %s with submodules %r',
@@ -1194,12 +1435,10 @@ class ModuleResponder(object):
         else:
             pkg_present = None
 
-        if fullname == '__main__':
-            source = self.neutralize_main(path, source)
-        compressed = mitogen.core.Blob(zlib.compress(source, 9))
+        compressed = self._compress_source(fullname, path, source)
         related = [
             to_text(name)
-            for name in self._finder.find_related(fullname)
+            for name in self._find_related(fullname)
             if not mitogen.core.is_blacklisted_import(self, name)
         ]
         # 0:fullname 1:pkg_present 2:path 3:compressed 4:related
@@ -1213,9 +1452,129 @@ class ModuleResponder(object):
         self._cache[fullname] = tup
         return tup
 
+    def _compress_source(self, fullname, path, source):
+        """
+        Minify (when marked safe), neutralize and compress module source, or
+        fetch the result from the on-disk cache.
+        """
+        key = None
+        if self.disk_cache:
+            key = self.disk_cache.key('tuple', fullname, path, source)
+            compressed = self.disk_cache.get(key)
+            if compressed is not None:
+                return mitogen.core.Blob(compressed)
+
+        if self.minify_safe_re.search(source):
+            # If the module contains a magic marker, it's safe to minify.
+            t0 = mitogen.core.now()
+            source = mitogen.minify.minimize_source(source).encode('utf-8')
+            elapsed = mitogen.core.now() - t0
+            self._lock.acquire()
+            try:
+                self.minify_secs += elapsed
+            finally:
+                self._lock.release()
+
+        if fullname == '__main__':
+            source = self.neutralize_main(path, source)
+        compressed = zlib.compress(source, 9)
+        if key:
+            self.disk_cache.put(key, compressed)
+        return mitogen.core.Blob(compressed)
+
+    def _is_ready(self, fullname):
+        """
+        Return :data:`True` if the tuples of `fullname` and of its related
+        modules are built, i.e. it can be served without blocking.
+        """
+        tup = self._cache.get(fullname)
+        if tup is None:
+            return False
+        for name in tup[4]:  # related
+            if name not in self._cache:
+                return False
+        return True
+
+    def _precompress_one(self, fullname):
+        try:
+            tup = self._build_tuple(fullname)
+            for name in tup[4]:  # related
+                self._build_tuple(name)
+        except Exception:
+            # Reported to the requestor once served from the broker thread.
+            LOG.debug('%r: while precompressing %r', self, fullname,
+                      exc_info=True)
+
+    def _precompress_main(self):
+        while True:
+            try:
+                fullnames, callback = self._precompress_latch.get()
+            except mitogen.core.LatchError:
+                return
+            for fullname in fullnames:
+                self._precompress_one(fullname)
+            if callback is not None:
+                try:
+                    self._router.broker.defer(callback)
+                except mitogen.core.Error:
+                    return  # Broker is shutting down.
+
+    def _on_broker_shutdown(self):
+        if self._precompress_latch is not None:
+            self._precompress_latch.close()
+
+    def precompress(self, fullnames, callback=None):
+        """
+        Build, compress and cache the :data:`LOAD_MODULE
+        <mitogen.core.LOAD_MODULE>` payloads of `fullnames` and of their
+        related modules on a background thread, so later requests for them
+        are served without stalling the broker.
+
+        :param list fullnames:
+            Module names to precompress.
+        :param callback:
+            If not :data:`None`, function invoked on the broker thread once
+            every module is built.
+        """
+        fullnames = [to_text(fullname) for fullname in fullnames]
+        if not self.precompress_threads:
+            for fullname in fullnames:
+                self._precompress_one(fullname)
+            if callback is not None:
+                self._router.broker.defer(callback)
+            return
+
+        if self._precompress_latch is None:
+            self._precompress_latch = mitogen.core.Latch()
+            for x in range(self.precompress_threads):
+                thread = threading.Thread(
+                    name='mitogen.responder.precompress.%d' % (x,),
+                    target=mitogen.core._profile_hook,
+                    args=('mitogen.responder.precompress',
+                          self._precompress_main),
+                )
+                thread.daemon = True
+                thread.start()
+                self._precompress_threads.append(thread)
+        self._precompress_latch.put((fullnames, callback))
+
+    def _get_digest(self, fullname, compressed):
+        digest = self._digest_by_fullname.get(fullname)
+        if digest is None:
+            digest = hashlib.sha1(compressed).hexdigest()
+            self._digest_by_fullname[fullname] = digest
+        return digest
+
     def _send_load_module(self, stream, fullname):
         if fullname not in stream.protocol.sent_modules:
             tup = self._build_tuple(fullname)
+            if stream.protocol.cached_modules and tup[3] is not None:
+                digest = self._get_digest(fullname, tup[3])
+                if digest in stream.protocol.cached_modules:
+                    self.cached_load_module_count += 1
+                    self.cached_load_module_size += len(tup[3])
+                    # 5:digest of the payload held by the remote.
+                    tup = tup[:3] + (None, tup[4], digest)
             msg = mitogen.core.Message.pickled(
                 tup,
                 dst_id=stream.protocol.remote_id,
@@ -1271,8 +1630,52 @@ class ModuleResponder(object):
         self._log.debug('%s requested module %s', stream.name, fullname)
         self.get_module_count += 1
         if fullname in stream.protocol.sent_modules:
-            LOG.warning('_on_get_module(): dup request for %r from %r',
-                        fullname, stream)
+            digest = self._digest_by_fullname.get(fullname)
+            if digest in stream.protocol.cached_modules:
+                # Payload vanished from the remote module cache, resend it.
+                self._log.debug('%s lacks cached %s, resending it',
+                                stream.name, fullname)
+                stream.protocol.cached_modules.discard(digest)
+                stream.protocol.sent_modules.discard(fullname)
+            elif stream.protocol.cached_modules:
+                # Both the remote's import and its cache miss asked for it.
+                self._log.debug('%s requested resent %s again',
+                                stream.name, fullname)
+            else:
+                LOG.warning('_on_get_module(): dup request for %r from %r',
+                            fullname, stream)
+
+        if self.precompress_threads and not self._is_ready(fullname):
+            # Reply once built, rather than blocking every other stream.
+            self.precompress_wait_count += 1
+            self.precompress(
+                [fullname],
+                lambda: self._on_precompressed(msg.src_id, fullname)
+            )
+            return
+
+        t0 = mitogen.core.now()
+        try:
+            self._send_module_and_related(stream, fullname)
+        finally:
+            self.get_module_secs += mitogen.core.now() - t0
+
+    def _on_cached_modules(self, msg):
+        if msg.is_dead:
+            return
+
+        stream = self._router.stream_by_id(msg.src_id)
+        if stream is None:
+            return
+
+        stream.protocol.cached_modules = set(msg.data.decode().split())
+        self._log.debug('%s holds %d cached modules',
+                        stream.name, len(stream.protocol.cached_modules))
+
+    def _on_precompressed(self, src_id, fullname):
+        stream = self._router.stream_by_id(src_id)
+        if stream is None:
+            return
 
         t0 = mitogen.core.now()
         try:
@@ -1320,7 +1723,17 @@ class ModuleResponder(object):
             self._forward_one_module(context, mitogen.core.to_text(fullname))
 
     def forward_modules(self, context, fullnames):
-        self._router.broker.defer(self._forward_modules, context, fullnames)
+        # Forwarding sends every parent package too, precompress them first.
+        names = set()
+        for fullname in fullnames:
+            fullname = to_text(fullname)
+            while fullname:
+                names.add(fullname)
+                fullname, _, _ = str_rpartition(fullname, u'.')
+        self.precompress(
+            sorted(names),
+            lambda: self._forward_modules(context, fullnames)
+        )
 
 
 class Broker(mitogen.core.Broker):
@@ -1348,13 +1761,13 @@ class Broker(mitogen.core.Broker):
     _watcher = None
     poller_class = mitogen.parent.PREFERRED_POLLER
 
-    def __init__(self, install_watcher=True):
+    def __init__(self, install_watcher=True, poller_class=None):
         if install_watcher:
             self._watcher = ThreadWatcher.watch(
                 target=mitogen.core.threading__current_thread(),
                 on_join=self.shutdown,
             )
-        super(Broker, self).__init__()
+        super(Broker, self).__init__(poller_class=poller_class)
         self.timers = mitogen.parent.TimerList()
 
     def shutdown(self):
@@ -1381,14 +1794,16 @@ class Router(mitogen.parent.Router):
         Broker to use. If not specified, a private :class:`Broker` is created.
 
     :param int max_message_size:
-        Override the maximum message size this router is willing to receive or
-        transmit. Any value set here is automatically inherited by any children
-        created by the router.
+        Override the maximum frame size this router is willing to receive. Any
+        value set here is automatically inherited by any children created by
+        the router. Larger messages are split into fragments, and limited by
+        :attr:`mitogen.core.Router.max_reassembly_size` instead, or by this
+        value if it is larger.
 
         This has a liberal default of 128 MiB, but may be set much lower.
-        Beware that setting it below 64KiB may encourage unexpected failures as
-        parents and children can no longer route large Python modules that may
-        be required by your application.
+        Beware that setting it below
+        :attr:`mitogen.core.MitogenProtocol.fragment_size` makes every
+        fragmented message fail.
     """
 
     broker_class = Broker
@@ -1449,7 +1864,8 @@ class Router(mitogen.parent.Router):
 
     def get_stats(self):
         """
-        Return performance data for the module responder.
+        Return performance data for the module responder, in addition to the
+        stream flow control statistics of :meth:`mitogen.core.Router.get_stats`.
 
         :returns:
 
@@ -1467,15 +1883,36 @@ class Router(mitogen.parent.Router):
               :data:`mitogen.core.LOAD_MODULE` messages sent.
             * `minify_secs`: CPU seconds spent minifying modules marked
                minify-safe.
+            * `module_cache_hits`: Integer count of entries found in the
+              on-disk :class:`ModuleCache`, if enabled.
+            * `module_cache_misses`: Integer count of entries not found in the
+              on-disk :class:`ModuleCache`, if enabled.
+            * `precompress_wait_count`: Integer count of
+              :data:`mitogen.core.GET_MODULE` requests answered only once
+              their payloads were built by the precompress threads.
+            * `cached_load_module_count`: Integer count of
+              :data:`mitogen.core.LOAD_MODULE` messages sent without payload,
+              as held by the remote's on-disk module cache.
+            * `cached_load_module_size`: Integer total payload bytes not sent
+              as held by remote module caches.
         """
-        return {
+        disk_cache = self.responder.disk_cache
+        dct = super(Router, self).get_stats()
+        dct.update({
             'get_module_count': self.responder.get_module_count,
             'get_module_secs': self.responder.get_module_secs,
             'good_load_module_count': self.responder.good_load_module_count,
             'good_load_module_size': self.responder.good_load_module_size,
             'bad_load_module_count': self.responder.bad_load_module_count,
             'minify_secs': self.responder.minify_secs,
-        }
+            'module_cache_hits': disk_cache.hits if disk_cache else 0,
+            'module_cache_misses': disk_cache.misses if disk_cache else 0,
+            'precompress_wait_count': self.responder.precompress_wait_count,
+            'cached_load_module_count':
+                self.responder.cached_load_module_count,
+            'cached_load_module_size': self.responder.cached_load_module_size,
+        })
+        return dct
 
     def enable_debug(self):
         """
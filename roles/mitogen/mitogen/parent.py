@@ -1094,6 +1094,125 @@ class EpollPoller(mitogen.core.Poller):
                     yield data
 
 
+def _epoll_ctl(func, fd, *args):
+    """
+    Call an :class:`select.epoll` registration method, ignoring errors caused
+    by the kernel having already forgotten or still remembering `fd`, which
+    occur once registration is deferred past the descriptor's close.
+    """
+    try:
+        func(fd, *args)
+    except (IOError, OSError):
+        e = sys.exc_info()[1]
+        if e.args[0] not in (errno.EBADF, errno.ENOENT, errno.EEXIST):
+            raise
+
+
+class EdgeEpollPoller(EpollPoller):
+    """
+    Variant of :class:`EpollPoller` that avoids :linux:man2:`epoll_ctl` calls
+    as streams toggle transmit interest. Select it using
+    ``Broker(poller_class=EdgeEpollPoller)``.
+
+    Receive interest remains level-triggered, but changes to it are batched
+    and applied once per :meth:`poll`, so a descriptor stopped and restarted
+    during one loop iteration costs nothing.
+
+    Transmit interest is registered edge-triggered with a second epoll
+    instance nested inside the first, allowing a socket to appear in both. A
+    descriptor is added on its first :meth:`start_transmit` and then left
+    registered, making later :meth:`stop_transmit` and :meth:`start_transmit`
+    calls free. This requires writers to only request transmit after a short
+    or failed write, and to keep writing until the OS buffer fills, as
+    :class:`mitogen.core.BufferedWriter` does.
+    """
+    _wmask = EpollPoller.SUPPORTED and select.EPOLLOUT | select.EPOLLET
+
+    def __init__(self):
+        super(EdgeEpollPoller, self).__init__()
+        self._wepoll = select.epoll(32)
+        self._epoll.register(self._wepoll.fileno(), select.EPOLLIN)
+        # fd -> data registered with _epoll, for descriptors whose receive
+        # interest changed since the last poll().
+        self._rregistered = {}
+        self._dirty = set()
+        # fd -> data registered with _wepoll.
+        self._wregistered = {}
+
+    def close(self):
+        super(EdgeEpollPoller, self).close()
+        self._wepoll.close()
+
+    def _control(self, fd):
+        self._dirty.add(fd)
+
+    def _flush(self):
+        """
+        Apply receive interest changes accumulated since the last poll. `data`
+        is compared as well as presence, since a descriptor closed and reused
+        by another stream between polls must be registered afresh.
+        """
+        for fd in self._dirty:
+            data = self._rfds.get(fd, (None, None))[0]
+            old = self._rregistered.get(fd)
+            if old is not None and old != data:
+                del self._rregistered[fd]
+                _epoll_ctl(self._epoll.unregister, fd)
+            if data is not None and fd not in self._rregistered:
+                _epoll_ctl(self._epoll.register, fd, select.EPOLLIN)
+                self._rregistered[fd] = data
+        self._dirty.clear()
+
+    def start_transmit(self, fd, data=None):
+        mitogen.core._vv and IOLOG.debug('%r.start_transmit(%r, %r)',
+            self, fd, data)
+        data = data or fd
+        self._wfds[fd] = (data, self._generation)
+        old = self._wregistered.get(fd)
+        if old != data:
+            if old is not None:
+                _epoll_ctl(self._wepoll.unregister, fd)
+            _epoll_ctl(self._wepoll.register, fd, self._wmask)
+            self._wregistered[fd] = data
+
+    def stop_transmit(self, fd):
+        mitogen.core._vv and IOLOG.debug('%r.stop_transmit(%r)', self, fd)
+        self._wfds.pop(fd, None)
+
+    def _poll_transmit(self):
+        # Edges are only delivered once, so unlike receive events, these are
+        # not filtered by generation: a writer registered during this poll()
+        # may already be owed the event. Spurious events are harmless.
+        events, _ = mitogen.core.io_op(self._wepoll.poll, 0,
+                                       len(self._wfds) + 1)
+        for fd, event in events:
+            data, gen = self._wfds.get(fd, (None, None))
+            if gen:
+                mitogen.core._vv and IOLOG.debug('%r: POLLOUT: %r', self, fd)
+                yield data
+
+    def _poll(self, timeout):
+        if self._dirty:
+            self._flush()
+
+        the_timeout = -1
+        if timeout is not None:
+            the_timeout = timeout
+
+        wfd = self._wepoll.fileno()
+        events, _ = mitogen.core.io_op(self._epoll.poll, the_timeout,
+                                       len(self._rregistered) + 1)
+        for fd, event in events:
+            if fd == wfd:
+                for data in self._poll_transmit():
+                    yield data
+            elif event & self._inmask:
+                data, gen = self._rfds.get(fd, (None, None))
+                if gen and gen < self._generation:
+                    mitogen.core._vv and IOLOG.debug('%r: POLLIN: %r', self, fd)
+                    yield data
+
+
 POLLERS = (EpollPoller, KqueuePoller, PollPoller, mitogen.core.Poller)
 PREFERRED_POLLER = next(cls for cls in POLLERS if cls.SUPPORTED)
 
@@ -1214,6 +1333,20 @@ class BootstrapProtocol(RegexProtocol):
 
     def _on_ec2_received(self, line, match):
         LOG.debug('%r: new child booted successfully', self)
+        # Children announce the pickle protocol they accept, then any
+        # compression they enabled, after the marker.
+        fields = line[match.end():].split()
+        if fields and fields[0].isdigit():
+            mitogen.core._pickle_protocol_by_id[
+                self.stream.conn.context.context_id
+            ] = int(fields[0])
+        if len(fields) > 1:
+            conn = self.stream.conn
+            conn.compression_name = fields[1].decode()
+            if conn.compression_name != conn.options.stream_compression:
+                LOG.warning('%r: %s compression unavailable in child, using '
+                            '%s instead', self, conn.options.stream_compression,
+                            conn.compression_name)
         self.stream.conn._complete_connection()
         return False
 
@@ -1296,9 +1429,17 @@ class Options(object):
     #: UNIX timestamp after which the connection attempt should be abandoned.
     connect_deadline = None
 
+    #: If not :data:`None`, name of a :class:`mitogen.core.Compression`
+    #: method used for messages on the stream to the child.
+    stream_compression = None
+
+    #: If not :data:`None`, minimum payload size to compress.
+    stream_compression_threshold = None
+
     def __init__(self, max_message_size, name=None, remote_name=None,
                  python_path=None, debug=False, connect_timeout=None,
-                 profiling=False, unidirectional=False, old_router=None):
+                 profiling=False, unidirectional=False, old_router=None,
+                 stream_compression=None, stream_compression_threshold=None):
         self.name = name
         self.max_message_size = max_message_size
         if python_path:
@@ -1315,6 +1456,17 @@ class Options(object):
         self.profiling = profiling
         self.unidirectional = unidirectional
         self.max_message_size = max_message_size
+        if stream_compression:
+            # Fail early if the method is unknown or unavailable here.
+            try:
+                klass = mitogen.core.COMPRESSION_BY_NAME[stream_compression]
+            except KeyError:
+                raise ValueError('unknown stream_compression %r' % (
+                    stream_compression,
+                ))
+            klass()
+            self.stream_compression = stream_compression
+        self.stream_compression_threshold = stream_compression_threshold
         self.connect_deadline = mitogen.core.now() + self.connect_timeout
 
 
@@ -1366,6 +1518,10 @@ class Connection(object):
     #: Prefix given to default names generated by :meth:`connect`.
     name_prefix = u'local'
 
+    #: Name of the :class:`mitogen.core.Compression` method the child
+    #: announced it enabled during bootstrap, if any.
+    compression_name = None
+
     #: :class:`Timer` that runs :meth:`_on_timer_expired` when connection
     #: timeout occurs.
     _timer = None
@@ -1501,8 +1657,24 @@ class Connection(object):
             'blacklist': self._router.get_module_blacklist(),
             'max_message_size': self.options.max_message_size,
             'version': mitogen.__version__,
+            'pickle_protocols': self._get_pickle_protocols(parent_ids),
+            'compression': self.options.stream_compression,
+            'compression_threshold': self.options.stream_compression_threshold,
         }
 
+    def _get_pickle_protocols(self, parent_ids):
+        """
+        Return the pickle protocols known to be accepted by our parents and
+        ourself, allowing the child to reply using protocol 5 where possible.
+        """
+        protocols = dict(
+            (context_id, mitogen.core._pickle_protocol_by_id[context_id])
+            for context_id in parent_ids
+            if context_id in mitogen.core._pickle_protocol_by_id
+        )
+        protocols[mitogen.context_id] = mitogen.core.PICKLE_PROTOCOL
+        return protocols
+
     def get_preamble(self):
         suffix = (
             '\nExternalContext(%r).main()\n' %
@@ -1543,12 +1715,15 @@ class Connection(object):
             mitogen.core.unlisten(self._router.broker, 'shutdown',
                                   self._on_broker_shutdown)
             self._router.register(self.context, self.stdio_stream)
-            self.stdio_stream.set_protocol(
-                MitogenProtocol(
-                    router=self._router,
-                    remote_id=self.context.context_id,
-                )
+            protocol = MitogenProtocol(
+                router=self._router,
+                remote_id=self.context.context_id,
             )
+            if self.compression_name:
+                protocol.compression = mitogen.core.COMPRESSION_BY_NAME[
+                    self.compression_name
+                ](self.options.stream_compression_threshold)
+            self.stdio_stream.set_protocol(protocol)
             self._router.route_monitor.notice_stream(self.stdio_stream)
         self.latch.put()
 
@@ -1892,6 +2067,7 @@ class CallChain(object):
             mitogen.core.Kwargs(kwargs)
         )
         return mitogen.core.Message.pickled(tup,
+            dst_id=self.context.context_id,
             handle=mitogen.core.CALL_FUNCTION)
 
     def call_no_reply(self, fn, *args, **kwargs):
@@ -2132,8 +2308,14 @@ class RouteMonitor(object):
             return
 
         data = str(target_id)
-        if name:
-            data = '%s:%s' % (target_id, name)
+        if handle == mitogen.core.ADD_ROUTE:
+            # Also carry the pickle protocol announced by the target, so
+            # contexts beyond its parent may use protocol 5 towards it.
+            data = '%s:%d:%s' % (
+                target_id,
+                mitogen.core._pickle_protocol_by_id.get(target_id, 2),
+                name or '',
+            )
         stream.protocol.send(
             mitogen.core.Message(
                 handle=handle,
@@ -2233,7 +2415,8 @@ class RouteMonitor(object):
         if msg.is_dead:
             return
 
-        target_id_s, _, target_name = bytes_partition(msg.data, b(':'))
+        target_id_s, _, rest = bytes_partition(msg.data, b(':'))
+        protocol_s, _, target_name = bytes_partition(rest, b(':'))
         target_name = target_name.decode()
         target_id = int(target_id_s)
         self.router.context_by_id(target_id).name = target_name
@@ -2246,6 +2429,7 @@ class RouteMonitor(object):
             return
 
         self._log.debug('Adding route to %d via %r', target_id, stream)
+        mitogen.core._pickle_protocol_by_id[target_id] = int(protocol_s)
         self._routes_by_stream[stream].add(target_id)
         self.router.add_route(target_id, stream)
         self._propagate_up(mitogen.core.ADD_ROUTE, target_id, target_name)
@@ -0,0 +1,98 @@
+"""
+Measure Latch wakeup cost: a put/get ping-pong round trip between two
+threads, and put/get pairs per second through pools of 1 to 64 worker
+threads, along with the number of file descriptors they hold.
+
+Usage: python latch_throughput.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..'))
+
+import mitogen.core
+
+Latch = mitogen.core.Latch
+
+
+def pingpong(n):
+    """
+    Return the average round trip, in microseconds, of `n` messages
+    bounced by a peer thread.
+    """
+    ping, pong = Latch(), Latch()
+
+    def peer():
+        for _ in range(n):
+            pong.put(ping.get())
+
+    thread = threading.Thread(target=peer)
+    thread.start()
+    t0 = time.perf_counter()
+    for i in range(n):
+        ping.put(i)
+        pong.get()
+    secs = time.perf_counter() - t0
+    thread.join()
+    return secs / n * 1e6
+
+
+def pool(nthreads, n):
+    """
+    Return the rate of `n` requests served by `nthreads` workers sleeping in
+    Latch.get(), keeping one request in flight per worker.
+    """
+    requests, responses = Latch(), Latch()
+
+    def worker():
+        while True:
+            item = requests.get()
+            if item is None:
+                return
+            responses.put(item)
+
+    threads = [threading.Thread(target=worker) for _ in range(nthreads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+
+    t0 = time.perf_counter()
+    sent = min(nthreads, n)
+    for i in range(sent):
+        requests.put(i)
+    for _ in range(n):
+        responses.get()
+        if sent < n:
+            requests.put(sent)
+            sent += 1
+    secs = time.perf_counter() - t0
+
+    for thread in threads:
+        requests.put(None)
+    for thread in threads:
+        thread.join()
+    return n / secs
+
+
+def fd_count():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def main():
+    print('wakeup: %s' % ('eventfd' if getattr(Latch, 'use_eventfd', False)
+                          else 'socketpair'))
+    print('ping-pong round trip: %.1f us' % min(pingpong(20000)
+                                               for _ in range(3)))
+    for nthreads in (1, 4, 16, 64):
+        before = fd_count()
+        rate = max(pool(nthreads, 50000) for _ in range(2))
+        print('pool %2d threads: %8.0f put/get pairs/s, +%d fds' % (
+            nthreads, rate, fd_count() - before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Measure per-message overhead: Message construction, packing, pickling, the
+receive path framing a 16 bytes payload, and the memory footprint of a
+Message.
+
+Usage: python message_overhead.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..'))
+
+import mitogen.core
+
+from receive_throughput import receive
+
+Message = mitogen.core.Message
+N = 200000
+
+
+def construct():
+    Message(dst_id=1, handle=101, reply_to=1000, data=b'abc')
+
+
+def pack(msg=Message(dst_id=1, handle=101, reply_to=1000, data=b'abc')):
+    msg.pack()
+
+
+def pickled():
+    Message.pickled(None, dst_id=1, handle=101)
+
+
+def main():
+    for name, func in [('construct', construct), ('pack', pack),
+                       ('pickled', pickled)]:
+        secs = min(timeit.repeat(func, number=N, repeat=5))
+        print('%-10s %6.0f ns/msg' % (name, secs / N * 1e9))
+
+    n, secs = min((receive(16, 16 * N) for _ in range(5)), key=lambda r: r[1])
+    print('%-10s %6.0f ns/msg (16 B payload)' % ('receive', secs / n * 1e9))
+
+    tracemalloc.start()
+    msgs = [Message(dst_id=1, handle=101, data=b'') for _ in range(10000)]
+    print('%-10s %6.0f B/msg' % (
+        'size', tracemalloc.get_traced_memory()[0] / float(len(msgs))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Count poller and I/O syscalls per message for EpollPoller and
+EdgeEpollPoller, with 1000 socketpair streams each keeping 3 messages of
+6000 bytes in flight through small socket buffers, so most writes are short
+and write interest is toggled constantly.
+
+Usage: python poller_syscalls.py
+"""
+
+import os
+import select
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..'))
+
+import mitogen.core
+import mitogen.parent
+
+STREAMS = 1000
+ROUNDS = 200
+WINDOW = 3
+MSG = b'x' * 6000
+
+counts = dict(ctl=0, wait=0, read=0, write=0)
+
+
+class CountingEpoll(object):
+    def __init__(self, *args):
+        self._epoll = real_epoll(*args)
+
+    def fileno(self):
+        return self._epoll.fileno()
+
+    def close(self):
+        self._epoll.close()
+
+    def register(self, *args):
+        counts['ctl'] += 1
+        return self._epoll.register(*args)
+
+    def modify(self, *args):
+        counts['ctl'] += 1
+        return self._epoll.modify(*args)
+
+    def unregister(self, *args):
+        counts['ctl'] += 1
+        return self._epoll.unregister(*args)
+
+    def poll(self, *args):
+        counts['wait'] += 1
+        return self._epoll.poll(*args)
+
+
+def counting(key, func):
+    def wrapper(self, *args):
+        counts[key] += 1
+        return func(self, *args)
+    return wrapper
+
+
+def install_counters():
+    global real_epoll
+    real_epoll = select.epoll
+    select.epoll = CountingEpoll
+    for key, names in [('read', ('read', 'readinto')),
+                       ('write', ('write', 'writev'))]:
+        for name in names:
+            if hasattr(mitogen.core.Side, name):
+                setattr(mitogen.core.Side, name,
+                        counting(key, getattr(mitogen.core.Side, name)))
+
+
+class Sink(mitogen.core.Protocol):
+    """
+    Count received bytes, asking its source for one more message each time a
+    whole one arrived.
+    """
+    source = None
+    pending = 0
+
+    def on_receive(self, broker, buf):
+        self.pending += len(buf)
+        while self.pending >= len(MSG):
+            self.pending -= len(MSG)
+            self.source.refill()
+        run.received += len(buf)
+        if run.received == run.total:
+            run.done.put(None)
+
+
+class Source(mitogen.core.Protocol):
+    def __init__(self, broker):
+        self._writer = mitogen.core.BufferedWriter(broker, self)
+        self.budget = ROUNDS
+
+    def refill(self):
+        if self.budget:
+            self.budget -= 1
+            self._writer.write(MSG)
+
+    def on_receive(self, broker, buf):
+        pass
+
+    def on_transmit(self, broker):
+        self._writer.on_transmit(broker)
+
+
+def sync(broker, func=lambda: None):
+    latch = mitogen.core.Latch()
+    broker.defer(lambda: (func(), latch.put(None)))
+    latch.get()
+
+
+def run(poller_class):
+    broker = mitogen.core.Broker(poller_class=poller_class)
+    run.received = 0
+    run.total = STREAMS * ROUNDS * len(MSG)
+    run.done = mitogen.core.Latch()
+    sources = []
+
+    def setup():
+        for _ in range(STREAMS):
+            a, z = socket.socketpair()
+            a.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 8192)
+            z.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8192)
+            a.setblocking(False)
+            z.setblocking(False)
+            source = Source.build_stream(broker)
+            source.accept(a, a)
+            broker.start_receive(source)
+            sink = Sink.build_stream()
+            sink.accept(z, z)
+            broker.start_receive(sink)
+            sink.protocol.source = source.protocol
+            sources.append(source)
+
+    def start():
+        for source in sources:
+            for _ in range(WINDOW):
+                source.protocol.refill()
+
+    sync(broker, setup)
+    # Let batched registrations settle before counting.
+    sync(broker)
+    sync(broker)
+    for key in counts:
+        counts[key] = 0
+
+    t0 = time.perf_counter()
+    broker.defer(start)
+    run.done.get()
+    secs = time.perf_counter() - t0
+    msgs = float(STREAMS * ROUNDS)
+    print('%-16s %6.0f ms  epoll_ctl/msg %.3f  epoll_wait/msg %.4f  '
+          'write/msg %.3f  read/msg %.3f  total/msg %.3f' % (
+              poller_class.__name__, secs * 1000,
+              counts['ctl'] / msgs, counts['wait'] / msgs,
+              counts['write'] / msgs, counts['read'] / msgs,
+              sum(counts.values()) / msgs))
+    broker.shutdown()
+    broker.join()
+
+
+def main():
+    install_counters()
+    for _ in range(2):
+        for poller_class in (mitogen.parent.EpollPoller,
+                             mitogen.parent.EdgeEpollPoller):
+            run(poller_class)
+
+
+if __name__ == '__main__':
+    main()
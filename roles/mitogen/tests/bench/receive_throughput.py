@@ -0,0 +1,89 @@
+"""
+Measure MitogenProtocol receive path throughput for 1 KiB, 64 KiB and 16 MiB
+messages, by feeding packed frames through Stream.on_receive() from an
+in-memory side reading at most 256 KiB per call, like a pipe would.
+
+Usage: python receive_throughput.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', '..'))
+
+import mitogen.core
+
+
+class Broker(object):
+    def defer(self, func, *args, **kwargs):
+        pass
+
+
+class Router(object):
+    max_message_size = 128 * 1048576
+
+    def __init__(self):
+        self.broker = Broker()
+        self.count = 0
+
+    def _async_route(self, msg, in_stream=None):
+        self.count += 1
+
+
+class MemorySide(object):
+    """
+    Stand-in for :class:`mitogen.core.Side` returning `data` at most `chunk`
+    bytes at a time, copying as os.read() and os.readv() would.
+    """
+    closed = False
+
+    def __init__(self, data, chunk):
+        self.data = data
+        self.view = memoryview(data)
+        self.pos = 0
+        self.chunk = chunk
+
+    def read(self, n):
+        n = min(n, self.chunk)
+        s = self.data[self.pos:self.pos + n]
+        self.pos += len(s)
+        return s
+
+    def readinto(self, buf):
+        n = min(len(buf), self.chunk, len(self.data) - self.pos)
+        buf[:n] = self.view[self.pos:self.pos + n]
+        self.pos += n
+        return n
+
+
+def receive(size, total, chunk=262144):
+    """
+    Return the number of `size` bytes messages received out of `total`
+    bytes, and the time it took.
+    """
+    n = max(1, total // size)
+    frame = mitogen.core.Message(data=b'x' * size, handle=100, dst_id=0,
+                                 src_id=1, auth_id=0, reply_to=0).pack()
+    router = Router()
+    stream = mitogen.core.Stream()
+    stream.set_protocol(mitogen.core.MitogenProtocol(router, 1))
+    stream.receive_side = MemorySide(frame * n, chunk)
+    t0 = time.perf_counter()
+    while router.count < n:
+        stream.on_receive(None)
+    return n, time.perf_counter() - t0
+
+
+def main():
+    for size, total in [(1024, 64 << 20), (65536, 512 << 20),
+                        (16 << 20, 512 << 20)]:
+        n, secs = min((receive(size, total) for _ in range(5)),
+                      key=lambda r: r[1])
+        print('%8d B x %6d: %.3fs %7.0f MiB/s %8.2f us/msg' % (
+            size, n, secs, n * size / secs / 1048576, secs / n * 1e6))
+
+
+if __name__ == '__main__':
+    main()
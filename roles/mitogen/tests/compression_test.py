@@ -0,0 +1,51 @@
+import os
+
+import testlib
+
+import mitogen.core
+
+
+def echo(obj):
+    return obj
+
+
+class StreamCompressionTest(testlib.RouterTestCase):
+    payloads = [b'', b'x' * 100, b'mitogen ' * 65536, os.urandom(1 << 20)]
+
+    def _test_method(self, name):
+        context = self.router.local(stream_compression=name,
+                                    stream_compression_threshold=256)
+        via = self.router.local(via=context, stream_compression=name)
+        for ctx in context, via:
+            for data in self.payloads:
+                self.assertEqual(ctx.call(echo, mitogen.core.Blob(data)), data)
+
+        compression = self.router.stream_by_id(context.context_id).protocol.compression
+        self.assertEqual(compression.name, name)
+        stats = compression.get_stats()
+        self.assertTrue(stats['compress_count'] > 0)
+        self.assertTrue(stats['decompress_count'] > 0)
+        self.assertTrue(stats['compress_ratio'] < 1)
+
+    def test_zlib(self):
+        self._test_method('zlib')
+
+    def test_lzma(self):
+        try:
+            import lzma
+        except ImportError:
+            self.skipTest('lzma is unavailable')
+        self._test_method('lzma')
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, self.router.local,
+                          stream_compression='zstd')
+
+    def test_disabled(self):
+        context = self.router.local()
+        self.assertEqual(context.call(echo, b'x' * 1000), b'x' * 1000)
+        self.assertEqual(self.router.stream_by_id(context.context_id).protocol.compression, None)
+
+
+if __name__ == '__main__':
+    testlib.unittest.main()
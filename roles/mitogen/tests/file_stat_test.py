@@ -0,0 +1,86 @@
+import testlib
+
+try:
+    import ansible_mitogen.mixins
+    import ansible_mitogen.services
+except ImportError:
+    ansible_mitogen = None
+
+
+SCOPE = u'block-uuid'
+
+
+def exists(checksum):
+    return {'exists': True, 'isdir': False, 'checksum': checksum}
+
+
+class ServiceConnection(object):
+    """
+    Stand-in for :class:`ansible_mitogen.connection.Connection` calling a
+    local :class:`ansible_mitogen.services.FileStatService` directly.
+    """
+    def __init__(self, service, context):
+        self.service = service
+        self.context = context
+
+    def forget_prefetched_stats(self, paths=()):
+        self.service.forget(self.context, list(paths))
+
+
+class Action(object):
+    """
+    Enough of an action plugin to run
+    :meth:`ansible_mitogen.mixins.ActionModuleMixin._forget_prefetched_stats`.
+    """
+    def __init__(self, connection):
+        self._connection = connection
+        self.STAT_PATH_ARGS_BY_MODULE = (
+            ansible_mitogen.mixins.ActionModuleMixin.STAT_PATH_ARGS_BY_MODULE
+        )
+
+    def run_module(self, name, args):
+        ansible_mitogen.mixins.ActionModuleMixin._forget_prefetched_stats(
+            self, name, args,
+        )
+
+
+@testlib.unittest.skipIf(ansible_mitogen is None, 'ansible is unavailable')
+class FileStatServiceTest(testlib.RouterTestCase):
+    def setUp(self):
+        super(FileStatServiceTest, self).setUp()
+        self.context = self.router.local()
+        self.service = ansible_mitogen.services.FileStatService(self.router)
+        self.action = Action(ServiceConnection(self.service, self.context))
+
+    def _put(self, stats):
+        self.service.put(self.context, SCOPE, False, stats)
+
+    def _get(self, path):
+        return self.service.get(self.context, SCOPE, path, False)
+
+    def test_delete_directory_then_template(self):
+        # template: dest=/dir/x prefetched stats of later tasks.
+        self._put({u'/dir/x': exists('a'), u'/dir/sub/y': exists('b'),
+                   u'/dirx': exists('c')})
+        # file: path=/dir state=absent
+        self.action.run_module('ansible.builtin.file',
+                               {'path': u'/dir', 'state': 'absent'})
+        # template: dest=/dir/x must stat the target again.
+        self.assertEqual(None, self._get(u'/dir/x'))
+        self.assertEqual(None, self._get(u'/dir/sub/y'))
+        self.assertEqual(exists('c'), self._get(u'/dirx'))
+
+    def test_recursive_copy_into_directory(self):
+        self._put({u'/dir': exists('a'), u'/dir/x': exists('b')})
+        self.action.run_module('copy', {'src': 'files/', 'dest': u'/dir/'})
+        self.assertEqual(None, self._get(u'/dir'))
+        self.assertEqual(None, self._get(u'/dir/x'))
+
+    def test_other_module_forgets_everything(self):
+        self._put({u'/etc/x': exists('a')})
+        self.action.run_module('command', {'_raw_params': 'true'})
+        self.assertEqual(None, self._get(u'/etc/x'))
+
+
+if __name__ == '__main__':
+    testlib.unittest.main()
@@ -0,0 +1,103 @@
+import os
+
+import testlib
+
+import mitogen.core
+
+from mitogen.core import FRAGMENT, Message
+
+
+def echo(data):
+    return data
+
+
+def blob(size):
+    return mitogen.core.Blob(b'x' * size)
+
+
+@mitogen.core.takes_router
+def send_fragments(handle, frag_id, total, sizes, router):
+    """
+    Send raw :data:`FRAGMENT` messages to the parent for `handle`, announcing
+    `total` bytes, one per entry of `sizes`.
+    """
+    offset = 0
+    for size in sizes:
+        header = Message.FRAGMENT_STRUCT.pack(handle, frag_id, total, offset)
+        router.route(Message(dst_id=mitogen.parent_id, handle=FRAGMENT,
+                             data=header + b'x' * size))
+        offset += size
+
+
+class FragmentTest(testlib.RouterTestCase):
+    def _states(self, context):
+        return [state for key, state in self.router._fragments.items()
+                if key[0] == context.context_id]
+
+    def test_round_trip_via_hop(self):
+        hop = self.router.local()
+        context = self.router.local(via=hop)
+        data = os.urandom(8 << 20)
+        self.assertEqual(context.call(echo, mitogen.core.Blob(data)), data)
+        self.assertEqual({}, self.router._fragments)
+
+    def test_larger_than_max_message_size(self):
+        self.router.max_message_size = 8 << 20
+        hop = self.router.local()
+        context = self.router.local(via=hop)
+        data = os.urandom(20 << 20)
+        self.assertEqual(context.call(echo, mitogen.core.Blob(data)), data)
+
+    def test_larger_than_max_reassembly_size(self):
+        self.router.max_message_size = 2 << 20
+        self.router.max_reassembly_size = 2 << 20
+        context = self.router.local()
+        # Refused by the sender.
+        self.assertRaises(mitogen.core.ChannelError, context.call, echo,
+                          mitogen.core.Blob(b'x' * (4 << 20)))
+        # Refused by the receiver, the child having a larger limit.
+        self.assertRaises(mitogen.core.ChannelError, context.call, blob,
+                          4 << 20)
+        self.assertEqual(context.call(blob, 1 << 20), b'x' * (1 << 20))
+
+    def test_unknown_handle_not_buffered(self):
+        context = self.router.local()
+        context.call(send_fragments, 9999, 1, 100 * 1048576, [65536])
+        self.assertEqual([buf for buf, _, _, _ in self._states(context)],
+                         [None])
+        self.assertEqual(0, self.router._reassembly_bytes)
+
+    def test_refused_by_policy_not_buffered(self):
+        context = self.router.local()
+        handle = self.router.add_handler(lambda msg: None,
+                                         policy=lambda msg, stream: False)
+        context.call(send_fragments, handle, 1, 100 * 1048576, [65536])
+        self.assertEqual([buf for buf, _, _, _ in self._states(context)],
+                         [None])
+        self.assertEqual(0, self.router._reassembly_bytes)
+
+    def test_buffer_grows_with_fragments(self):
+        self.router.max_reassembly_size = 150 * 1048576
+        context = self.router.local()
+        recv = mitogen.core.Receiver(self.router)
+        context.call(send_fragments, recv.handle, 1, 100 * 1048576,
+                     [65536, 65536])
+        [(buf, received, _, charged)] = self._states(context)
+        self.assertEqual(131072, len(buf))
+        self.assertEqual(131072, received)
+        self.assertEqual(100 * 1048576, charged)
+        self.assertEqual(100 * 1048576, self.router._reassembly_bytes)
+
+        # A second message would exceed the stream's budget.
+        context.call(send_fragments, recv.handle, 2, 100 * 1048576, [65536])
+        self.assertRaises(mitogen.core.ChannelError, recv.get, timeout=5.0)
+        self.assertEqual(100 * 1048576, self.router._reassembly_bytes)
+
+        context.shutdown(wait=True)
+        self.assertEqual({}, self.router._fragments)
+        self.assertEqual(0, self.router._reassembly_bytes)
+        self.assertEqual({}, self.router._reassembly_by_stream)
+
+
+if __name__ == '__main__':
+    testlib.unittest.main()
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import time
+
+import testlib
+
+import mitogen.core
+
+
+@mitogen.core.takes_econtext
+def use_module_cache(path, max_size, econtext):
+    importer = econtext.importer
+    importer.module_cache_max_size = max_size
+    importer.use_module_cache(path)
+    return sorted(importer._module_cache_digests)
+
+
+class ModuleCachePruneTest(testlib.RouterTestCase):
+    def setUp(self):
+        super(ModuleCachePruneTest, self).setUp()
+        self.path = tempfile.mkdtemp()
+        os.chmod(self.path, int('0700', 8))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        super(ModuleCachePruneTest, self).tearDown()
+
+    def _create(self, name, size, age):
+        path = os.path.join(self.path, name)
+        fp = open(path, 'wb')
+        try:
+            fp.write(b'x' * size)
+        finally:
+            fp.close()
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+    def test_prune(self):
+        oldest, older, newest = [c * 40 for c in 'abc']
+        self._create(oldest, 100, 300)
+        self._create(older, 100, 200)
+        self._create(newest, 100, 100)
+        self._create(newest + '.1.tmp', 10, 7200)
+        self._create(older + '.2.tmp', 10, 0)
+        self._create('README', 1000, 7200)
+
+        context = self.router.local()
+        digests = context.call(use_module_cache, self.path, 250)
+        self.assertEqual(digests, [older, newest])
+        self.assertEqual(sorted(os.listdir(self.path)),
+                         ['README', older, older + '.2.tmp', newest])
+
+
+if __name__ == '__main__':
+    testlib.unittest.main()
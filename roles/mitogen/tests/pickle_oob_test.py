@@ -0,0 +1,55 @@
+import os
+
+import testlib
+
+import mitogen.core
+
+
+def echo(obj):
+    return obj
+
+
+def make_blob(size):
+    return mitogen.core.Blob(b'\xff' * size)
+
+
+class OutOfBandPickleTest(testlib.RouterTestCase):
+    def test_blob_framed_out_of_band(self):
+        if mitogen.core.PICKLE_PROTOCOL < 5:
+            self.skipTest('pickle protocol 5 is unavailable')
+        context = self.router.local()
+        self.assertTrue(mitogen.core._pickle_protocol_by_id[context.context_id] >= 5)
+        blob = mitogen.core.Blob(b'x' * 100)
+        msg = mitogen.core.Message.pickled(blob, dst_id=context.context_id)
+        self.assertEqual(msg.data[:4], mitogen.core.Message.OOB_MAGIC)
+        self.assertEqual(msg.unpickle(), blob)
+
+    def test_blob_framed_in_band_for_unknown_peer(self):
+        msg = mitogen.core.Message.pickled(mitogen.core.Blob(b'x' * 100),
+                                           dst_id=9999)
+        self.assertNotEqual(msg.data[:4], mitogen.core.Message.OOB_MAGIC)
+
+    def test_same_types_for_both_protocols(self):
+        context = self.router.local()
+        obj = [set([1, 2]), frozenset([u'x']), bytearray(b'\x00\xff')]
+        for dst_id in context.context_id, 9999:
+            msg = mitogen.core.Message.pickled(obj, dst_id=dst_id)
+            self.assertEqual(msg.unpickle(), obj)
+        self.assertEqual(context.call(echo, obj), obj)
+
+    def test_round_trip(self):
+        context = self.router.local()
+        via = self.router.local(via=context)
+        for ctx in context, via:
+            for size in 0, 10, 1 << 20:
+                blob = mitogen.core.Blob(os.urandom(size))
+                result = ctx.call(echo, blob)
+                self.assertEqual(result, blob)
+                self.assertIsInstance(result, mitogen.core.Blob)
+                self.assertEqual(ctx.call(make_blob, size), b'\xff' * size)
+            obj = {'a': [1, 2.0, u'x', b'y', None, (True,)]}
+            self.assertEqual(ctx.call(echo, obj), obj)
+
+
+if __name__ == '__main__':
+    testlib.unittest.main()
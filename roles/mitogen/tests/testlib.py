@@ -0,0 +1,40 @@
+"""
+Helpers shared by the vendored Mitogen smoke tests.
+
+Run them from roles/mitogen with:
+
+    python -m unittest discover -s tests -p '*_test.py'
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+
+import mitogen.core
+import mitogen.master
+
+
+class RouterMixin(object):
+    """
+    Start a master :class:`mitogen.master.Router` for each test, shutting it
+    down afterwards.
+    """
+    def setUp(self):
+        super(RouterMixin, self).setUp()
+        self.router = mitogen.master.Router()
+
+    def tearDown(self):
+        self.router.broker.shutdown()
+        self.router.broker.join()
+        super(RouterMixin, self).tearDown()
+
+
+class TestCase(unittest.TestCase):
+    pass
+
+
+class RouterTestCase(RouterMixin, TestCase):
+    pass
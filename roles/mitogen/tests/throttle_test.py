@@ -0,0 +1,161 @@
+import logging
+import os
+import signal
+import threading
+import time
+
+import testlib
+
+import mitogen.core
+
+LOG = logging.getLogger('throttle_test.flood')
+
+
+def discard(blob):
+    pass
+
+
+received = []
+
+
+def record(blob):
+    received.append(len(blob))
+
+
+def received_count():
+    return len(received)
+
+
+def ping():
+    return 'pong'
+
+
+@mitogen.core.takes_router
+def stream_stats(context_id, router):
+    return router.get_stats()['streams'][context_id]
+
+
+@mitogen.core.takes_router
+def flood_log(delay, count, size, broker_delay, router):
+    """
+    After `delay` seconds, log `count` warnings of `size` bytes from a new
+    thread, then after `broker_delay` seconds log once from the broker thread.
+    """
+    def flood():
+        time.sleep(delay)
+        for _ in range(count):
+            LOG.warning('%s', 'x' * size)
+
+    thread = threading.Thread(target=flood)
+    thread.daemon = True
+    thread.start()
+    timer = threading.Timer(delay + broker_delay, router.broker.defer,
+                            (LOG.warning, 'from broker'))
+    timer.daemon = True
+    timer.start()
+
+
+class ThrottleTest(testlib.RouterTestCase):
+    def setUp(self):
+        super(ThrottleTest, self).setUp()
+        # Swallow forwarded log floods.
+        logger = logging.getLogger('throttle_test')
+        self._propagate = logger.propagate
+        self._handler = logging.NullHandler()
+        logger.addHandler(self._handler)
+        logger.propagate = False
+
+    def tearDown(self):
+        logger = logging.getLogger('throttle_test')
+        logger.removeHandler(self._handler)
+        logger.propagate = self._propagate
+        super(ThrottleTest, self).tearDown()
+
+    def _stopped(self, context):
+        pid = context.call(os.getpid)
+        os.kill(pid, signal.SIGSTOP)
+        return pid
+
+    def test_sender_blocks_at_high_watermark(self):
+        context = self.router.local()
+        protocol = self.router.stream_by_id(context.context_id).protocol
+        blob = mitogen.core.Blob(b'x' * (1 << 20))
+        count = 64
+
+        def send():
+            for _ in range(count):
+                context.call_no_reply(discard, blob)
+
+        pid = self._stopped(context)
+        try:
+            thread = threading.Thread(target=send)
+            thread.start()
+            time.sleep(1.0)
+            self.assertTrue(thread.is_alive())
+            self.assertTrue(protocol.buffered <=
+                            protocol.high_watermark + 2 * len(blob))
+        finally:
+            os.kill(pid, signal.SIGCONT)
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(context.call(ping), 'pong')
+
+        stats = self.router.get_stats()['streams'][context.context_id]
+        self.assertTrue(stats['throttle_count'] > 0)
+        self.assertTrue(stats['buffered_max'] < count * len(blob) / 2)
+
+    def test_forward_log_never_blocks(self):
+        # A thread logging holds the logging handler lock. Were it blocked by
+        # flow control, the broker thread logging in turn would wait for that
+        # lock forever, so the stream would never drain.
+        parent = self.router.local()
+        child = self.router.local(via=parent)
+        pid = parent.call(os.getpid)
+        child.call(flood_log, 0.5, 400, 65536, 1.0)
+        os.kill(pid, signal.SIGSTOP)
+        try:
+            time.sleep(4.0)
+        finally:
+            os.kill(pid, signal.SIGCONT)
+        recv = child.call_async(ping)
+        self.assertEqual(recv.get(timeout=30).unpickle(), 'pong')
+
+
+    def test_hop_pauses_forwarding_to_stalled_peer(self):
+        # a forwards 64 MiB from the master to a stopped child. Without
+        # pausing the master's stream, a would buffer all of it.
+        hop = self.router.local()
+        child = self.router.local(via=hop)
+        sibling = self.router.local(via=hop)
+        blob = mitogen.core.Blob(b'x' * (1 << 20))
+        count = 64
+
+        def send():
+            for _ in range(count):
+                child.call_no_reply(record, blob)
+
+        pid = self._stopped(child)
+        try:
+            thread = threading.Thread(target=send)
+            thread.start()
+            time.sleep(2.0)
+            # The master blocks once it has a high_watermark of its own.
+            self.assertTrue(thread.is_alive())
+        finally:
+            os.kill(pid, signal.SIGCONT)
+        thread.join(30)
+        self.assertFalse(thread.is_alive())
+
+        # Messages to the sibling were stalled while paused, not lost.
+        self.assertEqual(sibling.call(ping), 'pong')
+        self.assertEqual(child.call(received_count), count)
+
+        stats = hop.call(stream_stats, child.context_id)
+        self.assertTrue(stats['buffered_max'] <=
+                        mitogen.core.MitogenProtocol.forward_watermark +
+                        2 * len(blob))
+        self.assertTrue(stats['pause_count'] > 0)
+
+
+if __name__ == '__main__':
+    testlib.unittest.main()